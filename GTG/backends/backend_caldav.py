@@ -21,8 +21,11 @@
 Backend for storing/loading tasks in CalDAV Tasks
 """
 import logging
+import os
 import re
+import threading
 from collections import defaultdict
+from urllib.parse import urlsplit
 from uuid import NAMESPACE_URL, UUID, uuid5
 from datetime import date, datetime
 from gettext import gettext as _
@@ -32,6 +35,7 @@ import caldav
 import requests
 from dateutil.tz import UTC
 from GTG.backends.backend_signals import BackendSignals
+from GTG.backends.caldav_sync import CollectionWatcher, href_key, key_url
 from GTG.backends.generic_backend import GenericBackend
 from GTG.backends.periodic_import_backend import PeriodicImportBackend
 from GTG.core.dates import LOCAL_TIMEZONE, Accuracy, Date
@@ -149,6 +153,10 @@ class Backend(PeriodicImportBackend):
             GenericBackend.PARAM_DEFAULT_VALUE: 'gtg'},
     }
 
+    # saving and deleting todos are independent requests, each worker
+    # sends them through its own session (see ThreadSessions)
+    PUSH_WORKERS = 4
+
     #
     # Backend standard methods
     #
@@ -160,7 +168,20 @@ class Backend(PeriodicImportBackend):
         """
         super().__init__(parameters)
         self._dav_client = None
+        self._watcher = None
         self._cache = TodoCache()
+        # what each calendar looked like at the last import, by URL: see
+        # CollectionWatcher
+        self._sync_states_path = os.path.join(
+            'caldav', 'sync_states-' + self.get_id())
+        self._sync_states = self._load_pickled_file(self._sync_states_path,
+                                                    {})
+        # the todos of each calendar at the end of the last session, by
+        # calendar URL then href: see _restore_todos
+        self._stored_todos_path = os.path.join(
+            'caldav', 'todos-' + self.get_id())
+        self._stored_todos = self._load_pickled_file(self._stored_todos_path,
+                                                     {})
 
     def initialize(self) -> None:
         super().initialize()
@@ -168,6 +189,20 @@ class Backend(PeriodicImportBackend):
             url=self._parameters['service-url'],
             username=self._parameters['username'],
             password=self._parameters['password'])
+        self._watcher = CollectionWatcher(self._dav_client,
+                                          (caldav.lib.error.DAVError,))
+        # todos and calendars keep a reference to this client: give each
+        # push worker its own session behind it
+        if isinstance(getattr(self._dav_client, 'session', None),
+                      requests.Session):
+            self._dav_client.session = ThreadSessions()
+
+    def get_push_host(self):
+        return urlsplit(self._parameters['service-url']).netloc or None
+
+    def save_state(self) -> None:
+        self._store_pickled_file(self._sync_states_path, self._sync_states)
+        self._store_pickled_file(self._stored_todos_path, self._dump_todos())
 
     @interruptible
     def do_periodic_import(self) -> None:
@@ -179,9 +214,12 @@ class Backend(PeriodicImportBackend):
             logger.debug("No network connectivity, skipping CalDAV import "
                          "for %r", self.get_id())
             return
+        # No store-wide lock here: fetching and parsing only read the
+        # store, and its changes are applied on the main loop (see
+        # Datastore.apply_from_thread), so pushes and other backends go
+        # on while the server answers.
         try:
-            with self.datastore.mutex:
-                self._do_periodic_import()
+            self._do_periodic_import()
         except Exception as error:
             errno = _dav_failure_errno(error)
             if errno is None:
@@ -198,9 +236,9 @@ class Backend(PeriodicImportBackend):
         if self._parameters["is-first-run"] or not self._cache.initialized:
             logger.warning("not loaded yet, ignoring set_task")
             return
-        with self.datastore.mutex:
-            if task.id not in self.datastore.tasks.lookup:
-                self.datastore.tasks.add(task)
+        if task.id not in self.datastore.tasks.lookup:
+            self.datastore.apply_from_thread(
+                lambda: self.datastore.tasks.add(task))
         self._set_task(task)
 
     @interruptible
@@ -250,25 +288,37 @@ class Backend(PeriodicImportBackend):
             self._remove_todo(UID_FIELD.get_dav(todo), todo)
             self._create_todo(task, calendar)
         elif todo:  # found one, saving it
-            if not Translator.should_sync(task, self.namespace, todo):
-                logger.debug('insufficient change, ignoring set_task call')
-                return
-            # A real change is going out: bump SEQUENCE now (RFC 5545 says
-            # SEQUENCE increments on a significant revision, not on every
-            # write). Doing it here -- and only here -- avoids the import/
-            # export loop where an echo of a remote change kept incrementing
-            # SEQUENCE past the server value on every sync cycle.
-            seq_value = SEQUENCE.get_gtg(task, self.namespace)
-            SEQUENCE.write_gtg(task, seq_value + 1, self.namespace)
-            # updating vtodo content
-            Translator.fill_vtodo(task, calendar.name, self.namespace,
-                                  todo.instance.vtodo)
+            # the task is only read under its lock, the request goes
+            # out without it
+            uid = str(task.id)
+            with self.datastore.task_lock(task.id):
+                fingerprint = Translator.fingerprint(task, self.namespace)
+                if not Translator.should_sync(
+                        task, self.namespace, todo,
+                        fingerprint=self._cache.get_fingerprint(uid)):
+                    logger.debug('insufficient change, '
+                                 'ignoring set_task call')
+                    self._cache.set_fingerprint(uid, fingerprint)
+                    return
+                # A real change is going out: bump SEQUENCE now (RFC 5545
+                # says SEQUENCE increments on a significant revision, not
+                # on every write). Doing it here -- and only here -- avoids
+                # the import/export loop where an echo of a remote change
+                # kept incrementing SEQUENCE past the server value on every
+                # sync cycle.
+                seq_value = SEQUENCE.get_gtg(task, self.namespace)
+                SEQUENCE.write_gtg(task, seq_value + 1, self.namespace)
+                # updating vtodo content
+                Translator.fill_vtodo(task, calendar.name, self.namespace,
+                                      todo.instance.vtodo)
             logger.info('SYNCING updating todo %r', todo)
             try:
                 todo.save()
             except caldav.lib.error.DAVError:
                 logger.exception('Something went wrong while updating '
                                  '%r => %r', task, todo)
+            else:
+                self._cache.set_fingerprint(uid, fingerprint)
         else:  # creating from task
             self._create_todo(task, calendar)
 
@@ -287,16 +337,19 @@ class Backend(PeriodicImportBackend):
 
     def _create_todo(self, task: Task, calendar: iCalendar):
         logger.info('SYNCING creating todo for %r', task)
-        new_todo, new_vtodo = None, Translator.fill_vtodo(
-            task, calendar.name, self.namespace)
+        with self.datastore.task_lock(task.id):
+            new_todo, new_vtodo = None, Translator.fill_vtodo(
+                task, calendar.name, self.namespace)
+            fingerprint = Translator.fingerprint(task, self.namespace)
         try:
             new_todo = calendar.add_todo(new_vtodo.serialize())
         except caldav.lib.error.DAVError:
             logger.exception('Something went wrong while creating '
                              '%r => %r', task, new_todo)
             return
-        uid = UID_FIELD.get_dav(todo=new_todo)
-        self._cache.set_todo(new_todo, str(uid_to_task_id(uid)))
+        uid = str(uid_to_task_id(UID_FIELD.get_dav(todo=new_todo)))
+        self._cache.set_todo(new_todo, uid)
+        self._cache.set_fingerprint(uid, fingerprint)
 
     def _remove_todo(self, uid: str, todo: iCalendar) -> None:
         logger.info('SYNCING removing todo for Task(%s)', uid)
@@ -323,38 +376,48 @@ class Backend(PeriodicImportBackend):
         for calendar in principal.calendars():
             self._cache.set_calendar(calendar)
 
-    def _clean_task_missing_from_backend(self, uid: str,
-                                         calendar_tasks: dict, counts: dict,
+    def _check_task_missing_from_backend(self, task: Task,
                                          import_started_on: datetime):
-        """For a given UID will decide if we remove it from GTG or ignore the
-        fact that it's missing"""
-        task, do_delete = None, False
-        task = calendar_tasks[uid]
+        """For a task missing from the fetched todos, decide if we remove it
+        from GTG or ignore the fact that it's missing. May fetch the todo,
+        so it runs on the sync thread.
+
+        Returns None to keep the task, ('delete', None) to remove it or
+        ('update', todo) to update it from its todo."""
         if import_started_on < task.date_added:
-            return
+            return None
         # if first run, we're getting all task, including completed
         # if we miss one, we delete it
         if not self._cache.initialized:
-            do_delete = True
+            return ('delete', None)
         # if cache is initialized, it's normal we missed completed
         # task, but we should have seen active ones
-        elif task.status == TaskStatus.ACTIVE:
-            __, calendar = self._get_todo_and_calendar(task)
-            if not calendar:
-                logger.warning("Couldn't find calendar for %r", task)
-                return
-            try:  # fetching missing todo from server
-                todo = calendar.todo_by_uid(remote_uid(task, self.namespace))
-            except caldav.lib.error.NotFoundError:
-                do_delete = True
-            else:
-                result = self._update_task(task, todo, force=True)
-                counts[result] += 1
-                return
-        if do_delete:  # the task was missing for a good reason
-            counts['deleted'] += 1
-            self._cache.del_todo(uid)
-            self.datastore.tasks.remove(UUID(uid))
+        if task.status != TaskStatus.ACTIVE:
+            return None
+        __, calendar = self._get_todo_and_calendar(task)
+        if not calendar:
+            logger.warning("Couldn't find calendar for %r", task)
+            return None
+        try:  # fetching missing todo from server
+            todo = calendar.todo_by_uid(remote_uid(task, self.namespace))
+        except caldav.lib.error.NotFoundError:
+            return ('delete', None)
+        return ('update', todo)
+
+    def _clean_task_missing_from_backend(self, uid: str, task: Task,
+                                         action: tuple, counts: dict):
+        """Apply the decision of _check_task_missing_from_backend"""
+        if self.datastore.tasks.lookup.get(UUID(uid)) is not task:
+            return  # changed locally meanwhile
+        what, todo = action
+        if what == 'update':
+            result = self._update_task(task, todo, force=True)
+            counts[result] += 1
+            return
+        # the task was missing for a good reason
+        counts['deleted'] += 1
+        self._cache.del_todo(uid)
+        self.datastore.tasks.remove(UUID(uid))
 
     @staticmethod
     def _denorm_children_on_vtodos(todos: list):
@@ -402,6 +465,48 @@ class Backend(PeriodicImportBackend):
 
     def _import_calendar_todos(self, calendar: iCalendar,
                                import_started_on: datetime, counts: dict):
+        """Import what changed in a calendar since the last import.
+
+        The cache has to know every todo before anything is pushed. The
+        first import of a session restores the todos stored by the last
+        one, or fetches them all when it can't. Later imports only fetch
+        the todos the server reports as changed, and skip the calendar
+        when nothing did."""
+        cal_url = str(calendar.url)
+        changes = None
+        if self._watcher is not None:
+            changes = self._watcher.changes(cal_url,
+                                            self._sync_states.get(cal_url))
+        if changes is None:
+            self._import_all_todos(calendar, import_started_on, counts)
+            return
+        applied = True
+        if not self._cache.initialized:
+            restored = self._restore_todos(calendar, changes)
+            if restored is None:
+                applied = self._import_all_todos(calendar, import_started_on,
+                                                 counts)
+            elif changes or restored:
+                logger.info('%r has %r since the last session', cal_url,
+                            changes)
+                applied = self._import_changed_todos(calendar, changes,
+                                                     counts, restored)
+        elif changes:
+            logger.info('%r has %r', cal_url, changes)
+            applied = self._import_changed_todos(calendar, changes, counts,
+                                                 [])
+        else:
+            logger.info('%r is unchanged, skipping it', cal_url)
+        # Recording the new state while the todos never reached the cache
+        # would make the next session take the old ones as up to date
+        if applied:
+            self._sync_states[cal_url] = changes.state
+
+    def _import_all_todos(self, calendar: iCalendar,
+                          import_started_on: datetime, counts: dict) -> bool:
+        # Fetching and parsing happen on this (sync) thread. The store is
+        # only changed on the main loop, all at once: see
+        # _apply_calendar_todos.
         # GTG does its own hierarchical sort below (__sort_todos) and
         # never uses the order returned by the library. An empty
         # sort_keys also keeps the library from eagerly parsing every
@@ -415,13 +520,153 @@ class Backend(PeriodicImportBackend):
                      if uid}
 
         # browsing all task linked to current calendar,
-        # removing missed ones we don't see in fetched todos
+        # checking missed ones we don't see in fetched todos
         calendar_tasks = dict(self._get_calendar_tasks(calendar))
+        missing = {}
         for uid in set(calendar_tasks).difference(todo_uids):
-            self._clean_task_missing_from_backend(uid, calendar_tasks, counts,
-                                                  import_started_on)
+            action = self._check_task_missing_from_backend(
+                calendar_tasks[uid], import_started_on)
+            if action is not None:
+                missing[uid] = (calendar_tasks[uid], action)
 
         self._denorm_children_on_vtodos(todos)
+        return self._apply_from_thread(todos, missing, counts)
+
+    def _import_changed_todos(self, calendar: iCalendar, changes,
+                              counts: dict, restored: list) -> bool:
+        """Fetch the changed todos of a calendar, one by one, and drop the
+        tasks of the removed ones. Restored todos without a task are
+        imported as well."""
+        cal_url = str(calendar.url)
+        cached = {href_key(todo.url): (uid, todo)
+                  for uid, todo in self._cache.calendar_todos(cal_url)}
+        removed = set(changes.removed)
+        fetched = []
+        for key in changes.changed:
+            todo = caldav.Todo(client=self._dav_client,
+                               url=key_url(cal_url, key), parent=calendar)
+            try:
+                todo.load()
+            except caldav.lib.error.NotFoundError:
+                removed.add(key)  # deleted since the listing
+                continue
+            if 'BEGIN:VTODO' not in (todo.data or ''):
+                continue  # an event or a journal of the same calendar
+            fetched.append(todo)
+        fetched = self._quarantine_unparsable_todos(fetched, counts)
+
+        missing = {}
+        for key in removed.intersection(cached):
+            uid = cached[key][0]
+            task = self.datastore.tasks.lookup.get(UUID(uid))
+            if task is not None:
+                missing[uid] = (task, ('delete', None))
+
+        replaced = {cached[key][0]
+                    for key in removed.union(changes.changed)
+                    if key in cached}
+        self._denorm_changed_children(cal_url, fetched, replaced)
+
+        todos = fetched + self._quarantine_unparsable_todos(restored, counts)
+        return self._apply_from_thread(todos, missing, counts)
+
+    def _apply_from_thread(self, todos: list, missing: dict,
+                           counts: dict) -> bool:
+        """Apply fetched todos on the main loop, see _apply_calendar_todos.
+        The tasks they change are locked from this thread meanwhile: the
+        main loop then never waits for a push to release them."""
+        tids = [UUID(uid) for uid in missing]
+        tids.extend(uid_to_task_id(uid)
+                    for uid in map(UID_FIELD.get_dav, todos) if uid)
+        with self.datastore.task_locks(tids):
+            return self.datastore.apply_from_thread(
+                lambda: self._apply_calendar_todos(todos, missing, counts))
+
+    def _denorm_changed_children(self, cal_url: str, fetched: list,
+                                 replaced: set):
+        """Like _denorm_children_on_vtodos, for the parents whose children
+        may have changed: the fetched todos and their old and new parents.
+        The other todos are known through the fields kept by the cache,
+        and are not parsed."""
+        todos_by_uid, fields = {}, []
+        affected = set()
+        for tid, todo in self._cache.calendar_todos(cal_url):
+            uid, parent, order = self._cache.get_fields(tid)
+            if tid in replaced:
+                affected.add(parent)  # may have lost a child
+                continue
+            todos_by_uid[uid] = todo
+            fields.append((uid, parent, order))
+        for todo in fetched:
+            uid, parent, order = todo_fields(todo)
+            todos_by_uid[uid] = todo
+            fields.append((uid, parent, order))
+            affected.update((uid, parent))
+        children_by_parent = defaultdict(list)
+        for uid, parent, order in fields:
+            if parent in affected:
+                children_by_parent[parent].append((order, uid))
+        for uid in affected.intersection(todos_by_uid):
+            children = sorted(children_by_parent[uid], key=lambda c: c[0])
+            CHILDREN_FIELD.write_dav(todos_by_uid[uid].instance.vtodo,
+                                     [child for __, child in children])
+
+    def _restore_todos(self, calendar: iCalendar, changes):
+        """Put the todos stored by the last session back in the cache.
+
+        The todos are not parsed. Those whose etag changed since are
+        added to the changes, to be fetched again; those removed since
+        are restored too, so that their task gets removed.
+        Returns the unchanged todos without a task, or None when nothing
+        was stored for the calendar."""
+        cal_url = str(calendar.url)
+        stored = self._stored_todos.pop(cal_url, None)
+        if not stored:
+            return None
+        etags = changes.state['etags']
+        orphans = []
+        for key, entry in stored.items():
+            if key not in etags and key not in changes.removed:
+                continue
+            todo = caldav.Todo(client=self._dav_client,
+                               url=key_url(cal_url, key),
+                               data=entry['data'], parent=calendar)
+            self._cache.set_todo(todo, entry['tid'], entry['fields'])
+            if key not in etags or key in changes.changed:
+                continue
+            if entry['etag'] != etags[key]:
+                changes.changed.add(key)
+            elif UUID(entry['tid']) not in self.datastore.tasks.lookup:
+                orphans.append(todo)
+        changes.changed.update(set(etags).difference(stored))
+        logger.info('Restored %d todos of %r', len(stored), cal_url)
+        return orphans
+
+    def _dump_todos(self) -> dict:
+        """The cached todos to store for the next session, along with the
+        etags of the last import. The stored todos of calendars that were
+        not imported during this session are kept."""
+        todos = dict(self._stored_todos)
+        for cal_url, state in self._sync_states.items():
+            etags = state.get('etags') or {}
+            entries = {}
+            for tid, todo in self._cache.calendar_todos(cal_url):
+                key, data = href_key(todo.url), getattr(todo, 'data', None)
+                if key in etags and isinstance(data, str):
+                    entries[key] = {'tid': tid, 'etag': etags[key],
+                                    'fields': self._cache.get_fields(tid),
+                                    'data': data}
+            if entries:
+                todos[cal_url] = entries
+        return todos
+
+    def _apply_calendar_todos(self, todos: list, missing: dict,
+                              counts: dict):
+        """Bring the store in line with the fetched todos of a calendar.
+        Runs on the main loop, see Datastore.apply_from_thread, while the
+        import holds the locks of the tasks (see _apply_from_thread)"""
+        for uid, (task, action) in missing.items():
+            self._clean_task_missing_from_backend(uid, task, action, counts)
 
         for todo in self.__sort_todos(todos):
             uid = UID_FIELD.get_dav(todo)
@@ -436,10 +681,10 @@ class Backend(PeriodicImportBackend):
                 task = Task(id=tid, title='')
                 Translator.fill_task(todo, task, self.namespace, self.datastore)
                 self.datastore.tasks.add(task)
-                counts['created'] += 1
+                result = 'created'
             else:
                 result = self._update_task(task, todo)
-                counts[result] += 1
+            counts[result] += 1
             # wire hierarchy with real Task objects; __sort_todos
             # guarantees parents are imported first. Conservative:
             # links are only created, never changed nor removed here.
@@ -449,7 +694,12 @@ class Backend(PeriodicImportBackend):
                     uid_to_task_id(parent_uids[0]))
                 if parent_task:
                     self.datastore.tasks.parent(tid, parent_task.id)
+            if result == 'unchanged':
+                continue  # local changes may be waiting to be pushed
+            self._cache.set_fingerprint(
+                str(tid), Translator.fingerprint(task, self.namespace))
             if logger.isEnabledFor(logging.DEBUG):
+                # no fingerprint given: this checks fill_task itself
                 if Translator.should_sync(task, self.namespace, todo):
                     logger.warning("Shouldn't be diff for %r", uid)
 
@@ -487,8 +737,10 @@ class Backend(PeriodicImportBackend):
     def _get_calendar_tasks(self, calendar: iCalendar):
         """Getting all tasks that has the calendar tag"""
         # lookup holds every task; data only holds toplevel ones, and
-        # iterating it would hide subtasks from the deletion detection
-        for task in self.datastore.tasks.lookup.values():
+        # iterating it would hide subtasks from the deletion detection.
+        # This runs on the sync thread while the main loop may change
+        # the store: iterate a copy.
+        for task in list(self.datastore.tasks.lookup.values()):
             if CATEGORIES.has_calendar_tag(task, calendar):
                 yield str(task.id), task
 
@@ -644,6 +896,10 @@ class Field:
         if self._is_value_allowed(value):
             self.write_gtg(task, value, namespace)
 
+    def get_gtg_state(self, task: Task, namespace: str = None):
+        """What the value of get_gtg depends on, for fingerprints"""
+        return self.get_gtg(task, namespace)
+
     def is_equal(self, task: Task, namespace: str, todo=None, vtodo=None):
         assert todo is not None or vtodo is not None
         dav = self.get_dav(todo, vtodo)
@@ -928,6 +1184,11 @@ class Description(Field):
         description = self._extract_plain_text(task)
         return self._get_content_hash(description), description
 
+    def get_gtg_state(self, task: Task, namespace: str = None) -> tuple:
+        # the raw content and subtasks, not the text extracted from them
+        return task.content, [(child.id, child.title, child.status)
+                              for child in task.children]
+
     def is_equal(self, task: Task, namespace: str, todo=None, vtodo=None):
         gtg_hash, gtg_value = self.get_gtg(task, namespace)
         dav_hash, dav_value = self.get_dav(todo, vtodo)
@@ -1244,26 +1505,83 @@ class Translator:
         return task
 
     @classmethod
-    def changed_attrs(cls, task: Task, namespace: str, todo=None, vtodo=None):
+    def fingerprint(cls, task: Task, namespace: str) -> str:
+        """Digest of what the synced fields of a task depend on"""
+        state = [field.get_gtg_state(task, namespace) for field in cls.fields
+                 if field.dav_name not in DAV_IGNORE]
+        return md5(repr(state).encode('utf8')).hexdigest()
+
+    @classmethod
+    def changed_attrs(cls, task: Task, namespace: str, todo=None, vtodo=None,
+                      fingerprint: str = None):
+        """Yield the fields differing between the task and the todo.
+
+        fingerprint is the one of the task when it last matched the todo:
+        while the task keeps it, fields are not compared one by one.
+        """
+        if fingerprint and fingerprint == cls.fingerprint(task, namespace):
+            return
         for field in cls.fields:
             if not field.is_equal(task, namespace, todo, vtodo):
                 yield field
 
     @classmethod
-    def should_sync(cls, task: Task, namespace: str, todo=None, vtodo=None):
-        for field in cls.changed_attrs(task, namespace, todo, vtodo):
+    def should_sync(cls, task: Task, namespace: str, todo=None, vtodo=None,
+                    fingerprint: str = None):
+        for field in cls.changed_attrs(task, namespace, todo, vtodo,
+                                       fingerprint):
             if field.dav_name not in DAV_IGNORE:
                 return True
         return False
 
 
+def todo_fields(todo) -> tuple:
+    """The UID, the parent UID and the sort order of a todo: what it takes
+    to denormalize children without keeping the todo parsed."""
+    parents = PARENT_FIELD.get_dav(todo)
+    return (UID_FIELD.get_dav(todo), parents[0] if parents else None,
+            str(SORT_ORDER.get_dav(todo)))
+
+
+class ThreadSessions:
+    """Stands for the requests session of a DAV client, handing each
+    thread a session of its own.
+
+    requests sessions are not meant to be shared between threads, while
+    every caldav object sends its requests through the client it was
+    created with.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """The session of the calling thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
 class TodoCache:
+    """Calendars and todos known to the backend, by URL, name and uid.
+
+    Push workers, the sync thread and the main loop all use it: every
+    access goes through a lock.
+    """
 
     def __init__(self):
         self.calendars_by_name = {}
         self.calendars_by_url = {}
         self.todos_by_uid = {}
+        self.fields_by_uid = {}
+        self.fingerprints_by_uid = {}
         self._initialized = False
+        self._lock = threading.RLock()
 
     @property
     def initialized(self):
@@ -1277,30 +1595,67 @@ class TodoCache:
 
     def get_calendar(self, name=None, url=None):
         assert name or url
-        if name is not None:
-            calendar = self.calendars_by_name.get(name)
-            if calendar:
-                return calendar
-        if url is not None:
-            calendar = self.calendars_by_name.get(url)
-            if calendar:
-                return calendar
+        with self._lock:
+            if name is not None:
+                calendar = self.calendars_by_name.get(name)
+                if calendar:
+                    return calendar
+            if url is not None:
+                calendar = self.calendars_by_name.get(url)
+                if calendar:
+                    return calendar
         logger.error('no calendar for %r or %r', name, url)
 
     @property
     def calendars(self):
-        for url, calendar in self.calendars_by_url.items():
-            yield url, calendar
+        with self._lock:
+            calendars = list(self.calendars_by_url.items())
+        yield from calendars
 
     def set_calendar(self, calendar):
-        self.calendars_by_url[str(calendar.url)] = calendar
-        self.calendars_by_name[calendar.name] = calendar
+        with self._lock:
+            self.calendars_by_url[str(calendar.url)] = calendar
+            self.calendars_by_name[calendar.name] = calendar
 
     def get_todo(self, uid):
-        return self.todos_by_uid.get(uid)
-
-    def set_todo(self, todo, uid):
-        self.todos_by_uid[uid] = todo
+        with self._lock:
+            return self.todos_by_uid.get(uid)
+
+    def set_todo(self, todo, uid, fields=None):
+        with self._lock:
+            self.todos_by_uid[uid] = todo
+            self.fingerprints_by_uid.pop(uid, None)
+            if fields is None:
+                self.fields_by_uid.pop(uid, None)
+            else:
+                self.fields_by_uid[uid] = fields
+
+    def get_fields(self, uid):
+        """See todo_fields, computed when the todo got no stored ones"""
+        with self._lock:
+            if uid not in self.fields_by_uid:
+                self.fields_by_uid[uid] = todo_fields(self.todos_by_uid[uid])
+            return self.fields_by_uid[uid]
+
+    def get_fingerprint(self, uid):
+        """See Translator.fingerprint, only kept for the cached todo"""
+        with self._lock:
+            return self.fingerprints_by_uid.get(uid)
+
+    def set_fingerprint(self, uid, fingerprint):
+        with self._lock:
+            self.fingerprints_by_uid[uid] = fingerprint
+
+    def calendar_todos(self, url):
+        """Yield the uid and todo of every cached todo of a calendar"""
+        with self._lock:
+            todos = list(self.todos_by_uid.items())
+        for uid, todo in todos:
+            if str(getattr(todo.parent, 'url', None)) == url:
+                yield uid, todo
 
     def del_todo(self, uid):
-        self.todos_by_uid.pop(uid, None)
+        with self._lock:
+            self.todos_by_uid.pop(uid, None)
+            self.fields_by_uid.pop(uid, None)
+            self.fingerprints_by_uid.pop(uid, None)
@@ -78,6 +78,9 @@ class _BackendSignalsGObject(GObject.GObject):
     BACKEND_FAILED = 'backend-failed'
     BACKEND_SYNC_STARTED = 'backend-sync-started'
     BACKEND_SYNC_ENDED = 'backend-sync-ended'
+    # the push queues of a backend were drained: how many tasks were
+    # pushed, how many failed and how long it took, in seconds
+    BACKEND_PUSHED = 'backend-pushed'
     INTERACTION_REQUESTED = 'user-interaction-requested'
 
     INTERACTION_CONFIRM = 'confirm'
@@ -90,6 +93,8 @@ class _BackendSignalsGObject(GObject.GObject):
                     BACKEND_REMOVED: signal_type_factory(str),
                     BACKEND_SYNC_STARTED: signal_type_factory(str),
                     BACKEND_SYNC_ENDED: signal_type_factory(str),
+                    BACKEND_PUSHED: signal_type_factory(str, int, int,
+                                                        float),
                     DEFAULT_BACKEND_LOADED: signal_type_factory(),
                     BACKEND_FAILED: signal_type_factory(str, str),
                     INTERACTION_REQUESTED: signal_type_factory(str, str,
@@ -98,6 +103,8 @@ class _BackendSignalsGObject(GObject.GObject):
     def __init__(self):
         super().__init__()
         self.backends_currently_syncing = []
+        # pushed, failed and seconds spent pushing, by backend
+        self.push_totals = {}
 
     # Signals ###############################################################
     # connecting to signals is fine, but keep an eye if you should emit them.
@@ -145,3 +152,16 @@ class _BackendSignalsGObject(GObject.GObject):
 
     def is_backend_syncing(self, backend_id):
         return backend_id in self.backends_currently_syncing
+
+    def backend_pushed(self, backend_id, pushed, failed, seconds):
+        totals = self.push_totals.setdefault(backend_id, [0, 0, 0.0])
+        totals[0] += pushed
+        totals[1] += failed
+        totals[2] += seconds
+        GLib.idle_add(self.emit, self.BACKEND_PUSHED, backend_id, pushed,
+                      failed, seconds)
+
+    def get_push_throughput(self, backend_id):
+        """Tasks pushed per second by a backend, over all its drains."""
+        pushed, _, seconds = self.push_totals.get(backend_id, (0, 0, 0.0))
+        return pushed / seconds if seconds else 0.0
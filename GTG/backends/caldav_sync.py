@@ -0,0 +1,334 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Change detection for CalDAV collections.
+
+Downloading every object of a calendar on each periodic import is slow
+on big calendars, while most of the time nothing changed. A server can
+tell which objects changed, in decreasing order of efficiency:
+
+ * with a sync-collection REPORT (RFC 6578), answering only the objects
+   changed or removed since a sync token it handed out before;
+ * with the ctag of the collection (a CalendarServer extension), which
+   changes whenever any object of the collection does;
+ * with the etag of every object, listed by a PROPFIND.
+
+The state kept between two imports is a plain dict, so that it can be
+pickled along with the backend state.
+"""
+
+import logging
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import quote, unquote, urljoin, urlsplit
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+log = logging.getLogger(__name__)
+
+DAV = '{DAV:}'
+CS = '{http://calendarserver.org/ns/}'
+
+SYNC_COLLECTION = """<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:">
+  <d:sync-token>{token}</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop><d:getetag/></d:prop>
+</d:sync-collection>"""
+
+CTAG_PROPFIND = """<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="DAV:" xmlns:cs="http://calendarserver.org/ns/">
+  <d:prop><cs:getctag/></d:prop>
+</d:propfind>"""
+
+ETAG_PROPFIND = """<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="DAV:">
+  <d:prop><d:getetag/><d:resourcetype/></d:prop>
+</d:propfind>"""
+
+#: Multi-Status, the only answer carrying the listings we ask for
+MULTI_STATUS = 207
+
+
+def href_key(url) -> str:
+    """The unquoted path of a URL, to compare hrefs with object URLs."""
+
+    return unquote(urlsplit(str(url)).path)
+
+
+def key_url(collection_url, key: str) -> str:
+    """The absolute URL of an object of a collection, from its key."""
+
+    return urljoin(str(collection_url), quote(key))
+
+
+class CollectionChanges:
+    """The objects of a collection changed since the last import."""
+
+
+    def __init__(self, changed: Set[str], removed: Set[str],
+                 state: dict) -> None:
+        #: Keys (see href_key) of the new or modified objects
+        self.changed = changed
+
+        #: Keys of the objects gone from the collection
+        self.removed = removed
+
+        #: State to keep once these changes have been imported
+        self.state = state
+
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+    def __repr__(self) -> str:
+        return (f'<CollectionChanges {len(self.changed)} changed, '
+                f'{len(self.removed)} removed>')
+
+
+
+class CollectionWatcher:
+    """Ask a DAV server what changed in its collections.
+
+    The client only needs report() and propfind() methods taking a URL,
+    a request body and a depth, and returning a response with a status
+    and its XML, like caldav.DAVClient. Errors listed in `errors` are
+    taken as the server not supporting a request; anything else, like a
+    network failure, propagates.
+    """
+
+
+    def __init__(self, client, errors: Tuple[type, ...] = ()) -> None:
+        self.client = client
+        self.errors = errors
+
+
+    def changes(self, url, state: Optional[dict]) -> Optional[CollectionChanges]:
+        """Objects changed in a collection since the given state.
+
+        With no state, every object of the collection counts as changed.
+        Returns None when the server gave no usable answer, in which case
+        the caller has to fetch the whole collection.
+        """
+
+        state = state or {}
+        url = str(url)
+        known = state.get('etags')
+
+        if state.get('sync-collection', True):
+            listing = self._sync_collection(url, state)
+
+            if listing is not None:
+                token, etags = listing
+                new_state = {'sync-token': token, 'etags': etags}
+                return self._compare(known, new_state)
+
+        ctag = self._ctag(url)
+
+        if ctag is not None and known is not None and ctag == state.get('ctag'):
+            return CollectionChanges(set(), set(), dict(state))
+
+        etags = self._etags(url)
+
+        if etags is None:
+            return None
+
+        new_state = {'sync-collection': False, 'ctag': ctag, 'etags': etags}
+        return self._compare(known, new_state)
+
+
+    @staticmethod
+    def _compare(known: Optional[Dict[str, str]],
+                 state: dict) -> CollectionChanges:
+        etags = state['etags']
+
+        if known is None:
+            return CollectionChanges(set(etags), set(), state)
+
+        changed = {key for key, etag in etags.items()
+                   if known.get(key) != etag}
+        removed = set(known).difference(etags)
+        return CollectionChanges(changed, removed, state)
+
+
+    def _sync_collection(self, url: str,
+                         state: dict) -> Optional[Tuple[str, Dict[str, str]]]:
+        """The new sync token and the etags of all objects, or None.
+
+        A known token only brings the difference since then. A token the
+        server forgot (RFC 6578 lets it) restarts from an empty token,
+        which lists every object.
+        """
+
+        token = state.get('sync-token')
+        known = state.get('etags')
+
+        if token and known is not None:
+            delta = self._sync_report(url, token)
+
+            if delta is not None:
+                new_token, changed, removed = delta
+                etags = dict(known)
+                etags.update(changed)
+
+                for key in removed:
+                    etags.pop(key, None)
+
+                return new_token, etags
+
+            log.debug('Sync token of %r refused, starting over', url)
+
+        listing = self._sync_report(url, '')
+
+        if listing is None:
+            log.debug('%r does not support sync-collection', url)
+            return None
+
+        new_token, etags, _ = listing
+        return new_token, etags
+
+
+    def _sync_report(self, url: str, token: str
+                     ) -> Optional[Tuple[str, Dict[str, str], Set[str]]]:
+        body = SYNC_COLLECTION.format(token=escape(token))
+        # RFC 6578: the depth is given by sync-level, Depth must be 0
+        tree = self._request(self.client.report, url, body, 0)
+
+        if tree is None:
+            return None
+
+        new_token = tree.findtext(DAV + 'sync-token')
+
+        if not new_token:
+            return None
+
+        changed: Dict[str, str] = {}
+        removed: Set[str] = set()
+        collection = href_key(url).rstrip('/')
+
+        for key, status, props in self._responses(tree):
+            if key.rstrip('/') == collection:
+                continue
+            elif status == 404:
+                removed.add(key)
+            elif props is not None:
+                changed[key] = props.findtext(DAV + 'getetag') or ''
+
+        return new_token, changed, removed
+
+
+    def _ctag(self, url: str) -> Optional[str]:
+        tree = self._request(self.client.propfind, url, CTAG_PROPFIND, 0)
+
+        if tree is None:
+            return None
+
+        for _, _, props in self._responses(tree):
+            if props is not None:
+                return props.findtext(CS + 'getctag') or None
+
+        return None
+
+
+    def _etags(self, url: str) -> Optional[Dict[str, str]]:
+        tree = self._request(self.client.propfind, url, ETAG_PROPFIND, 1)
+
+        if tree is None:
+            return None
+
+        etags: Dict[str, str] = {}
+        collection = href_key(url).rstrip('/')
+
+        for key, _, props in self._responses(tree):
+            if key.rstrip('/') == collection or props is None:
+                continue
+
+            if props.find(f'{DAV}resourcetype/{DAV}collection') is not None:
+                continue
+
+            etags[key] = props.findtext(DAV + 'getetag') or ''
+
+        return etags
+
+
+    def _request(self, method, url: str, body: str, depth: int):
+        """The multistatus element answered by the server, or None."""
+
+        try:
+            response = method(url, body, depth)
+        except self.errors as error:
+            log.debug('%r refused a request: %s', url, error)
+            return None
+
+        if getattr(response, 'status', None) != MULTI_STATUS:
+            return None
+
+        tree = getattr(response, 'tree', None)
+
+        if not isinstance(tree, etree._Element):
+            raw = getattr(response, 'raw', None)
+
+            if not isinstance(raw, (bytes, str)):
+                return None
+
+            try:
+                tree = etree.fromstring(
+                    raw.encode() if isinstance(raw, str) else raw)
+            except etree.XMLSyntaxError:
+                log.warning('Unparsable answer from %r', url)
+                return None
+
+        if tree.tag != DAV + 'multistatus':
+            return None
+
+        return tree
+
+
+    @staticmethod
+    def _responses(tree):
+        """Yield the key, status and successful properties of responses.
+
+        The status is the one of the response itself, if any, and the
+        properties are None when no propstat succeeded.
+        """
+
+        for response in tree.iterfind(DAV + 'response'):
+            href = response.findtext(DAV + 'href')
+
+            if not href:
+                continue
+
+            status = _status_code(response.findtext(DAV + 'status'))
+            props = None
+
+            for propstat in response.iterfind(DAV + 'propstat'):
+                if _status_code(propstat.findtext(DAV + 'status')) == 200:
+                    props = propstat.find(DAV + 'prop')
+                    break
+
+            yield href_key(href), status, props
+
+
+def _status_code(status_line: Optional[str]) -> Optional[int]:
+    """The code of a status line like 'HTTP/1.1 404 Not Found'."""
+
+    try:
+        return int(status_line.split()[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
@@ -21,12 +21,15 @@ This file contains the most generic representation of a backend,
 the GenericBackend class
 """
 
-from collections import deque
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from functools import reduce
 import errno
 import os
 import pickle
 import threading
+import time
 import logging
 from typing import Dict, Any
 
@@ -44,9 +47,34 @@ log = logging.getLogger(__name__)
 MAX_SYNC_ATTEMPTS = 3
 PICKLE_BACKUP_NBR = 2
 
+# How many pushes may run at once against the same host, whatever the
+# number of backends talking to it (see GenericBackend.PUSH_WORKERS).
+MAX_PUSHES_PER_HOST = 4
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
 ALLTASKS_TAG = 'gtg-tags-all'
 
 
+def _push_slots(host):
+    """The semaphore bounding the pushes running at once against a host."""
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(
+                MAX_PUSHES_PER_HOST)
+        return _host_slots[host]
+
+
+def _depth(task):
+    """How many ancestors a task has."""
+    depth = 0
+    parent = getattr(task, 'parent', None)
+    while parent is not None:
+        depth += 1
+        parent = parent.parent
+    return depth
+
+
 class GenericBackend():
     """
     Base class for every backend.
@@ -91,6 +119,10 @@ class GenericBackend():
     # The complete list of constants and their meaning is given below.
     _static_parameters: Dict[str,Dict[str,Any]] = {}
 
+    # How many tasks launch_setting_thread pushes at once. Backends whose
+    # set_task and remove_task can run in parallel may raise it.
+    PUSH_WORKERS = 1
+
     def initialize(self):
         """
         Called each time it is enabled (including on backend creation).
@@ -133,6 +165,15 @@ class GenericBackend():
         """
         pass
 
+    def get_push_host(self):
+        """
+        Optional. The host tasks are pushed to, to bound the number of
+        pushes running at once against it when PUSH_WORKERS is above 1.
+
+        @returns string: the host, or None for no bound
+        """
+        return None
+
     def this_is_the_first_run(self, xml):
         """
         Optional, and almost surely not needed.
@@ -309,6 +350,11 @@ class GenericBackend():
             lambda: self.please_quit)
         self.to_set = deque()
         self.to_remove = deque()
+        # Tasks taken off to_set by a parallel drain whose push has not
+        # started yet: a new edit of one of them is picked up by that push,
+        # so queue_set_task does not queue it again (see __push_in_parallel).
+        self._pending_sets = set()
+        self._pending_lock = threading.Lock()
         # Per-task consecutive push/delete failure counters, reset on
         # success and capped by MAX_SYNC_ATTEMPTS (see launch_setting_thread).
         self._sync_failures = {}
@@ -657,13 +703,28 @@ class GenericBackend():
         the changes that have been issued from GTG core.
         In particular, for each task in the self.to_set queue, a task
         has to be modified or to be created (if the tid is new), and for
-        each task in the self.to_remove queue, a task has to be deleted
+        each task in the self.to_remove queue, a task has to be deleted.
+        With PUSH_WORKERS above 1, see __push_in_parallel.
 
         @param bypass_quit_request: if True, the thread should not be stopped
                                     even if asked by self.please_quit = True.
                                     It's used when the backend quits, to finish
                                     syncing all pending tasks
         """
+        started = time.monotonic()
+        counts = {'pushed': 0, 'failed': 0}
+        if self.PUSH_WORKERS > 1:
+            self.__push_in_parallel(bypass_quit_request, counts)
+        else:
+            self.__push_in_sequence(bypass_quit_request, counts)
+        if counts['pushed'] or counts['failed']:
+            self._signal_manager.backend_pushed(
+                self.get_id(), counts['pushed'], counts['failed'],
+                time.monotonic() - started)
+        # we release the weak lock
+        self.to_set_timer = None
+
+    def __push_in_sequence(self, bypass_quit_request, counts):
         while not self.please_quit or bypass_quit_request:
             try:
                 tid = self.to_set.pop()
@@ -675,9 +736,11 @@ class GenericBackend():
                     try:
                         self.set_task(task)
                         self._sync_failures.pop(tid, None)
+                        counts['pushed'] += 1
                     except Exception:
                         log.exception("Backend %s failed to push task %s",
                                       self.get_id(), tid)
+                        counts['failed'] += 1
                         if self.__handle_sync_failure(tid, self.to_set):
                             break
 
@@ -689,13 +752,105 @@ class GenericBackend():
             try:
                 self.remove_task(tid)
                 self._sync_failures.pop(tid, None)
+                counts['pushed'] += 1
             except Exception:
                 log.exception("Backend %s failed to delete task %s",
                               self.get_id(), tid)
+                counts['failed'] += 1
                 if self.__handle_sync_failure(tid, self.to_remove):
                     break
-        # we release the weak lock
-        self.to_set_timer = None
+
+    def __push_in_parallel(self, bypass_quit_request, counts):
+        """
+        Drain the queues running up to PUSH_WORKERS pushes at once.
+
+        The tasks to save go by waves of tasks as deep in the task tree, so
+        that a parent is on the server before its children are. Removals
+        only start after every save, like in a sequential drain. As there,
+        a failed push that gets re-queued ends the saves of this cycle: the
+        waves left are put back in the queue.
+
+        Until its push starts, a drained task stays in _pending_sets, so
+        editing it meanwhile doesn't queue a second push. An edit made once
+        the push has started is queued again, as the push may have read the
+        task before it.
+        """
+        sets = []
+        with self._pending_lock:
+            while self.to_set:
+                tid = self.to_set.pop()
+                task = self.datastore.tasks.lookup.get(tid)
+                if task and tid not in self.to_remove:
+                    sets.append((tid, task))
+                    self._pending_sets.add(tid)
+        try:
+            self.__push_drained(sets, bypass_quit_request, counts)
+        finally:
+            # Whatever wasn't pushed has been put back in to_set
+            with self._pending_lock:
+                self._pending_sets.clear()
+
+    def __push_drained(self, sets, bypass_quit_request, counts):
+        waves = defaultdict(list)
+        for tid, task in sets:
+            waves[_depth(task)].append((tid, task))
+        removals = []
+        while self.to_remove:
+            tid = self.to_remove.pop()
+            removals.append((tid, tid))
+
+        set_waves = [waves[depth] for depth in sorted(waves)]
+        with ThreadPoolExecutor(max_workers=self.PUSH_WORKERS,
+                                thread_name_prefix='push') as pool:
+            for index, wave in enumerate(set_waves):
+                if self.please_quit and not bypass_quit_request:
+                    self.__requeue(self.to_set, set_waves[index:])
+                    self.__requeue(self.to_remove, [removals])
+                    return
+                if self.__push_wave(pool, self.set_task, self.to_set, wave,
+                                    counts):
+                    self.__requeue(self.to_set, set_waves[index + 1:])
+                    break
+            if self.please_quit and not bypass_quit_request:
+                self.__requeue(self.to_remove, [removals])
+                return
+            self.__push_wave(pool, self.remove_task, self.to_remove,
+                             removals, counts)
+
+    def __push_wave(self, pool, push, queue, wave, counts):
+        """
+        Run the pushes of a wave at once and wait for them. Returns True
+        when a failed push was re-queued.
+        """
+        host = self.get_push_host()
+        slots = _push_slots(host) if host else nullcontext()
+
+        def run(tid, item):
+            with self._pending_lock:
+                self._pending_sets.discard(tid)
+            with slots:
+                push(item)
+
+        futures = [(tid, pool.submit(run, tid, item)) for tid, item in wave]
+        requeued = False
+        for tid, future in futures:
+            error = future.exception()
+            if error is None:
+                self._sync_failures.pop(tid, None)
+                counts['pushed'] += 1
+                continue
+            log.error("Backend %s failed to push task %s", self.get_id(),
+                      tid, exc_info=error)
+            counts['failed'] += 1
+            requeued |= self.__handle_sync_failure(tid, queue)
+        return requeued
+
+    @staticmethod
+    def __requeue(queue, waves):
+        """Put back waves not pushed yet, to be popped first and in order."""
+        for wave in reversed(waves):
+            for tid, __ in reversed(wave):
+                queue.append(tid)
 
     def __handle_sync_failure(self, tid, queue):
         """React to a set_task/remove_task that raised.
@@ -742,9 +897,13 @@ class GenericBackend():
 
         @param tid: the task UUID that should be saved
         """
-        if tid not in self.to_set and tid not in self.to_remove:
+        with self._pending_lock:
+            # A drained task whose push hasn't started is sent as it is now
+            if tid in self._pending_sets or tid in self.to_set \
+                    or tid in self.to_remove:
+                return
             self.to_set.appendleft(tid)
-            self.__try_launch_setting_thread()
+        self.__try_launch_setting_thread()
 
     def queue_remove_task(self, tid):
         """
@@ -21,12 +21,13 @@
 
 from gi.repository import GObject, GLib # type: ignore[import-untyped]
 
+from contextlib import contextmanager
 from uuid import UUID
 import logging
 import threading
 
 from lxml.etree import _Element
-from typing import Dict, Optional, TypeVar, Generic
+from typing import Dict, Iterator, Optional, TypeVar, Generic
 from typing_extensions import Self
 
 
@@ -94,14 +95,56 @@ class StoreItem(GObject.Object):
 
 
 
+class StoreBatch:
+    """The items affected by the signals held back during a batch."""
+
+
+    def __init__(self) -> None:
+        #: Every affected item by id, their old and new parents included
+        self.items: Dict[UUID, StoreItem] = {}
+
+        #: Affected items by id, for each held back signal
+        self.signals: Dict[str, Dict[UUID, StoreItem]] = {}
+
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+
+    def note(self, signal: str, item: StoreItem,
+             parent: Optional[StoreItem] = None) -> None:
+        """Remember an item a signal was held back for."""
+
+        self.signals.setdefault(signal, {})[item.id] = item
+
+        for affected in (item, item.parent, parent):
+            if affected is not None:
+                self.items[affected.id] = affected
+
+
+    def get(self, signal: str) -> Dict[UUID, StoreItem]:
+        """Items a signal was held back for, by id."""
+
+        return self.signals.get(signal, {})
+
+
+
 class BaseStore(GObject.Object,Generic[S]):
     """Base class for data stores."""
 
+    #: Signals held back by batch(), for one batch-changed at the end
+    BATCHED_SIGNALS = ('added', 'removed', 'parent-change', 'parent-removed')
+
 
     def __init__(self) -> None:
         self.lookup: Dict[UUID, S] = {}
         self.data: list[S] = []
 
+        # Each thread has its own batch (and nesting depth), so signals
+        # from a worker never end up in the main loop's batch or the
+        # other way round.
+        self._batches = threading.local()
+
         super().__init__()
 
     # --------------------------------------------------------------------------
@@ -120,11 +163,61 @@ class BaseStore(GObject.Object,Generic[S]):
         loop with idle_add in that case; on the main thread, emit
         directly so existing callers keep their synchronous behaviour.
         """
-        if threading.current_thread() is threading.main_thread():
+        batch = self._current_batch()
+
+        if batch is not None and signal in self.BATCHED_SIGNALS:
+            batch.note(signal, *args)
+        elif threading.current_thread() is threading.main_thread():
             self.emit(signal, *args)
         else:
             GLib.idle_add(self.emit, signal, *args)
 
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Hold back the item signals until the end of the block.
+
+        Bulk changes used to emit a signal per item, each one reaching
+        every listener. Within the block, the item signals are collected
+        instead, and a single batch-changed signal carries them at the
+        end. Batches can be nested: the outermost one emits.
+
+        A batch only holds the signals of the thread that opened it;
+        other threads keep emitting theirs as usual, or open their own.
+        """
+
+        state = self._batches
+
+        if getattr(state, 'batch', None) is None:
+            state.batch = StoreBatch()
+            state.depth = 0
+
+        state.depth += 1
+
+        try:
+            yield
+        finally:
+            state.depth -= 1
+
+            if state.depth == 0:
+                batch, state.batch = state.batch, None
+
+                if batch:
+                    self._end_batch(batch)
+
+
+    def _current_batch(self) -> Optional[StoreBatch]:
+        """The batch open in the calling thread, if any."""
+
+        return getattr(self._batches, 'batch', None)
+
+
+    def _end_batch(self, batch: StoreBatch) -> None:
+        """Deliver the signals held back during a batch."""
+
+        self._emit('batch-changed', batch)
+
+
     def new(self) -> S:
         """Creates a new item in the store.
         NOTE: Subclasses may override the signature of this method.
@@ -182,6 +275,11 @@ class BaseStore(GObject.Object,Generic[S]):
         """Signal to emit when an item's parent is removed."""
 
 
+    @GObject.Signal(name='batch-changed', arg_types=(object,))
+    def batch_changed_signal(self, *_):
+        """Signal to emit with the StoreBatch of a batch() block."""
+
+
     def remove(self, item_id: UUID) -> None:
         """Remove an existing item from the store."""
 
@@ -203,9 +301,10 @@ class BaseStore(GObject.Object,Generic[S]):
 
     def batch_remove(self,item_ids: list[UUID]) -> None:
         """Remove multiple items, ensuring nothing gets deleted twice"""
-        for key in item_ids:
-            if key in self.lookup:
-                self.remove(key)
+        with self.batch():
+            for key in item_ids:
+                if key in self.lookup:
+                    self.remove(key)
 
 
     # --------------------------------------------------------------------------
@@ -281,6 +380,11 @@ class BaseStore(GObject.Object,Generic[S]):
         raise NotImplementedError
 
 
+    def item_to_xml(self, item: S) -> _Element:
+        """Serialize a single item, as it appears inside to_xml()."""
+        raise NotImplementedError
+
+
     # --------------------------------------------------------------------------
     # UTILITIES
     # --------------------------------------------------------------------------
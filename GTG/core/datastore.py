@@ -20,19 +20,26 @@
 
 import os
 import re
+import fcntl
+import queue
+import functools
 import threading
 import logging
 import shutil
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 from time import time
 import random
 import string
 
-from GTG.core.tasks import TaskStore, Task, Filter
+from GTG.core.base_store import StoreBatch
+from GTG.core.tasks import TaskStore, Task, ParsedTask, Status, TaskRecord
 from GTG.core.tags import TagStore, Tag
 from GTG.core.saved_searches import SavedSearchStore
 from GTG.core import firstrun_tasks
 from GTG.core.dates import Date
+from GTG.core.journal import Journal, Changes, Record
+from GTG.core.snapshot_cache import SnapshotCache
 from GTG.backends.backend_signals import BackendSignals
 from GTG.backends.generic_backend import GenericBackend
 from GTG.core.config import CoreConfig
@@ -43,11 +50,45 @@ import GTG.core.versioning as versioning
 from gi.repository import GObject, GLib # type: ignore[import-untyped]
 from lxml import etree as et
 
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, FrozenSet, Iterable, Iterator, List, Set, Tuple
+from uuid import UUID
 
 
 log = logging.getLogger(__name__)
 
+# ioctl request cloning a whole file (FICLONE, from linux/fs.h)
+FICLONE = 0x40049409
+
+
+def clone_file(source: str, target: str) -> None:
+    """Make target a copy of source, sharing its data if possible.
+
+    Try a hard link, then a reflink (copy-on-write clone, on btrfs, XFS,
+    bcachefs...), then fall back to a plain copy. A hard link is only a
+    valid copy because the data file is never modified in place: saving
+    writes a new file and moves it over the old one (see write_file).
+    """
+
+    try:
+        os.remove(target)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(source, target)
+        return
+    except OSError:
+        pass
+
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except OSError:
+        pass
+
+    shutil.copy(source, target)
+
 
 class TaskCounts(GObject.Object):
     __gtype_name__ = 'TaskCounts'
@@ -63,13 +104,27 @@ class TaskCounts(GObject.Object):
 
 
 
+#: What a task adds to the counts: whether it is open, whether it is
+#: actionable, and the handles of the counts it belongs to
+Contribution = Tuple[bool, bool, FrozenSet[str]]
+
+
 class TagStats:
+    """Task counts of every tag, kept up to date as tasks change.
+
+    Each task remembers what it added to the counts. When it changes,
+    only the difference with what it adds now is applied, which costs as
+    much as the amount of tags on the task instead of a recount of every
+    task. Changes are gathered and applied once the main loop is idle.
+    """
 
     def __init__(self,tags:TagStore,tasks:TaskStore):
         self.tags = tags
         self.tasks = tasks
         self.stats: dict[str,TaskCounts] = dict()
         self.recalculation_scheduled: bool = False
+        self.contributions: Dict[UUID, Contribution] = {}
+        self._pending: Dict[UUID, Task] = {}
 
 
     def get_by_tag(self,tag:Tag) -> TaskCounts:
@@ -87,6 +142,28 @@ class TagStats:
         return self.stats[handle]
 
 
+    def on_task_changed(self, _store, task: Task,
+                        parent: Optional[Task] = None) -> None:
+        """Queue a changed task for the next update.
+
+        Parents come along: whether a task is actionable depends on
+        whether its children are still open.
+        """
+
+        for changed in (task, task.parent, parent):
+            if changed is not None:
+                self._pending[changed.id] = changed
+
+        self.schedule_recalculation()
+
+
+    def on_batch_changed(self, _store, batch: StoreBatch) -> None:
+        """Queue the tasks of a store batch for the next update."""
+
+        self._pending.update(batch.items)
+        self.schedule_recalculation()
+
+
     def schedule_recalculation(self) -> None:
         """Schedule the recalculation of stats after higher priority events."""
         if self.recalculation_scheduled:
@@ -96,40 +173,122 @@ class TagStats:
 
 
     def _do_recalculate(self) -> bool:
-        self.recalculate_all()
+        self.update_pending()
         self.recalculation_scheduled = False
+
+        if log.isEnabledFor(logging.DEBUG) and not self.verify():
+            self.recalculate_all()
+
         return False # see GLib.idle_add
 
 
+    def update_pending(self) -> None:
+        """Apply the changes of the queued tasks to the counts."""
+
+        deltas: Dict[Tuple[str, str], int] = {}
+        pending, self._pending = self._pending, {}
+
+        for tid, task in pending.items():
+            old = self.contributions.pop(tid, None)
+            new = self._contribution(task)
+
+            if new is not None:
+                self.contributions[tid] = new
+
+            if old != new:
+                self._add_deltas(deltas, old, -1)
+                self._add_deltas(deltas, new, 1)
+
+        for (handle, prop), delta in deltas.items():
+            if delta:
+                counts = self.get_by_handle(handle)
+                counts.set_property(prop, counts.get_property(prop) + delta)
+
+
     def recalculate_all(self):
         "Recalculate all stats from scratch."
 
+        self._pending.clear()
+        self.contributions = {
+            tid: self._contribution(task)
+            for tid, task in self.tasks.lookup.items()
+        }
+
+        totals = self._count(self.contributions.values())
+
         for task_count in self.stats.values():
             task_count.reset()
 
-        for h,count in TagStats._count_tasks(self.tasks.filter(Filter.ACTIVE)).items():
-            self.get_by_handle(h).task_count_open = count
-        for h,count in TagStats._count_tasks(self.tasks.filter(Filter.ACTIONABLE)).items():
-            self.get_by_handle(h).task_count_actionable = count
-        for h,count in TagStats._count_tasks(self.tasks.filter(Filter.CLOSED)).items():
-            self.get_by_handle(h).task_count_closed = count
+        for (handle, prop), count in totals.items():
+            self.get_by_handle(handle).set_property(prop, count)
+
+
+    def verify(self) -> bool:
+        """Check the counts against a recount, logging any difference."""
+
+        totals = self._count(self._contribution(task)
+                             for task in self.tasks.lookup.values())
+        consistent = True
+
+        for handle, counts in self.stats.items():
+            for prop in ('task_count_open', 'task_count_actionable',
+                         'task_count_closed'):
+                expected = totals.get((handle, prop), 0)
+
+                if counts.get_property(prop) != expected:
+                    log.error('Tag stats drifted: %s of %r is %d, not %d',
+                              prop, handle, counts.get_property(prop),
+                              expected)
+                    consistent = False
+
+        return consistent
+
+
+    def _contribution(self, task: Task) -> Optional[Contribution]:
+        """What a task adds to the counts, None once removed."""
+
+        if self.tasks.lookup.get(task.id) is not task:
+            return None
+
+        if task.tags:
+            handles = { str(t.id) for owned_tag in task.tags
+                        for t in self.tags.ancestors(owned_tag) }
+        else:
+            handles = {'untagged'}
+
+        handles.add('all')
+
+        return (task.status == Status.ACTIVE, task.is_actionable,
+                frozenset(handles))
 
 
     @staticmethod
-    def _count_tasks(tasklist: list[Task]) -> dict[str,int]:
-        count = {'all':len(tasklist),'untagged':0}
-        for task in tasklist:
+    def _add_deltas(deltas: Dict[Tuple[str, str], int],
+                    contribution: Optional[Contribution], sign: int) -> None:
+        if contribution is None:
+            return
 
-            if not task.tags:
-                count['untagged'] += 1
+        is_open, actionable, handles = contribution
+        status_prop = 'task_count_open' if is_open else 'task_count_closed'
 
-            all_tags = { t for owned_tag in task.tags for t in [owned_tag] + owned_tag.get_ancestors() }
-            for tag in all_tags:
-                handle = str(tag.id)
-                val = count.get(handle, 0)
-                count[handle] = val + 1
+        for handle in handles:
+            key = (handle, status_prop)
+            deltas[key] = deltas.get(key, 0) + sign
 
-        return count
+            if actionable:
+                key = (handle, 'task_count_actionable')
+                deltas[key] = deltas.get(key, 0) + sign
+
+
+    @staticmethod
+    def _count(contributions: Iterable[Optional[Contribution]]
+               ) -> Dict[Tuple[str, str], int]:
+        totals: Dict[Tuple[str, str], int] = {}
+
+        for contribution in contributions:
+            TagStats._add_deltas(totals, contribution, 1)
+
+        return totals
 
 
 class Datastore:
@@ -137,15 +296,42 @@ class Datastore:
     #: Amount of backups to keep
     BACKUPS_NUMBER = 7
 
+    #: Seconds between two rotations of the numbered backups
+    BACKUPS_ROTATION_INTERVAL = 3600
+
+    #: Journal records to accumulate before the next save rewrites the
+    #: data file (compaction)
+    JOURNAL_MAX_RECORDS = 500
+
+    #: Milliseconds schedule_save() waits for more changes
+    SAVE_DELAY = 1000
+
+    #: Seconds between two checks for quitting while a backend thread
+    #: waits for its changes to be applied
+    APPLY_POLL = 0.5
+
+    #: Locks shared by the tasks, see task_lock()
+    TASK_LOCK_STRIPES = 64
+
 
     def __init__(self) -> None:
         self.tasks = TaskStore()
         self.tags = TagStore()
         self.saved_searches = SavedSearchStore()
-        self.xml_tree: Optional[et._ElementTree] = None
+
+        #: Whether the stores were filled from a data file yet
+        self.loaded = False
 
         self._mutex = threading.Lock()
+        self._task_locks = [threading.Lock()
+                            for _ in range(self.TASK_LOCK_STRIPES)]
         self.backends: Dict[str,GenericBackend] = {}
+
+        #: How long the main loop was blocked applying backend changes:
+        #: amount of change sets, total, longest and last milliseconds
+        self.apply_metrics: Dict[str, float] = {
+            'applied': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0,
+        }
         self._backend_signals = BackendSignals()
         self._backend_signals.connect(
             self._backend_signals.BACKEND_STATE_TOGGLED,
@@ -162,7 +348,8 @@ class Datastore:
         # Count of tasks for each pane and each tag
         self.tag_stats = TagStats(self.tags,self.tasks)
         for event in ['removed','added','parent-change','parent-removed','task-filterably-changed']:
-            self.tasks.connect(event, lambda *_: self.tag_stats.schedule_recalculation())
+            self.tasks.connect(event, self.tag_stats.on_task_changed)
+        self.tasks.connect('batch-changed', self.tag_stats.on_batch_changed)
         # Notify backends when a task changes
         def _on_task_changed(_, task):
             for backend in self.backends.values():
@@ -181,6 +368,41 @@ class Datastore:
                     backend.queue_remove_task(task.id)
         self.tasks.connect('removed', _on_task_removed)
 
+        def _on_batch_changed(_, batch):
+            for task in batch.get('removed').values():
+                if task.id not in self.tasks.lookup:
+                    _on_task_removed(_, task)
+
+            for task in batch.get('task-filterably-changed').values():
+                if task.id in self.tasks.lookup:
+                    _on_task_changed(_, task)
+        self.tasks.connect('batch-changed', _on_batch_changed)
+
+        # Changes not yet in the data file nor in its journal. Tasks are
+        # tracked through the store signals; tags and searches are few
+        # and change without signals (e.g. a color edit), so they are
+        # compared against what was last written instead.
+        self.journal: Optional[Journal] = None
+        self._journal_tasks: Set[UUID] = set()
+        self._journal_written: Dict[str, Tuple[str, str]] = {}
+        for event in ['added', 'removed', 'parent-change', 'parent-removed',
+                      'task-filterably-changed', 'task-sortably-changed']:
+            self.tasks.connect(event, self._track_task_change)
+        self.tasks.connect('batch-changed',
+                           lambda _, batch: self._journal_tasks.update(batch.items))
+
+        # Disk writes happen on a worker thread, see save()
+        self.save_delay = self.SAVE_DELAY
+        self._save_queue: queue.Queue = queue.Queue()
+        self._save_thread: Optional[threading.Thread] = None
+        self._save_timeout: Optional[int] = None
+        self._save_compact = False
+        self._save_failed = False
+        self._backups_rotated_at: Optional[float] = None
+
+        # Snapshots are also written to a binary cache, see load_cache()
+        self.use_cache = True
+
         self.data_path: Optional[str] = None
         self._activate_non_default_backends()
 
@@ -190,6 +412,111 @@ class Datastore:
         return self._mutex
 
 
+    def task_lock(self, tid: UUID) -> threading.Lock:
+        """The lock guarding the sync state of a task.
+
+        Backends hold it while they read a task to push it, or while the
+        main loop writes what they fetched into it (see task_locks()),
+        never during network requests. Tasks are
+        spread over a few shared locks, so that pushes and imports of
+        different tasks rarely wait for each other while no lock has to
+        be created or freed along with the tasks.
+        """
+
+        return self._task_locks[hash(tid) % self.TASK_LOCK_STRIPES]
+
+
+    @contextmanager
+    def task_locks(self, tids: Iterable[UUID]) -> Iterator[None]:
+        """Hold the locks of several tasks, see task_lock().
+
+        An import holds them from its thread while the main loop applies
+        what it fetched, so that the main loop never waits on a push.
+        They are taken in a fixed order: two holders can't each wait for
+        a lock the other has.
+        """
+
+        stripes = sorted({hash(tid) % self.TASK_LOCK_STRIPES for tid in tids})
+
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._task_locks[stripe])
+
+            yield
+
+
+    def apply_from_thread(self, apply: Callable[[], None]) -> bool:
+        """Apply the changes of a backend thread on the main loop.
+
+        Mutating the stores from a backend thread deferred every signal
+        to its own idle callback, thousands of them for a large import,
+        each refiltering the panes. Backends fetch and parse on their
+        thread, then hand the store changes here: they run in one idle
+        callback, inside a single store batch. The calling thread waits
+        until they are applied, so it can go on from the new state.
+
+        Returns False when GTG quit before the changes were applied:
+        they then never are, and the backend must not record them as
+        imported.
+        """
+
+        if threading.current_thread() is threading.main_thread():
+            self._apply_changes(apply)
+            return True
+
+        done = threading.Event()
+        lock = threading.Lock()
+        errors: List[BaseException] = []
+        cancelled = threading.Event()
+
+        def run() -> bool:
+            with lock:
+                if cancelled.is_set():
+                    return False
+
+                try:
+                    self._apply_changes(apply)
+                except BaseException as error:
+                    errors.append(error)
+                finally:
+                    done.set()
+
+            return False # see GLib.idle_add
+
+        GLib.idle_add(run)
+
+        while not done.wait(self.APPLY_POLL):
+            if self.please_quit:
+                with lock:
+                    if not done.is_set():
+                        cancelled.set()
+                        log.warning('Quitting: backend changes were '
+                                    'not applied')
+                        return False
+
+        if errors:
+            raise errors[0]
+
+        return True
+
+
+    def _apply_changes(self, apply: Callable[[], None]) -> None:
+        """Run changes in one batch, measuring how long it took."""
+
+        bench_start = time()
+
+        with self.tasks.batch():
+            apply()
+
+        elapsed = (time() - bench_start) * 1000
+        metrics = self.apply_metrics
+        metrics['applied'] += 1
+        metrics['total_ms'] += elapsed
+        metrics['max_ms'] = max(metrics['max_ms'], elapsed)
+        metrics['last_ms'] = elapsed
+        log.debug('Applied backend changes in %.2fms', elapsed)
+
+
     def load_data(self, data: et._ElementTree) -> None:
         """Load data from an lxml element object."""
 
@@ -204,24 +531,76 @@ class Datastore:
         self.saved_searches.from_xml(searches_xml)
         self.tags.from_xml(tags_xml)
         self.tasks.from_xml(tasks_xml, self.tags)
+        self._data_loaded()
+
+
+    def _data_loaded(self) -> None:
+        """Bookkeeping once the stores hold what is on disk."""
+
+        # What was just loaded is on disk already
+        self._journal_tasks.clear()
+        self._journal_written = self._serialize_tags_and_searches()
+        self.loaded = True
 
         self.refresh_tag_stats()
 
 
-    def load_file(self, path: str) -> None:
-        """Load data from a file."""
+    def load_file(self, path: str, journal: Optional[Journal] = None) -> None:
+        """Load data from a file, applying a journal onto it if given.
+
+        The file is streamed: each task element is turned into a task as
+        soon as it is parsed, then dropped, so the whole tree is never
+        held in memory. The stores are only filled once the file parsed
+        without error, a damaged file leaves them untouched.
+        """
 
         bench_start = 0.0
 
         if log.isEnabledFor(logging.DEBUG):
             bench_start = time()
 
-        parser = et.XMLParser(remove_blank_text=True, strip_cdata=False)
+        changes = journal.read() if journal is not None else {}
+        task_changes = changes.get('tasklist', {})
+        lists: Dict[str, et._Element] = {}
+        tasks: List[ParsedTask] = []
 
         with open(path, 'rb') as stream:
-            self.xml_tree = et.parse(stream, parser=parser)
-            assert isinstance(self.xml_tree, et._ElementTree), 'Parsing should return an _ElementTree object'
-            self.load_data(self.xml_tree)
+            context = et.iterparse(stream, events=('end',),
+                                   tag=('searchlist', 'taglist',
+                                        'tasklist', 'task'),
+                                   remove_blank_text=True, strip_cdata=False)
+
+            for _, element in context:
+                if element.tag != 'task':
+                    lists[element.tag] = element
+                    continue
+
+                key = Journal.key('tasklist', element.get('id'))
+
+                if key not in task_changes:
+                    tasks.append(self.tasks.parse_xml(element))
+                else:
+                    changed = task_changes.pop(key)
+
+                    if changed is not None:
+                        tasks.append(self.tasks.parse_xml(changed))
+
+                # Drop the task and the ones parsed before it
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+
+                while element.getprevious() is not None:
+                    del parent[0]
+
+        # Tasks created since the snapshot
+        tasks.extend(self.tasks.parse_xml(element)
+                     for element in task_changes.values()
+                     if element is not None)
+
+        for list_tag in ('searchlist', 'taglist', 'tasklist'):
+            assert list_tag in lists, f"Missing '{list_tag}' tag in xml file."
+
+        self._fill_stores(lists['searchlist'], lists['taglist'], tasks, changes)
 
         if log.isEnabledFor(logging.DEBUG):
             log.debug('Processed file %s in %.2fms',
@@ -231,6 +610,73 @@ class Datastore:
         self.data_path = path
 
 
+    def load_cache(self, path: str, journal: Optional[Journal] = None) -> bool:
+        """Load data from the cache of a data file, if it matches.
+
+        Returns False, with the stores untouched, when there is no
+        usable cache: the data file has to be loaded instead.
+        """
+
+        if not self.use_cache:
+            return False
+
+        bench_start = 0.0
+
+        if log.isEnabledFor(logging.DEBUG):
+            bench_start = time()
+
+        snapshot = SnapshotCache(path).read()
+
+        if snapshot is None:
+            return False
+
+        searches_xml, tags_xml, records = snapshot
+        changes = journal.read() if journal is not None else {}
+        task_changes = changes.get('tasklist', {})
+        tasks: List[ParsedTask] = []
+
+        for record in records:
+            key = str(record[0])
+
+            if key not in task_changes:
+                tasks.append(self.tasks.from_record(record))
+            else:
+                changed = task_changes.pop(key)
+
+                if changed is not None:
+                    tasks.append(self.tasks.parse_xml(changed))
+
+        # Tasks created since the snapshot
+        tasks.extend(self.tasks.parse_xml(element)
+                     for element in task_changes.values()
+                     if element is not None)
+
+        parser = et.XMLParser(remove_blank_text=True, strip_cdata=False)
+        self._fill_stores(et.fromstring(searches_xml, parser),
+                          et.fromstring(tags_xml, parser), tasks, changes)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Processed cache of %s in %.2fms',
+                      path, (time() - bench_start) * 1000)
+
+        self.data_path = path
+        return True
+
+
+    def _fill_stores(self, searches: et._Element, tags: et._Element,
+                     tasks: List[ParsedTask],
+                     changes: Dict[str, Changes]) -> None:
+        """Fill the stores with loaded data and journaled changes."""
+
+        Journal.apply(searches, changes.get('searchlist', {}))
+        Journal.apply(tags, changes.get('taglist', {}))
+
+        self.saved_searches.from_xml(searches)
+        self.tags.from_xml(tags)
+        self.tasks.load_parsed(tasks, self.tags)
+        self._data_loaded()
+
+
     def generate_xml(self) -> et._ElementTree:
         """Generate lxml element object with all data."""
 
@@ -245,56 +691,288 @@ class Datastore:
         return et.ElementTree(root)
 
 
-    def write_file(self, path: str) -> None:
-        """Generate and write xml file."""
+    def serialize(self) -> bytes:
+        """Serialize all data into the content of a data file.
 
-        tree = self.generate_xml()
+        Tasks are the bulk of it: rather than building a tree of them,
+        the tasks the store serialized already are copied in as bytes.
+        """
 
-        with open(path, 'wb') as stream:
-            tree.write(stream, xml_declaration=True, pretty_print=True,
-                       encoding='UTF-8')
+        root = et.Element('gtgData')
+        root.set('appVersion', info.VERSION)
+        root.set('xmlVersion', '2')
 
+        root.append(self.tags.to_xml())
+        root.append(self.saved_searches.to_xml())
+        et.SubElement(root, 'tasklist')
 
-    def save(self, path: Optional[str] = None) -> None:
-        """Write GTG data file."""
+        data = et.tostring(root, xml_declaration=True, pretty_print=True,
+                           encoding='UTF-8')
+        head, _, tail = data.rpartition(b'<tasklist/>')
+
+        return head + self.tasks.serialize() + tail
+
+
+    def write_file(self, path: str, data: Optional[bytes] = None) -> None:
+        """Write xml file, serializing the data unless given.
+
+        The data goes to the temp file first, which then replaces the
+        data file in one step: a crash never leaves a truncated file.
+        """
+
+        data = data or self.serialize()
+        temp_file = path + '__'
+
+        with open(temp_file, 'wb') as stream:
+            stream.write(data)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        os.replace(temp_file, path)
+
+
+    def save(self, path: Optional[str] = None, compact: bool = False,
+             wait: bool = True) -> None:
+        """Write GTG data file.
+
+        Once the data file was written or loaded, saving it again only
+        appends the changes to its journal. The whole file is rewritten
+        (and backed up) when compact is set, when saving elsewhere, or
+        once the journal holds JOURNAL_MAX_RECORDS records.
+
+        What to write is captured right away, but the disk is written by
+        a worker thread, in order. Unless wait is False, this returns
+        once the data is on disk.
+        """
 
         path = path or self.data_path
         assert path is not None, "Failed to determine save location."
-        temp_file = path + '__'
-        bench_start = 0.0
 
-        try:
-            os.rename(path, temp_file)
-        except IOError:
-            log.error('Error renaming temp file %r', temp_file)
+        # A failed write may have lost journaled changes: rewrite it all.
+        # Saving a copy elsewhere doesn't make up for it.
+        if path == self.data_path:
+            compact = compact or self._save_failed
+            self._save_failed = False
+
+        if (not compact
+                and self.journal is not None
+                and path == self.data_path
+                and self.journal.records < self.JOURNAL_MAX_RECORDS):
+            job = functools.partial(self._append_to_journal,
+                                    self.journal, self._collect_journal())
+        else:
+            job = self._snapshot_job(path)
 
-        if log.isEnabledFor(logging.DEBUG):
-            bench_start = time()
+        self._save_queue.put(job)
 
-        base_dir = os.path.dirname(path)
+        if self._save_thread is None:
+            self._save_thread = threading.Thread(target=self._save_worker,
+                                                 daemon=True)
+            self._save_thread.start()
 
-        try:
-            os.makedirs(base_dir, exist_ok=True)
-        except IOError as error:
-            log.error("Error while creating directories: %r", error)
+        if wait:
+            self._save_queue.join()
 
-        try:
-            self.write_file(path)
-        except (IOError, FileNotFoundError):
-            log.error('Could not write XML file at %r', path)
-            return
 
+    def schedule_save(self, compact: bool = False) -> None:
+        """Save once no other save was requested for save_delay ms.
 
-        if log.isEnabledFor(logging.DEBUG):
-            log.debug('Saved file %s in %.2fms',
-                      path, (time() - bench_start) * 1000)
+        Bursts of changes (typing in the editor, bulk edits) then cost a
+        single save. Use flush() to write pending changes immediately.
+        """
 
-        try:
-            os.remove(temp_file)
-        except FileNotFoundError:
-            pass
+        self._save_compact = self._save_compact or compact
+
+        if self._save_timeout is None:
+            self._save_timeout = GLib.timeout_add(self.save_delay,
+                                                  self._on_save_timeout)
+
+
+    def _on_save_timeout(self) -> bool:
+        self._save_timeout = None
+        compact, self._save_compact = self._save_compact, False
+        self.save(compact=compact, wait=False)
+        return False # see GLib.timeout_add
+
+
+    def flush(self) -> None:
+        """Write everything to the data file now, and wait for it.
+
+        Called at shutdown: the journal is compacted too.
+        """
+
+        if self._save_timeout is not None:
+            GLib.source_remove(self._save_timeout)
+            self._save_timeout = None
+
+        self._save_compact = False
+        self.save(compact=True)
+
+
+    def _save_worker(self) -> None:
+        """Run the disk writes queued by save(), one at a time."""
+
+        while True:
+            job = self._save_queue.get()
+
+            try:
+                job()
+            except Exception:
+                log.exception('Failed to save data')
+                self._save_failed = True
+            finally:
+                self._save_queue.task_done()
+
+
+    def _snapshot_job(self, path: str) -> Callable[[], None]:
+        """Capture all data, return the job writing it to path."""
 
-        self.write_backups(path)
+        journal = None
+        records: List[Record] = []
+
+        if path == self.data_path:
+            journal = self.journal or Journal(path)
+            self.journal = journal
+
+            # Journal what the snapshot brings first: if the journal
+            # can't be cleared afterwards, replaying it onto the new
+            # data file then ends on the same values.
+            records = self._collect_journal()
+
+        data = self.serialize()
+        cache = None
+        lists: Tuple[bytes, bytes] = (b'', b'')
+        task_records: List[TaskRecord] = []
+
+        if path == self.data_path and self.use_cache:
+            cache = SnapshotCache(path)
+            lists = (et.tostring(self.saved_searches.to_xml()),
+                     et.tostring(self.tags.to_xml()))
+            task_records = [self.tasks.record_from_task(task)
+                            for task in self.tasks.lookup.values()]
+
+        def write_snapshot() -> None:
+            bench_start = 0.0
+
+            if log.isEnabledFor(logging.DEBUG):
+                bench_start = time()
+
+            if journal is not None:
+                try:
+                    journal.append(records)
+                except OSError:
+                    log.error('Could not append to journal %r',
+                              journal.path, exc_info=True)
+
+            base_dir = os.path.dirname(path)
+
+            try:
+                os.makedirs(base_dir, exist_ok=True)
+            except IOError:
+                log.error('Error while creating directories',
+                          exc_info=True)
+
+            try:
+                self.write_file(path, data)
+            except OSError:
+                # Keep the store dirty: the next save rewrites it all
+                log.exception('Could not write XML file at %r', path)
+                self._save_failed = True
+                return
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('Saved file %s in %.2fms',
+                          path, (time() - bench_start) * 1000)
+
+            if journal is not None:
+                journal.clear()
+
+            if cache is not None:
+                try:
+                    cache.write(*lists, task_records)
+                except OSError as error:
+                    log.warning('Could not write cache %r: %r',
+                                cache.path, error)
+
+            self.write_backups(path)
+
+        return write_snapshot
+
+
+    # --------------------------------------------------------------------------
+    # JOURNAL
+    # --------------------------------------------------------------------------
+
+    def _track_task_change(self, _store, task: Task,
+                           parent: Optional[Task] = None) -> None:
+        """Remember a task has to be journaled on the next save."""
+
+        self._journal_tasks.add(task.id)
+
+        # Subtask lists are written in the parent element
+        for other in (task.parent, parent):
+            if other is not None:
+                self._journal_tasks.add(other.id)
+
+
+    def _serialize_tags_and_searches(self) -> Dict[str, Tuple[str, str]]:
+        """Serialize every tag and search, by id."""
+
+        serialized = {}
+
+        for list_tag, store in (('taglist', self.tags),
+                                ('searchlist', self.saved_searches)):
+            for item in store.lookup.values():
+                xml = et.tostring(store.item_to_xml(item), encoding='unicode')
+                serialized[str(item.id)] = (list_tag, xml)
+
+        return serialized
+
+
+    def _collect_journal(self) -> List[Record]:
+        """Return journal records for the changes made since the last save.
+
+        The changes are then considered saved: if writing them fails,
+        the next save rewrites the whole data file.
+        """
+
+        records: List[Record] = []
+
+        for tid in self._journal_tasks:
+            task = self.tasks.lookup.get(tid)
+
+            if task is None:
+                records.append(('remove', 'tasklist', str(tid), None))
+            else:
+                xml = et.tostring(self.tasks.item_to_xml(task),
+                                  encoding='unicode')
+                records.append(('set', 'tasklist', str(tid), xml))
+
+        written = self._serialize_tags_and_searches()
+
+        for item_id, (list_tag, xml) in written.items():
+            if self._journal_written.get(item_id) != (list_tag, xml):
+                records.append(('set', list_tag, item_id, xml))
+
+        for item_id in self._journal_written.keys() - written.keys():
+            list_tag = self._journal_written[item_id][0]
+            records.append(('remove', list_tag, item_id, None))
+
+        self._journal_tasks.clear()
+        self._journal_written = written
+
+        return records
+
+
+    def _append_to_journal(self, journal: Journal,
+                           records: List[Record]) -> None:
+        """Write journal records, from the save worker."""
+
+        try:
+            journal.append(records)
+        except OSError:
+            log.exception('Could not append to journal %r', journal.path)
+            self._save_failed = True
 
 
     def print_info(self) -> None:
@@ -309,6 +987,13 @@ class Datastore:
         print(f'- Tasks: {self.tasks.count()}')
 
 
+    def new_day(self) -> None:
+        """Update what depends on the date, once a day."""
+
+        Task.new_day()
+        self.refresh_tag_stats()
+
+
     def refresh_tag_stats(self) -> None:
         """
         Refresh the number of tasks for each tag.
@@ -330,20 +1015,18 @@ class Datastore:
     def notify_tag_change(self, tags: list[Tag]) -> None:
         """Notify tasks that this tag has changed."""
 
-        for task in self.tasks.lookup.values():
-            for tag in tags:
-                if tag in task.tags:
-                    task.notify('icons')
-                    task.notify('row_css')
-                    task.notify('tag_colors')
-                    task.notify('show_tag_colors')
+        for tid in self.tasks.with_tags(tags):
+            task = self.tasks.lookup[tid]
+            task.notify('icons')
+            task.notify('row_css')
+            task.notify('tag_colors')
+            task.notify('show_tag_colors')
 
 
     def first_run(self, path: str) -> None:
         """Write initial data file."""
 
-        self.xml_tree = firstrun_tasks.generate()
-        self.load_data(self.xml_tree)
+        self.load_data(firstrun_tasks.generate())
         self.save(path)
 
 
@@ -410,6 +1093,15 @@ class Datastore:
 
 
     def write_backups(self, path: str) -> None:
+        """Back up the data file just written.
+
+        bak.0 always follows the latest save. The older numbered
+        backups only shift once per session and BACKUPS_ROTATION_INTERVAL,
+        and backups share the data of the saved file when the filesystem
+        allows it (see clone_file), so a save doesn't copy the data file
+        around.
+        """
+
         backup_name = self.get_backup_path(path)
         backup_dir = os.path.dirname(backup_name)
 
@@ -421,29 +1113,38 @@ class Datastore:
             log.error('Backup dir %r cannot be created!', backup_dir)
             return
 
+        now = time()
+        rotate = (self._backups_rotated_at is None
+                  or now - self._backups_rotated_at
+                  >= self.BACKUPS_ROTATION_INTERVAL)
+
         # Cycle backups
-        for current_backup in range(self.BACKUPS_NUMBER, 0, -1):
-            older = f"{backup_name}.bak.{current_backup}"
-            newer = f"{backup_name}.bak.{current_backup - 1}"
+        if rotate:
+            self._backups_rotated_at = now
 
-            try:
-                shutil.move(newer, older)
-            except FileNotFoundError:
-                pass
+            for current_backup in range(self.BACKUPS_NUMBER, 0, -1):
+                older = f"{backup_name}.bak.{current_backup}"
+                newer = f"{backup_name}.bak.{current_backup - 1}"
+
+                try:
+                    shutil.move(newer, older)
+                except FileNotFoundError:
+                    pass
 
         # bak.0 is always a fresh copy of the closed file
         # so that it's not touched in case of not opening next time
         bak_0 = f"{backup_name}.bak.0"
-        shutil.copy(path, bak_0)
+        clone_file(path, bak_0)
 
         # Add daily backup
         today = datetime.today().strftime('%Y-%m-%d')
         daily_backup = f'{backup_name}.{today}.bak'
 
         if not os.path.exists(daily_backup):
-            shutil.copy(path, daily_backup)
+            clone_file(path, daily_backup)
 
-        self.purge_backups(path)
+        if rotate:
+            self.purge_backups(path)
 
 
     # Dated daily backups: gtg_data.xml.2026-08-02.bak
@@ -504,10 +1205,29 @@ class Datastore:
                   for i in range(self.BACKUPS_NUMBER)]
 
 
+        journal = Journal(path)
+
         for index, filepath in enumerate(files):
             try:
                 log.debug('Opening file %s', filepath)
-                self.load_file(filepath)
+
+                # The journal continues the main file. The temp file is
+                # only readable when a save stopped right before moving
+                # it over the main file: keep journaling against the
+                # main path. Backups predate the snapshot the journal
+                # continues, but its records still hold the latest
+                # changes: replay them when they are newer than the
+                # backup, then keep them aside rather than replaying
+                # them onto later saves.
+                if index < 2:
+                    if index > 0 or not self.load_cache(filepath, journal):
+                        self.load_file(filepath, journal)
+                    self.data_path = path
+                    self.journal = journal
+                else:
+                    replay = journal.newer_than(filepath)
+                    self.load_file(filepath, journal if replay else None)
+                    journal.set_aside()
 
                 timestamp = os.path.getmtime(filepath)
                 mtime = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
@@ -536,7 +1256,7 @@ class Datastore:
                 continue
 
         # We couldn't open any file :(
-        if not self.xml_tree:
+        if not self.loaded:
             try:
                 # No data file yet: migrate old-format
                 # data if present, otherwise create the
@@ -554,9 +1274,10 @@ class Datastore:
         log.debug("Deleting old tasks")
 
         today = Date.today()
-        for task in self.tasks.data:
-            if (today - task.date_closed).days > max_days:
-                self.tasks.remove(task.id)
+        with self.tasks.batch():
+            for task in list(self.tasks.data):
+                if (today - task.date_closed).days > max_days:
+                    self.tasks.remove(task.id)
 
         log.debug("Deleting unused tags")
 
@@ -917,56 +1638,58 @@ class Datastore:
                 self.tags.parent(tag.id, parent.id)
 
 
-        # Generate tasks
-        for _ in range(tasks_count):
-            title = ''
-            content = ''
-            content_size = random.choice(task_sizes)
+        # One signal for all the generated tasks
+        with self.tasks.batch():
+            # Generate tasks
+            for _ in range(tasks_count):
+                title = ''
+                content = ''
+                content_size = random.choice(task_sizes)
 
-            for _ in range(random.randint(1, 15)):
-                word = random_word(randint(4, 20))
+                for _ in range(random.randint(1, 15)):
+                    word = random_word(randint(4, 20))
 
-                if word in tag_words:
-                    word = '@' + word
+                    if word in tag_words:
+                        word = '@' + word
 
-                title += word + ' '
+                    title += word + ' '
 
-            task = self.tasks.new(title)
+                task = self.tasks.new(title)
 
-            for _ in range(random.randint(0, 10)):
-                tag = self.tags.find(random.choice(tag_words))
-                task.add_tag(tag)
+                for _ in range(random.randint(0, 10)):
+                    tag = self.tags.find(random.choice(tag_words))
+                    task.add_tag(tag)
 
-            if random_boolean():
-                task.toggle_active()
+                if random_boolean():
+                    task.toggle_active()
 
-            if random_boolean():
-                task.toggle_dismiss()
+                if random_boolean():
+                    task.toggle_dismiss()
 
-            for _ in range(random.randint(0, content_size)):
-                word = random_word(randint(4, 20))
+                for _ in range(random.randint(0, content_size)):
+                    word = random_word(randint(4, 20))
 
-                if word in tag_words:
-                    word = '@' + word
+                    if word in tag_words:
+                        word = '@' + word
 
-                content += word + ' '
-                content += '\n' if random_boolean() else ''
+                    content += word + ' '
+                    content += '\n' if random_boolean() else ''
 
-            task.content = content
+                task.content = content
 
-            if random_boolean():
-                task.date_start = random_date()
+                if random_boolean():
+                    task.date_start = random_date()
 
-            if random_boolean():
-                task.date_due = Date(random_date())
+                if random_boolean():
+                    task.date_due = Date(random_date())
 
 
-        # Parent the tasks
-        for task in self.tasks.data:
-            if bool(random.getrandbits(1)):
-                parent = random.choice(self.tasks.data)
+            # Parent the tasks
+            for task in list(self.tasks.data):
+                if bool(random.getrandbits(1)):
+                    parent = random.choice(self.tasks.data)
 
-                if task.id == parent.id:
-                    continue
+                    if task.id == parent.id:
+                        continue
 
-                self.tasks.parent(task.id, parent.id)
+                    self.tasks.parent(task.id, parent.id)
@@ -18,9 +18,11 @@
 
 """Filters for tags and tasks"""
 
+from typing import Optional
+
 from gi.repository import Gtk # type: ignore[import-untyped]
 from GTG.core.tags import Tag
-from GTG.core.tasks import Task, Status
+from GTG.core.tasks import PaneClassifier, Task, Status
 from GTG.core import search
 
 
@@ -66,9 +68,10 @@ class TagEmptyFilter(Gtk.Filter):
 class TaskFilter(Gtk.Filter):
     __gtype_name__ = 'TaskFilter'
 
-    def __init__(self, ds, pane) -> None:
+    def __init__(self, ds, pane, classifier: Optional[PaneClassifier] = None) -> None:
         super(TaskFilter, self).__init__()
         self.ds = ds
+        self.classifier = classifier
         self.query = ''
         self.checks = None
         self.pane : str = pane
@@ -89,32 +92,60 @@ class TaskFilter(Gtk.Filter):
 
 
     def set_pane(self,pane: str) -> None:
+        if pane == self.pane:
+            return
         self.pane = pane
         self.changed(Gtk.FilterChange.DIFFERENT)
 
 
     def set_query(self, query: str) -> None:
         self.query = query
+        old_checks = self.checks
 
         try:
             self.checks = search.parse_search_query(query)
         except search.InvalidQuery:
             self.checks = None
 
-        self.changed(Gtk.FilterChange.DIFFERENT)
+        # Same query, e.g. with a trailing space: keep the checks already
+        # looking words up in the text index
+        if self.checks == old_checks:
+            self.checks = old_checks
+            return
+
+        # Typing usually narrows the query, and erasing widens it: let the
+        # models only look at the tasks which can change
+        if self.checks is not None and self.checks.narrows(old_checks):
+            change = Gtk.FilterChange.MORE_STRICT
+        elif old_checks is not None and old_checks.narrows(self.checks):
+            change = Gtk.FilterChange.LESS_STRICT
+        else:
+            change = Gtk.FilterChange.DIFFERENT
+
+        self.changed(change)
+
+
+    def changed(self, change: Gtk.FilterChange) -> None:
+        """Start a new evaluation pass and tell the model to refilter."""
+
+        if self.checks is not None:
+            self.checks.start_pass(self.ds.tasks.text_index)
+
+        super().changed(change)
 
 
     def match_tags(self, task: Task) -> bool:
         """Match selected tags to task tags."""
         for tag in self.tags:
-            matching_tags = set(tag.get_matching_tags())
-            if set(task.tags).isdisjoint(matching_tags):
+            if not self.ds.tags.carries(task.tags, tag):
                 return False
         return True
 
 
     def is_task_matched_by_pane(self,task: Task) -> bool:
         """Return true if and only if the current pane does not filter out the task."""
+        if self.classifier is not None:
+            return self.pane in self.classifier.panes_of(task)
         if self.pane == 'active':
             return task.status is Status.ACTIVE
         elif self.pane == 'workview':
@@ -133,7 +164,7 @@ class TaskFilter(Gtk.Filter):
 
     def is_task_matched_by_query(self,task:Task) -> bool:
         """Return true if and only if the search query does not filter out the task."""
-        return search.search_filter(task, self.checks)
+        return self.checks is None or self.checks.matches(task)
 
 
     def do_match(self, item) -> bool:
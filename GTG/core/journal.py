@@ -0,0 +1,209 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Append-only journal of the changes made since the last full save.
+
+Rewriting the whole data file on every save costs hundreds of
+milliseconds once it holds thousands of tasks. Instead, the datastore
+appends one small record per changed item to a journal sitting next to
+the data file (gtg_data.xml.journal), and only rewrites the data file
+-- the snapshot -- now and then. Loading applies the journal onto the snapshot while
+streaming it into the stores.
+
+Each line of the journal is a JSON object::
+
+    {"op": "set", "list": "tasklist", "id": "<uuid>", "xml": "<task ...>"}
+    {"op": "remove", "list": "taglist", "id": "<uuid>"}
+
+Records hold the full serialized element, so replaying one twice is
+harmless: a crash between writing a snapshot and clearing the journal
+only replays changes the snapshot already has.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from lxml import etree as et
+
+from GTG.core.tasks import id_to_uuid
+
+
+log = logging.getLogger(__name__)
+
+#: A journal record: operation, list element tag, item id, element
+Record = Tuple[str, str, str, Optional[str]]
+
+#: Final state of the journaled items of a list, None when removed
+Changes = Dict[Optional[str], Optional[et._Element]]
+
+
+class Journal:
+    """Journal attached to a data file."""
+
+    #: Appended to the data file path
+    SUFFIX = '.journal'
+
+
+    def __init__(self, data_path: str) -> None:
+        self.path = data_path + self.SUFFIX
+
+        #: Records written since the last snapshot
+        self.records = 0
+
+
+    @staticmethod
+    def key(list_tag: str, raw_id: Optional[str]) -> Optional[str]:
+        """Normalize an element id the way the stores will read it."""
+
+        if raw_id is None or list_tag != 'tasklist':
+            return raw_id
+
+        return str(id_to_uuid(raw_id))
+
+
+    def append(self, records: Iterable[Record]) -> None:
+        """Append records and flush them to disk."""
+
+        lines = []
+
+        for op, list_tag, item_id, xml in records:
+            record = {'op': op, 'list': list_tag, 'id': item_id}
+
+            if xml is not None:
+                record['xml'] = xml
+
+            lines.append(json.dumps(record) + '\n')
+
+        if not lines:
+            return
+
+        with open(self.path, 'a', encoding='utf-8') as stream:
+            stream.writelines(lines)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        self.records += len(lines)
+
+
+    def read(self) -> Dict[str, Changes]:
+        """Read the final state of every journaled item, by list.
+
+        Items removed by the journal map to None. Damaged records (e.g.
+        the last line, cut short by a crash) are skipped.
+        """
+
+        try:
+            stream = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return {}
+
+        parser = et.XMLParser(remove_blank_text=True, strip_cdata=False)
+        changes: Dict[str, Changes] = {}
+        applied = 0
+
+        with stream:
+            for number, line in enumerate(stream, 1):
+                try:
+                    record = json.loads(line)
+                    op = record['op']
+                    list_tag = record['list']
+                    item_id = record['id']
+                    element = (et.fromstring(record['xml'], parser)
+                               if op == 'set' else None)
+                except (ValueError, KeyError, et.XMLSyntaxError) as error:
+                    log.warning('Skipping damaged record %d in %r: %r',
+                                number, self.path, error)
+                    continue
+
+                # Re-insert so new items keep the order of their last record
+                items = changes.setdefault(list_tag, {})
+                items.pop(item_id, None)
+                items[item_id] = element
+                applied += 1
+
+        self.records = applied
+        log.debug('Read %d record(s) from %r', applied, self.path)
+        return changes
+
+
+    @classmethod
+    def apply(cls, container: et._Element, changes: Changes) -> None:
+        """Apply the changes of one list onto its element, in place."""
+
+        if not changes:
+            return
+
+        pending = dict(changes)
+
+        for child in list(container):
+            key = cls.key(container.tag, child.get('id'))
+
+            if key not in pending:
+                continue
+
+            element = pending.pop(key)
+
+            if element is None:
+                container.remove(child)
+            else:
+                container.replace(child, element)
+
+        for element in pending.values():
+            if element is not None:
+                container.append(element)
+
+
+    def newer_than(self, path: str) -> bool:
+        """Whether records were written after a file was last modified."""
+
+        try:
+            return os.path.getmtime(self.path) > os.path.getmtime(path)
+        except OSError:
+            return False
+
+
+    def set_aside(self) -> None:
+        """Move the records out of the way, keeping them for inspection.
+
+        Used when the data file they continue could not be loaded:
+        they must not be replayed onto later saves of another file.
+        """
+
+        broken = self.path + '.broken'
+
+        try:
+            os.replace(self.path, broken)
+        except FileNotFoundError:
+            pass
+        else:
+            log.warning('Moved journal %r to %r', self.path, broken)
+
+        self.records = 0
+
+
+    def clear(self) -> None:
+        """Drop all records, after a snapshot was written."""
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+        self.records = 0
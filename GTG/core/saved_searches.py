@@ -25,7 +25,7 @@ from uuid import uuid4, UUID
 from typing import Optional
 import logging
 
-from lxml.etree import Element, _Element, SubElement
+from lxml.etree import Element, _Element
 
 from GTG.core.base_store import BaseStore, StoreItem
 
@@ -153,14 +153,22 @@ class SavedSearchStore(BaseStore):
         root = Element('searchlist')
 
         for search in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
-            element.set('id', str(search.id))
-            element.set('name', search.name)
-            element.set('query', search.query)
+            root.append(self.item_to_xml(search))
 
         return root
 
 
+    def item_to_xml(self, item: SavedSearch) -> _Element:
+        """Save a single search to an LXML element."""
+
+        element = Element(self.XML_TAG)
+        element.set('id', str(item.id))
+        element.set('name', item.name)
+        element.set('query', item.query)
+
+        return element
+
+
     def new(self, name: str, query: str, parent: Optional[UUID] = None) -> SavedSearch: # type: ignore[override]
         """Create a new saved search and add it to the store."""
 
@@ -26,7 +26,8 @@ Created by:
 You can search by entring a query in a simple language. Function
 parse_search_query() parse the query and return internal representation which
 is used for filtering in search_filter() function. If the query is malformed,
-the exception InvalidQuery is raised.
+the exception InvalidQuery is raised. The representation is a SearchQuery,
+which also compiles the query once so that matching many tasks stays fast.
 
 The query language consists of several elements:
   - commands
@@ -77,6 +78,7 @@ For more information see unittests:
 
 import re
 
+from datetime import date
 from gettext import gettext as _
 from GTG.core.dates import Date
 
@@ -241,60 +243,191 @@ def parse_search_query(query):
     if require_date:
         raise InvalidQuery(f"Required date after '{require_date}'")
 
-    return {'q': commands}
+    return SearchQuery(commands)
 
 
-def search_filter(task, parameters=None):
-    """ Check if task satisfies all search parameters """
+class SearchQuery(dict):
+    """ Parsed query, compiled into a predicate over tasks
 
-    if parameters is None or 'q' not in parameters:
-        return True
+    The query is still the dict {'q': commands} described above, so it
+    can be compared and inspected as before. On top of that, the commands
+    are compiled once: words are lowercased, cheap checks (tags, dates)
+    are ordered before the full-text ones and relative dates like today
+    are resolved once per evaluation pass instead of once per task.
 
-    def check_commands(commands_list):
-        """ Execute search commands
+    Given the full-text index of the task store, words are looked up in
+    it and match anywhere in the title or content. Without one, they are
+    searched in the title and excerpt of each task.
+    """
 
-        This method is recursive for !or and !and """
+    #: Dates which only change at midnight, resolved by start_pass() and
+    #: again by matches() once the day changed
+    RELATIVE_DATES = {
+        'today': Date.today,
+        'tomorrow': Date.tomorrow,
+        'now': Date.now,
+    }
+
+    #: Dates which never change
+    FIXED_DATES = {
+        'nodate': Date.no_date(),
+        'soon': Date.soon(),
+        'someday': Date.someday(),
+    }
+
+    def __init__(self, commands):
+        super().__init__(q=commands)
+        self.checks = self._compile(commands)
+        self.dates = dict(self.FIXED_DATES)
+        self.relative = self._uses_relative_dates(self.checks)
+        self.day = None
+        self.index = None
+        self.words = {}
+        self._generation = None
+        self.start_pass()
+
+    @classmethod
+    def _compile(cls, commands):
+        """ Turn commands into (cost, name, positive, argument) checks,
+        cheapest first """
+
+        checks = []
+
+        for command in commands:
+            cmd, positive, args = command[0], command[1], command[2:]
+            arg = args[0] if args else None
 
-        def fulltext_search(task, word):
-            """ check if task contains the word """
+            if cmd == 'or':
+                arg = cls._compile(arg)
+                cost = max(check[0] for check in arg)
+            elif cmd == 'word':
+                arg = arg.lower()
+                cost = 1
+            else:
+                cost = 0
 
-            word = word.lower()
-            text = task.excerpt.lower()
-            title = task.title.lower()
+            checks.append((cost, cmd, positive, arg))
 
-            return word in text or word in title
+        # Sorting is stable, and the order of a conjunction doesn't matter
+        checks.sort(key=lambda check: check[0])
+        return checks
 
-        value_checks = {
-            'after': lambda t, v: task.date_due > v,
-            'before': lambda t, v: task.date_due < v,
-            'tag': lambda t, v: v in [tag.name for tag in t.tags],
-            'word': fulltext_search,
-            'today': lambda task, v: task.date_due == Date.today(),
-            'tomorrow': lambda task, v: task.date_due == Date.tomorrow(),
-            'nodate': lambda task, v: task.date_due == Date.no_date(),
-            'now': lambda task, v: task.date_due == Date.now(),
-            'soon': lambda task, v: task.date_due == Date.soon(),
-            'someday': lambda task, v: task.date_due == Date.someday(),
-            'notag': lambda task, v: task.tags == [],
-        }
+    @classmethod
+    def _uses_relative_dates(cls, checks):
+        for _cost, cmd, _positive, arg in checks:
+            if cmd == 'or' and cls._uses_relative_dates(arg):
+                return True
+            if cmd in cls.RELATIVE_DATES:
+                return True
 
-        for command in commands_list:
-            cmd, positive, args = command[0], command[1], command[2:]
-            result = False
+        return False
 
-            if cmd == 'or':
-                for sub_cmd in args[0]:
-                    if check_commands([sub_cmd]):
-                        result = True
-                        break
-            elif value_checks.get(cmd, None):
-                if len(args) > 0:
-                    args = args[0]
-                result = value_checks[cmd](task, args)
-
-            if (positive and not result) or (not positive and result):
+    def narrows(self, other):
+        """ True if every task matching this query also matches other
+
+        This holds when this query only adds commands to the end of other,
+        or types more of its last word. None stands for no query.
+        """
+
+        if other is None:
+            return True
+
+        mine, theirs = self['q'], other['q']
+        last = len(theirs) - 1
+
+        if len(mine) <= last or mine[:last] != theirs[:last]:
+            return False
+
+        if mine[last] == theirs[last]:
+            return True
+
+        # 'buy mi' narrows 'buy m'
+        cmd, positive, word = mine[last][0], mine[last][1], mine[last][2:]
+        old_cmd, old_positive, old_word = theirs[last][0], theirs[last][1], theirs[last][2:]
+
+        return (cmd == old_cmd == 'word' and positive and old_positive
+                and old_word[0].lower() in word[0].lower())
+
+    def start_pass(self, index=None):
+        """ Resolve relative dates before filtering a batch of tasks,
+        optionally looking words up in a TextIndex """
+
+        self._resolve_dates()
+        self.index = index
+        self.words.clear()
+
+    def _resolve_dates(self):
+        self.day = date.today()
+
+        for name, resolve in self.RELATIVE_DATES.items():
+            self.dates[name] = resolve()
+
+    def _matching(self, word):
+        """ Ids of the tasks containing a word, according to the index """
+
+        # Tasks can be edited in the middle of a pass
+        if self._generation != self.index.generation:
+            self._generation = self.index.generation
+            self.words.clear()
+
+        try:
+            return self.words[word]
+        except KeyError:
+            ids = self.words[word] = self.index.search(word)
+            return ids
+
+    def matches(self, task):
+        """ Check if task satisfies the query """
+
+        # A view left open past midnight checks its tasks against the
+        # dates of the new day
+        if self.relative and self.day != date.today():
+            self._resolve_dates()
+
+        return self._all(task, self.checks, [])
+
+    def _all(self, task, checks, texts):
+        for _cost, cmd, positive, arg in checks:
+            if self._check(task, cmd, arg, texts) != positive:
                 return False
 
         return True
 
-    return check_commands(parameters['q'])
+    def _check(self, task, cmd, arg, texts):
+        """ Run a single command. texts caches the lowercased title and
+        excerpt of the task between the words of the query """
+
+        if cmd == 'tag':
+            return any(tag.name == arg for tag in task.tags)
+        elif cmd == 'notag':
+            return not task.tags
+        elif cmd == 'word':
+            if self.index is not None:
+                return task.id in self._matching(arg)
+
+            if not texts:
+                texts.extend((task.title.lower(), task.excerpt.lower()))
+
+            return arg in texts[0] or arg in texts[1]
+        elif cmd == 'or':
+            return any(self._all(task, [check], texts) for check in arg)
+        elif cmd == 'after':
+            return task.date_due > arg
+        elif cmd == 'before':
+            return task.date_due < arg
+        elif cmd in self.dates:
+            return task.date_due == self.dates[cmd]
+
+        return False
+
+
+def search_filter(task, parameters=None):
+    """ Check if task satisfies all search parameters """
+
+    if parameters is None or 'q' not in parameters:
+        return True
+
+    if not isinstance(parameters, SearchQuery):
+        parameters = SearchQuery(parameters['q'])
+
+    return parameters.matches(task)
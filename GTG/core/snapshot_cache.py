@@ -0,0 +1,202 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Binary cache of the data file, for a fast startup.
+
+Loading the XML data file means parsing every element and every date
+string again on each launch. Each time the data file is written, the
+datastore also writes the same data in a compact binary form next to it
+(gtg_data.xml.cache): plain tuples of strings and numbers, serialized
+with marshal, which loads them back several times faster.
+
+The cache starts with a header holding the size, modification time and
+hash of the data file it was made from. Once anything else touches the
+data file, the cache no longer matches and the XML file is loaded
+instead. The cache is never the only copy of anything: deleting it is
+always safe.
+"""
+
+import os
+import hashlib
+import logging
+import marshal
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from GTG.core.dates import Date, NODATE
+from GTG.core.tasks import Status, TaskRecord
+
+
+log = logging.getLogger(__name__)
+
+#: Saved searches and tags XML, then the task records
+Snapshot = Tuple[bytes, bytes, List[TaskRecord]]
+
+#: Size, modification time and hash of a data file
+Fingerprint = Tuple[int, int, str]
+
+
+def _encode_date(value: Date) -> Any:
+    """Turn a date into something marshal can write."""
+
+    dt_value = value.dt_value
+
+    if isinstance(dt_value, datetime):
+        if dt_value.tzinfo is not None:
+            return str(value)
+
+        return (dt_value.year, dt_value.month, dt_value.day, dt_value.hour,
+                dt_value.minute, dt_value.second, dt_value.microsecond)
+
+    if isinstance(dt_value, date):
+        return dt_value.toordinal()
+
+    # Fuzzy dates are small constants, ordinals are not
+    return dt_value
+
+
+def _decode_date(value: Any) -> Date:
+    """Opposite of _encode_date()."""
+
+    if isinstance(value, tuple):
+        return Date(datetime(*value))
+
+    if isinstance(value, int) and value > NODATE:
+        return Date(date.fromordinal(value))
+
+    return Date(value)
+
+
+def encode_record(record: TaskRecord) -> tuple:
+    """Turn a task record into plain values."""
+
+    (tid, title, status, added, modified, closed, due, start,
+     content, tag_ids, subtask_ids) = record
+
+    return (tid.bytes, title, status.value,
+            _encode_date(added), _encode_date(modified),
+            None if closed is None else _encode_date(closed),
+            _encode_date(due), _encode_date(start), content,
+            [t.bytes for t in tag_ids], [s.bytes for s in subtask_ids])
+
+
+def decode_record(values: tuple) -> TaskRecord:
+    """Opposite of encode_record()."""
+
+    (tid, title, status, added, modified, closed, due, start,
+     content, tag_ids, subtask_ids) = values
+
+    return (UUID(bytes=tid), title, Status(status),
+            _decode_date(added), _decode_date(modified),
+            None if closed is None else _decode_date(closed),
+            _decode_date(due), _decode_date(start), content,
+            [UUID(bytes=t) for t in tag_ids],
+            [UUID(bytes=s) for s in subtask_ids])
+
+
+class SnapshotCache:
+    """Cache attached to a data file."""
+
+    #: Appended to the data file path
+    SUFFIX = '.cache'
+
+    #: Bumped whenever the layout of the cache changes
+    VERSION = 1
+
+
+    def __init__(self, data_path: str) -> None:
+        self.data_path = data_path
+        self.path = data_path + self.SUFFIX
+
+
+    @staticmethod
+    def fingerprint(path: str) -> Fingerprint:
+        """Identify the current content of a file."""
+
+        digest = hashlib.blake2b(digest_size=16)
+
+        with open(path, 'rb') as stream:
+            stat = os.fstat(stream.fileno())
+
+            for chunk in iter(lambda: stream.read(1 << 20), b''):
+                digest.update(chunk)
+
+        return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+    def write(self, searches_xml: bytes, tags_xml: bytes,
+              records: List[TaskRecord]) -> None:
+        """Write the cache, matching the data file as it is now."""
+
+        header = ('gtg-cache', self.VERSION, self.fingerprint(self.data_path))
+        body = (searches_xml, tags_xml, [encode_record(r) for r in records])
+        temp_file = self.path + '__'
+
+        with open(temp_file, 'wb') as stream:
+            marshal.dump(header, stream)
+            marshal.dump(body, stream)
+
+        os.replace(temp_file, self.path)
+
+
+    def read(self) -> Optional[Snapshot]:
+        """Read the cache, or None if it doesn't match the data file."""
+
+        try:
+            with open(self.path, 'rb') as stream:
+                header = marshal.load(stream)
+
+                if header[:2] != ('gtg-cache', self.VERSION):
+                    log.debug('Ignoring cache %r: other version', self.path)
+                    return None
+
+                # Cheap checks first, hashing reads the whole file
+                size, mtime, _ = header[2]
+                stat = os.stat(self.data_path)
+
+                if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+                    log.debug('Ignoring cache %r: data file changed',
+                              self.path)
+                    return None
+
+                if header[2] != self.fingerprint(self.data_path):
+                    log.debug('Ignoring cache %r: data file hash differs',
+                              self.path)
+                    return None
+
+                searches_xml, tags_xml, records = marshal.load(stream)
+                return (searches_xml, tags_xml,
+                        [decode_record(r) for r in records])
+
+        except FileNotFoundError:
+            return None
+
+        except (OSError, EOFError, IndexError, ValueError,
+                TypeError) as error:
+            log.warning('Ignoring damaged cache %r: %r', self.path, error)
+            return None
+
+
+    def clear(self) -> None:
+        """Drop the cache."""
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -16,11 +16,27 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
-"""Sorters for tags and tasks."""
+"""Sorters for tags and tasks.
+
+Task sorters compare sort keys: plain tuples of numbers and strings,
+worked out once per task and kept until the task changes. Dates become
+day ordinals, so that comparing two tasks never builds Date objects.
+Keys end with the title and id of the task, so equal tasks still sort
+the same way every time.
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, Tuple
+from uuid import UUID
 
 from gi.repository import Gtk # type: ignore[import-untyped]
+from GTG.core.dates import Date, LOCAL_TIMEZONE, NODATE, NOW, SOMEDAY, SOON
 from GTG.core.tasks import Task
 
+#: Days from today fuzzy dates count as, like Date comparisons do
+FUZZY_DAYS = {NOW: 0, SOON: 15, SOMEDAY: 9999, NODATE: 9999}
+
+
 def unwrap(row, expected_type):
     """Find an item in TreeRow widget (sometimes nested)."""
 
@@ -31,10 +47,31 @@ def unwrap(row, expected_type):
 
     return item
 
+
+def date_key(value: Date, today: int) -> Tuple[int, int, int]:
+    """Comparable key for a date: day ordinal, fuzziness and time."""
+
+    dt_value = value.dt_value
+
+    if isinstance(dt_value, datetime):
+        if dt_value.tzinfo is not None:
+            dt_value = dt_value.astimezone(LOCAL_TIMEZONE)
+
+        seconds = dt_value.hour * 3600 + dt_value.minute * 60 + dt_value.second
+        return dt_value.toordinal(), 0, seconds
+
+    if isinstance(dt_value, date):
+        return dt_value.toordinal(), 0, 0
+
+    # Fuzzy dates come after real dates of the same day, in their order
+    return today + FUZZY_DAYS[dt_value], 1 + dt_value, 0
+
 class ReversibleSorter(Gtk.Sorter):
 
     def __init__(self) -> None:
         self._reverse: bool = False
+        self._keys: Dict[UUID, Any] = {}
+        self._today = date.today().toordinal()
         super().__init__()
 
 
@@ -49,6 +86,44 @@ class ReversibleSorter(Gtk.Sorter):
         self.changed(Gtk.SorterChange.INVERTED)
 
 
+    def sort_key(self, task: Task) -> tuple:
+        """Key to sort a task by."""
+
+        raise NotImplementedError
+
+
+    def forget(self, task: Task) -> None:
+        """Drop the cached key of a task that changed."""
+
+        self._keys.pop(task.id, None)
+
+
+    def clear(self) -> None:
+        """Drop every cached key, e.g. when the day changed."""
+
+        self._keys.clear()
+        self._today = date.today().toordinal()
+
+
+    def key_of(self, task: Task) -> tuple:
+        """Cached key of a task, ending with its title and id."""
+
+        try:
+            return self._keys[task.id]
+        except KeyError:
+            key = self._keys[task.id] = (self.sort_key(task)
+                                         + (task.title, str(task.id)))
+            return key
+
+
+    def do_compare(self, a, b) -> Gtk.Ordering:
+
+        a = a if type(a) is Task else unwrap(a, Task)
+        b = b if type(b) is Task else unwrap(b, Task)
+
+        return self.reversible_compare(self.key_of(a), self.key_of(b))
+
+
     def reversible_compare(self, first, second) -> Gtk.Ordering:
         """Compare for reversible sorters."""
 
@@ -70,109 +145,52 @@ class ReversibleSorter(Gtk.Sorter):
 class TaskTitleSorter(ReversibleSorter):
     __gtype_name__ = 'TaskTitleSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.title[0]
-        second = b.title[0]
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        # The title is already part of every key
+        return ()
 
 
 class TaskDueSorter(ReversibleSorter):
     __gtype_name__ = 'DueSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.date_due
-        second = b.date_due
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        return date_key(task.date_due, self._today)
 
 
 class TaskClosedSorter(ReversibleSorter):
     __gtype_name__ = 'ClosedSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.date_closed
-        second = b.date_closed
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        return date_key(task.date_closed, self._today)
 
 
 class TaskStartSorter(ReversibleSorter):
     __gtype_name__ = 'StartSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.date_start
-        second = b.date_start
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        return date_key(task.date_start, self._today)
 
 
 class TaskModifiedSorter(ReversibleSorter):
     __gtype_name__ = 'ModifiedSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.date_modified
-        second = b.date_modified
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        return date_key(task.date_modified, self._today)
 
 
 class TaskTagSorter(ReversibleSorter):
     __gtype_name__ = 'TagSorter'
 
-    def get_first_letter(self, tags) -> str:
-        """Get first letter of the first tag in a set of tags."""
-
-        return next(iter(tags)).name[0]
-
+    def sort_key(self, task: Task) -> tuple:
+        # By the first tag in alphabetical order, untagged tasks last
+        if task.tags:
+            return 0, min(tag.name for tag in task.tags)
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        if a.tags:
-            first = self.get_first_letter(a.tags)
-        else:
-            first = 'zzzzzzz'
-
-        if b.tags:
-            second = self.get_first_letter(b.tags)
-        else:
-            second = 'zzzzzzz'
-
-        return self.reversible_compare(first, second)
+        return 1, ''
 
 
 class TaskAddedSorter(ReversibleSorter):
     __gtype_name__ = 'AddedSorter'
 
-    def do_compare(self, a, b) -> Gtk.Ordering:
-
-        a = unwrap(a, Task)
-        b = unwrap(b, Task)
-
-        first = a.date_added
-        second = b.date_added
-
-        return self.reversible_compare(first, second)
+    def sort_key(self, task: Task) -> tuple:
+        return date_key(task.date_added, self._today)
@@ -26,8 +26,8 @@ import logging
 import random
 import re
 
-from lxml.etree import Element, SubElement, _Element
-from typing import Dict, List, Set, Optional
+from lxml.etree import Element, _Element
+from typing import AbstractSet, Dict, FrozenSet, List, Set, Optional
 
 from GTG.core.base_store import BaseStore, StoreItem
 
@@ -45,12 +45,16 @@ class Tag(StoreItem):
 
     __gtype_name__ = 'gtg_Tag'
 
+    #: Bumped whenever the actionable flag of a tag changes
+    actionable_generation = 0
+
     def __init__(self, id: UUID, name: str) -> None:
         self._name = name
 
         self._icon: Optional[str] = None
         self._color: Optional[str] = None
-        self.actionable = True
+        self._row_css: Optional[str] = None
+        self._actionable = True
 
         super().__init__(id)
 
@@ -73,6 +77,20 @@ class Tag(StoreItem):
         return self.id == other.id
 
 
+    @property
+    def actionable(self) -> bool:
+        """Whether tasks with this tag can be in the actionable pane."""
+
+        return self._actionable
+
+
+    @actionable.setter
+    def actionable(self, value: bool) -> None:
+        if value != self._actionable:
+            self._actionable = value
+            Tag.actionable_generation += 1
+
+
     @GObject.Property(type=str)
     def name(self) -> str:
         """Read only property."""
@@ -108,9 +126,26 @@ class Tag(StoreItem):
     @color.setter
     def set_color(self, value: str) -> None:
         self._color = value
+        self._row_css = None
         self.notify('has-color')
 
 
+    @property
+    def row_css(self) -> Optional[str]:
+        """CSS tinting the rows of tasks with this tag.
+
+        Built once per color, since rows ask for it on every bind.
+        """
+
+        if self._row_css is None and self._color:
+            color = Gdk.RGBA()
+            color.parse(self._color)
+            color.alpha = 0.1
+            self._row_css = '* { background:' + color.to_string() + '; }'
+
+        return self._row_css
+
+
     @GObject.Property(type=bool, default=False)
     def has_color(self) -> bool:
 
@@ -126,8 +161,8 @@ class Tag(StoreItem):
     def get_matching_tags(self) -> List['Tag']:
         """Return the tag with its descendants."""
         matching = [self]
-        for c in self.children:
-            matching += c.get_matching_tags()
+        for tag in matching:
+            matching.extend(tag.children)
         return matching
 
 
@@ -151,6 +186,11 @@ class TagStore(BaseStore[Tag]):
         self.lookup_names: Dict[str, Tag] = {}
         self.tid_to_children_model: Dict[UUID,Gio.ListStore] = dict()
 
+        # Closures of each tag (itself with its descendants, or itself
+        # with its ancestors), by id. Cleared whenever the tree changes.
+        self._descendants: Dict[UUID, FrozenSet[Tag]] = {}
+        self._ancestors: Dict[UUID, FrozenSet[Tag]] = {}
+
         super().__init__()
 
 
@@ -202,6 +242,49 @@ class TagStore(BaseStore[Tag]):
         return self.lookup_names[name]
 
 
+    def descendants(self, tag: Tag) -> FrozenSet[Tag]:
+        """Return the tag with its descendants, like get_matching_tags()."""
+
+        try:
+            return self._descendants[tag.id]
+        except KeyError:
+            matching = frozenset((tag,)).union(
+                *(self.descendants(child) for child in tag.children))
+            self._descendants[tag.id] = matching
+            return matching
+
+
+    def ancestors(self, tag: Tag) -> FrozenSet[Tag]:
+        """Return the tag with its ancestors."""
+
+        try:
+            return self._ancestors[tag.id]
+        except KeyError:
+            if tag.parent is None:
+                lineage = frozenset((tag,))
+            else:
+                lineage = self.ancestors(tag.parent) | {tag}
+
+            self._ancestors[tag.id] = lineage
+            return lineage
+
+
+    def carries(self, tags: AbstractSet[Tag], tag: Tag) -> bool:
+        """Whether some of the tags (of a task) are the tag or descend from it.
+
+        Costs one lookup per tag given, whatever the size of the tree.
+        """
+
+        return any(tag in self.ancestors(owned) for owned in tags)
+
+
+    def _forget_closures(self) -> None:
+        """Drop the cached closures after a change in the tree."""
+
+        self._descendants.clear()
+        self._ancestors.clear()
+
+
     def new(self, name: str, parent: Optional[UUID] = None) -> Tag: # type: ignore[override]
         """Create a new tag and add it to the store."""
 
@@ -290,32 +373,32 @@ class TagStore(BaseStore[Tag]):
 
         root = Element('taglist')
 
-        parent_map = {}
-
         for tag in self.lookup.values():
-            for child in tag.children:
-                parent_map[child.id] = tag.id
+            root.append(self.item_to_xml(tag))
 
-        for tag in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
-            element.set('id', str(tag.id))
-            element.set('name', tag.name)
+        return root
 
-            if tag.color:
-                element.set('color', tag.color)
 
-            if tag.icon:
-                element.set('icon', tag.icon)
+    def item_to_xml(self, item: Tag) -> _Element:
+        """Save a single tag to an LXML element."""
 
+        element = Element(self.XML_TAG)
+        element.set('id', str(item.id))
+        element.set('name', item.name)
 
-            element.set('nonactionable', str(not tag.actionable))
+        if item.color:
+            element.set('color', item.color)
 
-            try:
-                element.set('parent', str(parent_map[tag.id]))
-            except KeyError:
-                pass
+        if item.icon:
+            element.set('icon', item.icon)
 
-        return root
+
+        element.set('nonactionable', str(not item.actionable))
+
+        if item.parent is not None:
+            element.set('parent', str(item.parent.id))
+
+        return element
 
 
     def generate_color(self) -> str:
@@ -374,6 +457,7 @@ class TagStore(BaseStore[Tag]):
 
         super().add(item, parent_id)
         self.lookup_names[item.name] = item
+        self._forget_closures()
 
         # Update UI
         if not parent_id:
@@ -398,6 +482,7 @@ class TagStore(BaseStore[Tag]):
             self.model.remove(pos[1])
 
         super().remove(item_id)
+        self._forget_closures()
 
 
     def parent(self, item_id: UUID, parent_id: UUID) -> None:
@@ -413,6 +498,7 @@ class TagStore(BaseStore[Tag]):
             self.model.remove(pos[1])
 
         super().parent(item_id, parent_id)
+        self._forget_closures()
 
         # Add back to UI
         self._append_to_parent_model(item_id)
@@ -429,6 +515,7 @@ class TagStore(BaseStore[Tag]):
         self._remove_from_parent_model(item_id)
 
         super().unparent(item_id)
+        self._forget_closures()
 
         # Add back to UI
         self.model.append(item)
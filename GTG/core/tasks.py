@@ -19,22 +19,25 @@
 """Everything related to tasks."""
 
 
-from gi.repository import GObject, Gio, Gtk, Gdk # type: ignore[import-untyped]
+from gi.repository import GObject, GLib, Gio, Gtk # type: ignore[import-untyped]
 from gettext import gettext as _
 
 from uuid import uuid4, uuid5, UUID, NAMESPACE_URL
 import logging
-from typing import Callable, Any, List, Optional, Set, Dict, Tuple, Union
+from typing import (Callable, Any, FrozenSet, Iterable, List, Optional, Set,
+                    Dict, Tuple, Union)
 from enum import Enum
 import re
 import datetime
 from operator import attrgetter
 
-from lxml.etree import Element, _Element, SubElement, CDATA
+from lxml.etree import (Element, _Element, SubElement, CDATA, XMLParser,
+                        fromstring, indent, tostring)
 
-from GTG.core.base_store import BaseStore, StoreItem
+from GTG.core.base_store import BaseStore, StoreBatch, StoreItem
 from GTG.core.tags import Tag, TagStore
 from GTG.core.dates import Date
+from GTG.core.text_index import TextIndex
 
 log = logging.getLogger(__name__)
 
@@ -112,11 +115,19 @@ class Task(StoreItem):
 
     __gtype_name__ = 'gtg_Task'
 
+    #: Bumped by new_day(), for tasks waiting for their start date
+    actionable_day = 0
+
     def __init__(self, id: UUID, title: str) -> None:
         self.raw_title = title.strip('\t\n')
-        self.content =  ''
+        self._content = ''
         self.tags: Set[Tag] = set()
-        self.status = Status.ACTIVE
+        self._status = Status.ACTIVE
+
+        # Cached is_actionable, None when it has to be computed again
+        self._actionable: Optional[bool] = None
+        self._actionable_tags = -1
+        self._actionable_day: Optional[int] = None
 
         self._date_added = Date.no_date()
         self._date_due = Date.no_date()
@@ -146,18 +157,71 @@ class Task(StoreItem):
 
     @GObject.Property(type=bool, default=True)
     def is_actionable(self) -> bool:
-        """Determine if this task is actionable."""
+        """Determine if this task is actionable.
+
+        The answer is kept until one of its inputs changes: the status,
+        dates, tags or subtasks of the task, the status of a subtask, the
+        actionable flag of any tag, or the day for a task not started yet.
+        """
+
+        if (self._actionable is None
+                or self._actionable_tags != Tag.actionable_generation
+                or self._actionable_day not in (None, Task.actionable_day)):
+            self._actionable = self._compute_actionable()
+
+        return self._actionable
+
+
+    def _compute_actionable(self) -> bool:
+        self._actionable_tags = Tag.actionable_generation
+        self._actionable_day = None
+
+        if (self.status != Status.ACTIVE
+                or self._date_due == Date.someday()
+                or not all(t.actionable for t in self.tags)
+                or any(c.status == Status.ACTIVE for c in self.children)):
+            return False
 
-        actionable_tags = all(t.actionable for t in self.tags)
-        active_children = all(t.status != Status.ACTIVE for t in self.children)
         days_left = self._date_start.days_left()
-        can_start = True if not days_left else days_left <= 0
 
-        return (self.status == Status.ACTIVE
-                and self._date_due != Date.someday()
-                and actionable_tags
-                and active_children
-                and can_start)
+        if days_left and days_left > 0:
+            # Only a new day can change this
+            self._actionable_day = Task.actionable_day
+            return False
+
+        return True
+
+
+    @classmethod
+    def new_day(cls) -> None:
+        """Check again whether tasks waiting to start can start."""
+
+        cls.actionable_day += 1
+
+
+    @property
+    def status(self) -> Status:
+        return self._status
+
+
+    @status.setter
+    def status(self, value: Status) -> None:
+        self._status = value
+        self._actionable = None
+
+        # A parent is only actionable once its subtasks are closed
+        if self.parent is not None:
+            self.parent._actionable = None
+
+
+    def add_child(self, child: 'Task') -> None:
+        super().add_child(child)
+        self._actionable = None
+
+
+    def remove_child(self, child: 'Task') -> None:
+        super().remove_child(child)
+        self._actionable = None
 
 
     def toggle_active(self, propagated: bool = False) -> None:
@@ -222,6 +286,7 @@ class Task(StoreItem):
     @date_due.setter
     def date_due(self, value: Date) -> None:
         self._date_due = value
+        self._actionable = None
         self.has_date_due = bool(value)
 
         if value:
@@ -268,6 +333,7 @@ class Task(StoreItem):
         else:
             self._date_start = Date(value)
 
+        self._actionable = None
         self.has_date_start = bool(value)
         self.date_start_str = self._date_start.to_readable_string()
         self.notify('is_actionable')
@@ -307,6 +373,16 @@ class Task(StoreItem):
         self.raw_title = value.strip('\t\n') or _('(no title)')
 
 
+    @GObject.Property(type=str)
+    def content(self) -> str:
+        return self._content
+
+
+    @content.setter
+    def set_content(self, value) -> None:
+        self._content = value
+
+
     @GObject.Property(type=str)
     def excerpt(self) -> str:
         # Strip tags
@@ -327,6 +403,7 @@ class Task(StoreItem):
     @GObject.Signal(name='tags-changed')
     def tags_changed_signal(self):
         """Signal to emit when a tag was added or removed."""
+        self._actionable = None
 
 
     def add_tag(self, tag: Tag) -> None:
@@ -366,8 +443,12 @@ class Task(StoreItem):
 
     def rename_tag(self, old_tag_name: str, new_tag_name: str) -> None:
         """Replace a tag's name in the content."""
-        self.content = re.sub(r'\B@'+re.escape(old_tag_name)+TAG_CONTINUES,
-                              lambda _: '@'+new_tag_name, self.content)
+        content = re.sub(r'\B@'+re.escape(old_tag_name)+TAG_CONTINUES,
+                         lambda _: '@'+new_tag_name, self.content)
+
+        # Only notify the tasks actually using the tag
+        if content != self.content:
+            self.content = content
 
 
     @property
@@ -623,10 +704,7 @@ class Task(StoreItem):
     def row_css(self) -> Optional[str]:
         for tag in self.tags:
             if tag.color:
-                color = Gdk.RGBA()
-                color.parse(tag.color)
-                color.alpha = 0.1
-                return '* { background:' + color.to_string() + '; }'
+                return tag.row_css
         return None
 
 
@@ -692,18 +770,60 @@ class Task(StoreItem):
 # STORE
 # ------------------------------------------------------------------------------
 class FilteredTaskTreeManager:
+    """Keep a tree of list models with the tasks matching a filter.
+
+    The tasks matching the filter are remembered, so that a task is
+    matched once per refilter and parents are looked up in that set.
+    A refilter compares the new set with the models and only removes and
+    appends what changed. When the filter says it became more (or less)
+    strict, only the visible (or hidden) tasks are matched again.
+
+    With defer_refilter, the refilters requested during one main loop
+    iteration are merged and run once, when idle.
+
+    Given a PaneClassifier, the store changes come through it instead of
+    from the store directly. A suspended manager (of a pane not on screen)
+    only notes the changes, and catches up when resumed. The changes of a
+    store batch are caught up with the same way, all at once.
 
+    The model of the subtasks of a task is only built when its row is
+    expanded (or GTK asks whether it can be), and is released once the
+    tree models showing it are gone, e.g. when the row collapses.
+    """
 
-    def __init__(self,store:'TaskStore',task_filter:Gtk.Filter) -> None:
+    #: Above this share of changed tasks, resuming refilters everything
+    RESUME_REFILTER_RATIO = 0.25
+
+
+    def __init__(self,store:'TaskStore',task_filter:Gtk.Filter,
+                 defer_refilter: bool = False,
+                 classifier: Optional['PaneClassifier'] = None) -> None:
         self.root_model: Gio.ListStore = Gio.ListStore.new(Task)
         self.task_filter: Gtk.Filter = task_filter
         self.task_filter.connect('changed',self._on_changed)
         self.tid_to_subtask_model: Dict[UUID,Gio.ListStore] = dict()
         self.tid_to_containing_model: Dict[UUID,Gio.ListStore] = dict()
+
+        #: Number of live tree models showing each subtask model
+        self._model_users: Dict[UUID, int] = {}
         self.tree_model = Gtk.TreeListModel.new(self.root_model, False, False, self._model_expand)
         self.store = store
+
+        #: Ids of the tasks matching the filter
+        self.visible: Set[UUID] = set()
+
+        self.defer_refilter = defer_refilter
+        self._pending_change: Optional[Gtk.FilterChange] = None
+
+        self.suspended = False
+        self._stale: Dict[UUID, Task] = {}
+
         self._find_root_tasks()
-        self._connect_to_update_events()
+
+        if classifier is None:
+            self._connect_to_update_events()
+        else:
+            classifier.managers.append(self)
 
 
     def _connect_to_update_events(self):
@@ -711,31 +831,98 @@ class FilteredTaskTreeManager:
         self.store.connect('added', self._on_task_added)
         self.store.connect('parent-change',self._on_task_parented)
         self.store.connect('parent-removed',self._on_task_unparented)
-        self.store.connect('task-filterably-changed',lambda _, t: self.update_position_of(t))
+        self.store.connect('task-filterably-changed',self._on_task_changed)
+        self.store.connect('batch-changed',self._on_batch_changed)
 
 
     def _on_task_removed(self,store:'TaskStore',t:Task):
+        if self.suspended:
+            self._note(t, t.parent)
+            return
         self.remove(t)
+        self.visible.discard(t.id)
         if t.parent is not None:
             self.update_position_of(t.parent)
 
 
     def _on_task_added(self,store:'TaskStore',t:Task):
+        if self.suspended:
+            self._note(t, t.parent)
+            return
         self.update_position_of(t)
         if t.parent is not None:
             self.update_position_of(t.parent)
 
 
     def _on_task_parented(self,store:'TaskStore',t:Task,parent:Task):
+        if self.suspended:
+            self._note(t, parent)
+            return
         self.update_position_of(t)
         self.update_position_of(parent)
 
 
     def _on_task_unparented(self,store:'TaskStore',t:Task,old_parent:Task):
+        if self.suspended:
+            self._note(t, old_parent)
+            return
         self.update_position_of(t)
         self.update_position_of(old_parent)
 
 
+    def _on_task_changed(self,store:'TaskStore',t:Task):
+        if self.suspended:
+            self._note(t)
+            return
+        self.update_position_of(t)
+
+
+    def _on_batch_changed(self,store:'TaskStore',batch:StoreBatch):
+        self._note(*batch.items.values())
+        if not self.suspended:
+            self._catch_up()
+
+
+    def _note(self, *tasks: Optional[Task]) -> None:
+        """Remember tasks to update when resumed."""
+        for t in tasks:
+            if t is not None:
+                self._stale[t.id] = t
+
+
+    def suspend(self) -> None:
+        """Stop updating the models until resume() is called."""
+        self.suspended = True
+
+
+    def resume(self) -> None:
+        """Catch up with what changed while suspended."""
+        if not self.suspended:
+            return
+
+        self.suspended = False
+        self._catch_up()
+
+
+    def _catch_up(self) -> None:
+        """Update the noted tasks, or everything if many were noted."""
+        stale, self._stale = self._stale, {}
+
+        if len(stale) > len(self.store.lookup) * self.RESUME_REFILTER_RATIO:
+            self._refilter_all_tasks()
+            return
+
+        if self._pending_change is not None:
+            self._refilter_all_tasks(self._pending_change)
+
+        for t in stale.values():
+            if t.id in self.store.lookup:
+                self.update_position_of(t)
+            else:
+                self.visible.discard(t.id)
+                self.remove(t)
+
+
     def get_tree_model(self):
         return self.tree_model
 
@@ -744,48 +931,174 @@ class FilteredTaskTreeManager:
         return any(self.task_filter.match(c) for c in task.children)
 
 
+    def stats(self) -> Dict[str, int]:
+        """Sizes of what the manager keeps in memory, for debugging."""
+        return {
+            'visible': len(self.visible),
+            'root_rows': self.root_model.get_n_items(),
+            'child_models': len(self.tid_to_subtask_model),
+            'child_rows': sum(model.get_n_items() for model
+                              in self.tid_to_subtask_model.values()),
+            'child_model_users': sum(self._model_users.values()),
+            'placed': len(self.tid_to_containing_model),
+            'stale': len(self._stale),
+        }
+
+
     def set_filter(self,new_filter:Gtk.Filter):
         self.task_filter = new_filter
         self.task_filter.connect('changed',self._on_changed)
         self._refilter_all_tasks()
 
 
-    def _refilter_all_tasks(self) -> None:
-        for t in self.store.data:
-            self._update_with_descendants(t)
+    def _refilter_all_tasks(self,
+                            change: Gtk.FilterChange = Gtk.FilterChange.DIFFERENT
+                            ) -> None:
+        self._pending_change = None
+        match = self.task_filter.match
+
+        if change == Gtk.FilterChange.MORE_STRICT:
+            # Hidden tasks stay hidden
+            self.visible = {tid for tid in self.visible
+                            if tid in self.store.lookup
+                            and match(self.store.lookup[tid])}
+        elif change == Gtk.FilterChange.LESS_STRICT:
+            # Visible tasks stay visible
+            self.visible |= {t.id for t in self.store.lookup.values()
+                             if t.id not in self.visible and match(t)}
+        else:
+            self.visible = {t.id for t in self.store.lookup.values()
+                            if match(t)}
 
+        self._sync_models()
 
-    def _on_changed(self,*args):
-        self._refilter_all_tasks()
+
+    def _on_changed(self,task_filter:Gtk.Filter,
+                    change: Gtk.FilterChange = Gtk.FilterChange.DIFFERENT):
+        if change not in (Gtk.FilterChange.MORE_STRICT,
+                          Gtk.FilterChange.LESS_STRICT):
+            change = Gtk.FilterChange.DIFFERENT
+
+        if not self.defer_refilter and not self.suspended:
+            self._refilter_all_tasks(change)
+            return
+
+        if self._pending_change is None:
+            if not self.suspended:
+                GLib.idle_add(self.flush)
+            self._pending_change = change
+        elif self._pending_change != change:
+            self._pending_change = Gtk.FilterChange.DIFFERENT
+
+
+    def flush(self) -> bool:
+        """Run the deferred refilter, if any."""
+
+        if self._pending_change is not None and not self.suspended:
+            self._refilter_all_tasks(self._pending_change)
+
+        return GLib.SOURCE_REMOVE
 
 
     def _find_root_tasks(self) -> None:
         self.root_model.remove_all()
+        self.tid_to_containing_model.clear()
+        self._refilter_all_tasks()
+
+
+    def _sync_models(self) -> None:
+        """Bring the models in line with the visible tasks."""
+
+        # Wanted tasks by id of their parent, None for the root
+        wanted: Dict[Optional[UUID], List[Task]] = {None: []}
+
+        for tid in self.tid_to_subtask_model:
+            wanted[tid] = []
+
+        containing: Dict[UUID, Gio.ListStore] = {}
+
         for t in self.store.lookup.values():
-            if self._should_be_root_item(t):
-                self.root_model.append(t)
-                self.tid_to_containing_model[t.id] = self.root_model
+            if t.id not in self.visible:
+                continue
+
+            model = self._get_correct_containing_model(t)
+
+            if model is not None:
+                owner = None if model is self.root_model else t.parent.id
+                wanted[owner].append(t)
+                containing[t.id] = model
+
+        # Removing rows can release subtask models as we go
+        self.tid_to_containing_model = containing
+
+        for owner, tasks in wanted.items():
+            if owner is None:
+                model = self.root_model
+            else:
+                model = self.tid_to_subtask_model.get(owner)
+
+            if model is None:
+                for t in tasks:
+                    containing.pop(t.id, None)
+            else:
+                self._sync_model(model, tasks)
+
+
+    @staticmethod
+    def _sync_model(model: Gio.ListStore, tasks: List[Task]) -> None:
+        """Remove the rows not in tasks and append the missing ones.
+
+        Kept rows stay where they are (sorting is done above this model),
+        so their expanded state survives.
+        """
+        wanted = {t.id for t in tasks}
+        present = set()
+        end = model.get_n_items()
+
+        # Remove runs of unwanted rows, from the end so that positions hold
+        while end > 0:
+            if model.get_item(end - 1).id in wanted:
+                present.add(model.get_item(end - 1).id)
+                end -= 1
+                continue
+
+            start = end - 1
+            while start > 0 and model.get_item(start - 1).id not in wanted:
+                start -= 1
+
+            model.splice(start, end - start, [])
+            end = start
+
+        missing = [t for t in tasks if t.id not in present]
+
+        if missing:
+            model.splice(model.get_n_items(), 0, missing)
 
 
     def _should_be_root_item(self,t:Task):
-        if not self.task_filter.match(t):
+        if t.id not in self.visible:
             return False
-        return t.parent is None or not self.task_filter.match(t.parent)
+        return t.parent is None or t.parent.id not in self.visible
 
 
     def update_position_of(self,t:Task):
+        was_visible = t.id in self.visible
+
         if not self.task_filter.match(t):
+            self.visible.discard(t.id)
             self.remove(t)
-            return
-        if not self._in_the_right_model(t):
-            self.remove(t)
-            self.add(t)
-
+        else:
+            self.visible.add(t.id)
+            if not self._in_the_right_model(t):
+                self.remove(t)
+                self.add(t)
 
-    def _update_with_descendants(self,t:Task):
-        self.update_position_of(t)
-        for c in t.children:
-            self._update_with_descendants(c)
+        # Subtasks go to the root when their parent hides, and back
+        if was_visible != (t.id in self.visible):
+            for c in t.children:
+                if c.id in self.visible and not self._in_the_right_model(c):
+                    self.remove(c)
+                    self.add(c)
 
 
     def _in_the_right_model(self,t:Task):
@@ -795,11 +1108,7 @@ class FilteredTaskTreeManager:
 
         if current_model is None and correct_model is None:
             return True
-        if current_model is correct_model:
-            assert correct_model is not None
-            pos = correct_model.find(t)
-            return pos[0]
-        return False
+        return current_model is correct_model
 
 
     def add(self,task:Task):
@@ -824,7 +1133,7 @@ class FilteredTaskTreeManager:
 
     def _get_correct_containing_model(self,task:Task) -> Optional[Gio.ListStore]:
         """Return the ListStore that should contain the given task matching the filter."""
-        if task.parent is None or not self.task_filter.match(task.parent):
+        if task.parent is None or task.parent.id not in self.visible:
             return self.root_model
         return self.tid_to_subtask_model.get(task.parent.id)
 
@@ -834,6 +1143,22 @@ class FilteredTaskTreeManager:
         return self.tid_to_containing_model.get(task.id)
 
 
+    def row_of(self,task:Task) -> Optional[Gtk.TreeListRow]:
+        """Return the row showing a task, if any."""
+        model = self._get_containing_model(task)
+        if model is None:
+            return None
+        found, pos = model.find(task)
+        if not found:
+            return None
+        if model is self.root_model:
+            return self.tree_model.get_child_row(pos)
+        parent_row = self.row_of(task.parent)
+        if parent_row is None or not parent_row.get_expanded():
+            return None
+        return parent_row.get_child_row(pos)
+
+
     def _model_expand(self, item):
         """Return a ListStore with the matching children of the given task."""
         if type(item) == Gtk.TreeListRow:
@@ -841,18 +1166,150 @@ class FilteredTaskTreeManager:
         if item.id not in self.tid_to_subtask_model:
             self.tid_to_subtask_model[item.id] = self._create_model_for_children(item)
         model = self.tid_to_subtask_model[item.id]
-        return Gtk.TreeListModel.new(model, False, False, self._model_expand)
+        tree = Gtk.TreeListModel.new(model, False, False, self._model_expand)
+
+        # GTK drops the tree when the row collapses or goes away
+        self._model_users[item.id] = self._model_users.get(item.id, 0) + 1
+        tree.weak_ref(self._release_model, item.id)
+        return tree
+
+
+    def _release_model(self, tid: UUID) -> None:
+        """Forget the subtask model of a task once nothing shows it."""
+        users = self._model_users.pop(tid, 0) - 1
+        if users > 0:
+            self._model_users[tid] = users
+            return
+
+        model = self.tid_to_subtask_model.pop(tid, None)
+        if model is None:
+            return
+
+        for i in range(model.get_n_items()):
+            child = model.get_item(i)
+            if self.tid_to_containing_model.get(child.id) is model:
+                del self.tid_to_containing_model[child.id]
 
 
     def _create_model_for_children(self,item):
         model = Gio.ListStore.new(Task)
         for child in item.children:
-            if self.task_filter.match(child):
+            if child.id in self.visible:
                 model.append(child)
                 self.tid_to_containing_model[child.id] = model
         return model
 
 
+class PaneClassifier:
+    """Sort tasks into the panes of the main window, once for all panes.
+
+    Each task pane has its own filter and tree manager. Rather than each
+    manager handling every store signal, the classifier handles them once
+    and relays them to the managers, which suspended ones only note. It
+    also remembers which panes each task belongs to, so that the filters
+    of the panes don't each work it out again.
+    """
+
+
+    def __init__(self, store: 'TaskStore') -> None:
+        self.store = store
+        self.managers: List[FilteredTaskTreeManager] = []
+        self._panes: Dict[UUID, FrozenSet[str]] = {}
+
+        store.connect('added', self._on_added)
+        store.connect('removed', self._on_removed)
+        store.connect('parent-change', self._on_parent_change)
+        store.connect('parent-removed', self._on_parent_removed)
+        store.connect('task-filterably-changed', self._on_changed)
+        store.connect('batch-changed', self._on_batch_changed)
+
+
+    def panes_of(self, task: Task) -> FrozenSet[str]:
+        """Names of the panes showing a task, ignoring tags and search."""
+
+        try:
+            return self._panes[task.id]
+        except KeyError:
+            pass
+
+        if task.status is Status.ACTIVE:
+            panes = {'active'}
+
+            if task.is_actionable:
+                panes.add('workview')
+        else:
+            panes = {'closed'}
+
+        self._panes[task.id] = frozenset(panes)
+        return self._panes[task.id]
+
+
+    def forget(self, *tasks: Optional[Task]) -> None:
+        """Classify these tasks again when next asked."""
+
+        for task in tasks:
+            if task is not None:
+                self._panes.pop(task.id, None)
+
+
+    def clear(self) -> None:
+        """Classify every task again, e.g. when a day passed."""
+
+        self._panes.clear()
+
+
+    def _on_added(self, store, task: Task) -> None:
+        self.forget(task, task.parent)
+
+        for manager in self.managers:
+            manager._on_task_added(store, task)
+
+
+    def _on_removed(self, store, task: Task) -> None:
+        self.forget(task, task.parent)
+
+        for manager in self.managers:
+            manager._on_task_removed(store, task)
+
+
+    def _on_parent_change(self, store, task: Task, parent: Task) -> None:
+        self.forget(task, parent)
+
+        for manager in self.managers:
+            manager._on_task_parented(store, task, parent)
+
+
+    def _on_parent_removed(self, store, task: Task, parent: Task) -> None:
+        self.forget(task, parent)
+
+        for manager in self.managers:
+            manager._on_task_unparented(store, task, parent)
+
+
+    def _on_changed(self, store, task: Task) -> None:
+        # Whether the parent is actionable depends on its subtasks
+        self.forget(task, task.parent)
+
+        for manager in self.managers:
+            manager._on_task_changed(store, task)
+
+
+    def _on_batch_changed(self, store, batch: StoreBatch) -> None:
+        self.forget(*batch.items.values())
+
+        for manager in self.managers:
+            manager._on_batch_changed(store, batch)
+
+
+#: A task built by TaskStore.parse_xml, with its tag and subtask ids
+ParsedTask = Tuple[Task, List[UUID], List[UUID]]
+
+#: The fields of a task, as stored: id, title, status, added, modified,
+#: closed (None while active), due and start dates, content, tag ids and
+#: subtask ids
+TaskRecord = Tuple[UUID, str, Status, Date, Date, Optional[Date], Date,
+                   Date, str, List[UUID], List[UUID]]
+
 
 class TaskStore(BaseStore[Task]):
     """A tree of tasks."""
@@ -862,15 +1319,64 @@ class TaskStore(BaseStore[Task]):
     #: Tag to look for in XML
     XML_TAG = 'task'
 
+    BATCHED_SIGNALS = BaseStore.BATCHED_SIGNALS + (
+        'task-filterably-changed', 'task-sortably-changed')
+
+
+    def __init__(self) -> None:
+        # Serialized tasks reused by serialize() and to_xml(). A task
+        # missing from here is dirty: it changed since it was last
+        # serialized.
+        self._xml_cache: Dict[UUID, bytes] = {}
+
+        #: Ids of the tasks carrying each tag, by tag id
+        self.tag_index: Dict[UUID, Set[UUID]] = {}
+        self._indexed_tags: Dict[UUID, Set[UUID]] = {}
+
+        #: Title and content of the tasks, for searching words
+        self.text_index = TextIndex()
+
+        super().__init__()
+
+
+    # The bodies below run on every emission (they are the class
+    # closures of the signals): they keep the XML cache and the tag and
+    # text indexes up to date.
 
     @GObject.Signal(name='task-filterably-changed', arg_types=(object,))
-    def task_filterably_changed_signal(self, *_):
+    def task_filterably_changed_signal(self, task):
         """Signal to emit when a task was changed in a filterable way. (E.g., A tag was added.)"""
+        self.mark_dirty(task)
+        self._index_tags(task)
+        self._index_text(task)
 
 
     @GObject.Signal(name='task-sortably-changed', arg_types=(object,))
-    def task_sortably_changed_signal(self, *_):
+    def task_sortably_changed_signal(self, task):
         """Signal to emit when a task changed in a way that can affect sorting."""
+        self.mark_dirty(task)
+
+
+    @GObject.Signal(name='task-notify', arg_types=(object, str))
+    def task_notify_signal(self, task, name):
+        """Relays the property notifications of every task, and tag
+        changes as 'tags'. Views showing many tasks follow them all
+        through this one signal."""
+
+
+    def _end_batch(self, batch: StoreBatch) -> None:
+        # Do what the class closures of the held back signals would have
+        for task in batch.get('task-filterably-changed').values():
+            if self.lookup.get(task.id) is task:
+                self.mark_dirty(task)
+                self._index_tags(task)
+                self._index_text(task)
+
+        for task in batch.get('task-sortably-changed').values():
+            if self.lookup.get(task.id) is task:
+                self.mark_dirty(task)
+
+        super()._end_batch(batch)
 
 
     def __str__(self) -> str:
@@ -889,7 +1395,10 @@ class TaskStore(BaseStore[Task]):
         """Duplicate a task for the next ocurrence."""
 
         new_task = self.new(task.title)
-        new_task.tags = task.tags
+
+        for tag in task.tags:
+            new_task.add_tag(tag)
+
         new_task.content = task.content
         new_task.date_added = task.date_added
         # Inherit the recurrence, as the 0.6 core did: without this the
@@ -925,186 +1434,292 @@ class TaskStore(BaseStore[Task]):
             for tag in self.lookup[parent].tags:
                 task.add_tag(tag)
 
-        self.emit('task-filterably-changed',task)
+        self._emit('task-filterably-changed',task)
         return task
 
 
     def from_xml(self, xml: _Element, tag_store: TagStore) -> None: # type: ignore[override]
         """Load up tasks from a lxml object."""
 
-        elements = list(xml.iter(self.XML_TAG))
-
-        for element in elements:
-            raw_id = element.get('id')
-            tid = id_to_uuid(raw_id)
-            if str(tid) != raw_id:
-                log.warning('Task id %r is not a UUID, mapped to %s',
-                            raw_id, tid)
-            title_element = element.find('title')
-            assert title_element is not None, 'Title element not found for task '+str(tid)
-            assert title_element.text is not None, 'Title text not found for task '+str(tid)
-            title = title_element.text
-            status = element.get('status')
-
-            task = Task(id=tid, title=title)
-
-            dates = element.find('dates')
-            assert dates is not None, 'Dates element not found in task '+str(tid)
-
-            modified_element = dates.find('modified')
-            assert modified_element is not None, 'Modified element not found in task '+str(tid)
-            assert modified_element.text is not None, 'Modified text not found in task '+str(tid)
-            modified = modified_element.text
-            task.date_modified = Date(datetime.datetime.fromisoformat(modified))
-
-            added_element = dates.find('added')
-            if added_element is not None and added_element.text:
-                added = added_element.text
-                task.date_added = Date(datetime.datetime.fromisoformat(added))
-            else:
-                # Stores written while a task had no added date -- e.g.
-                # after importing a CalDAV VTODO without a CREATED
-                # field, before the fill_task guard -- lack the <added>
-                # element or leave it empty. Refusing to load them makes
-                # GTG crash at startup (#1033): heal the task instead,
-                # falling back on the modification date parsed above,
-                # like the import side does.
-                log.warning('Task %s has no added date, falling back '
-                            'on the modification date', tid)
-                task.date_added = task.date_modified
-
-            # 0.6 wrote the dismissed status as 'Dismiss'; 0.7 renamed
-            # it to 'Dismissed'. Accept both so migrated files keep
-            # their dismissed tasks (#1308). Set is_active alongside:
-            # set_status() is avoided on purpose here, as it would
-            # overwrite date_closed with today and trigger the
-            # recurrence duplication logic.
-            if status == 'Done':
-                task.status = Status.DONE
-                task.is_active = False
-            elif status in ('Dismissed', 'Dismiss'):
-                task.status = Status.DISMISSED
-                task.is_active = False
-
-            # Dates
-            done_element = dates.find('done')
-            if done_element is not None and done_element.text is not None:
-                closed = Date.parse(done_element.text)
-                task.date_closed = closed
-            elif task.status is not Status.ACTIVE:
-                # A closed task without a closed date is invisible to
-                # the reaper: today minus no_date is -9999 days, never
-                # above any purge threshold (#1338). Files written by
-                # 0.7 lost the closed date of every dismissed task,
-                # since the serializer only wrote it for Done: heal
-                # them with the modification date, the same fallback
-                # the added date uses above.
-                log.warning('Closed task %s has no closed date, falling '
-                            'back on the modification date', tid)
-                task.date_closed = Date(str(task.date_modified)[:10])
-
-            fuzzy_due_date = Date.parse(dates.findtext('fuzzyDue'))
-            due_date = Date.parse(dates.findtext('due'))
-
-            if fuzzy_due_date:
-                task.date_due = fuzzy_due_date
-            elif due_date:
-                task.date_due = due_date
-
-            fuzzy_start = dates.findtext('fuzzyStart')
-            start = dates.findtext('start')
-
-            if fuzzy_start:
-                task.date_start = Date(fuzzy_start)
-            elif start:
-                task.date_start = Date(start)
-
-            taglist = element.find('tags')
-
-            if taglist is not None:
-                for t in taglist.iter('tag'):
-                    try:
-                        tag = tag_store.get(UUID(t.text))
-                        task.add_tag(tag)
-                    except KeyError:
-                        pass
-
-            # Content
-            content_element = element.find('content')
-            assert content_element is not None, 'Content element not found in task '+str(tid)
-            content = content_element.text or ''
-            content = content.replace(']]&gt;', ']]>')
-            task.content = content
+        self.load_parsed((self.parse_xml(element)
+                          for element in xml.iter(self.XML_TAG)), tag_store)
 
-            self.add(task)
 
+    def load_parsed(self, parsed: Iterable[ParsedTask],
+                    tag_store: Optional[TagStore]) -> None:
+        """Add tasks returned by parse_xml(), then parent them.
+
+        Only the ids of the subtasks are kept until every task has been
+        added, so the elements themselves can be dropped while loading.
+        """
+
+        links: List[Tuple[UUID, List[UUID]]] = []
+
+        for task, tag_ids, subtask_ids in parsed:
+            for tag_id in tag_ids:
+                try:
+                    task.add_tag(tag_store.get(tag_id)) # type: ignore[union-attr]
+                except KeyError:
+                    pass
+
+            self.add(task)
             log.debug('Added %s', task)
 
+            if subtask_ids:
+                links.append((task.id, subtask_ids))
 
         # All tasks have been added, now we parent them
-        for element in elements:
-            parent_tid = id_to_uuid(element.get('id'))
-            subtasks = element.find('subtasks')
-            assert subtasks is not None, 'Subtasks element not found in task '+str(tid)
+        for parent_tid, subtask_ids in links:
+            for sub_tid in subtask_ids:
+                self.parent(sub_tid, parent_tid)
+
+
+    def parse_xml(self, element: _Element) -> ParsedTask:
+        """Build a task from its element, without adding it.
+
+        Returns the task along with the ids of its tags and subtasks,
+        which can only be resolved once every store is loaded.
+        """
+
+        return self.from_record(self.record_from_xml(element))
+
+
+    def record_from_xml(self, element: _Element) -> TaskRecord:
+        """Read the fields of a task element."""
+
+        raw_id = element.get('id')
+        tid = id_to_uuid(raw_id)
+        if str(tid) != raw_id:
+            log.warning('Task id %r is not a UUID, mapped to %s',
+                        raw_id, tid)
+        title_element = element.find('title')
+        assert title_element is not None, 'Title element not found for task '+str(tid)
+        assert title_element.text is not None, 'Title text not found for task '+str(tid)
+        title = title_element.text
+
+        # 0.6 wrote the dismissed status as 'Dismiss'; 0.7 renamed
+        # it to 'Dismissed'. Accept both so migrated files keep
+        # their dismissed tasks (#1308).
+        status = Status.ACTIVE
+        raw_status = element.get('status')
+
+        if raw_status == 'Done':
+            status = Status.DONE
+        elif raw_status in ('Dismissed', 'Dismiss'):
+            status = Status.DISMISSED
+
+        dates = element.find('dates')
+        assert dates is not None, 'Dates element not found in task '+str(tid)
+
+        modified_element = dates.find('modified')
+        assert modified_element is not None, 'Modified element not found in task '+str(tid)
+        assert modified_element.text is not None, 'Modified text not found in task '+str(tid)
+        modified = Date(datetime.datetime.fromisoformat(modified_element.text))
+
+        added_element = dates.find('added')
+        if added_element is not None and added_element.text:
+            added = Date(datetime.datetime.fromisoformat(added_element.text))
+        else:
+            # Stores written while a task had no added date -- e.g.
+            # after importing a CalDAV VTODO without a CREATED
+            # field, before the fill_task guard -- lack the <added>
+            # element or leave it empty. Refusing to load them makes
+            # GTG crash at startup (#1033): heal the task instead,
+            # falling back on the modification date parsed above,
+            # like the import side does.
+            log.warning('Task %s has no added date, falling back '
+                        'on the modification date', tid)
+            added = modified
+
+        closed: Optional[Date] = None
+        done_element = dates.find('done')
+        if done_element is not None and done_element.text is not None:
+            closed = Date.parse(done_element.text)
+        elif status is not Status.ACTIVE:
+            # A closed task without a closed date is invisible to
+            # the reaper: today minus no_date is -9999 days, never
+            # above any purge threshold (#1338). Files written by
+            # 0.7 lost the closed date of every dismissed task,
+            # since the serializer only wrote it for Done: heal
+            # them with the modification date, the same fallback
+            # the added date uses above.
+            log.warning('Closed task %s has no closed date, falling '
+                        'back on the modification date', tid)
+            closed = Date(str(modified)[:10])
+
+        due = (Date.parse(dates.findtext('fuzzyDue'))
+               or Date.parse(dates.findtext('due')))
+        start = Date(dates.findtext('fuzzyStart') or dates.findtext('start'))
+
+        taglist = element.find('tags')
+        tag_ids = []
+
+        if taglist is not None:
+            tag_ids = [UUID(t.text) for t in taglist.iter('tag')]
+
+        # Content
+        content_element = element.find('content')
+        assert content_element is not None, 'Content element not found in task '+str(tid)
+        content = content_element.text or ''
+        content = content.replace(']]&gt;', ']]>')
+
+        subtasks = element.find('subtasks')
+        assert subtasks is not None, 'Subtasks element not found in task '+str(tid)
+        subtask_ids = [id_to_uuid(sub.text) for sub in subtasks.findall('sub')]
+
+        return (tid, title, status, added, modified, closed, due, start,
+                content, tag_ids, subtask_ids)
+
+
+    @staticmethod
+    def record_from_task(task: Task) -> TaskRecord:
+        """Read the fields of a task, as record_from_xml would."""
+
+        closed = task.date_closed if task.status is not Status.ACTIVE else None
+
+        return (task.id, task.title, task.status, task.date_added,
+                task.date_modified, closed, task.date_due, task.date_start,
+                task.content, [t.id for t in task.tags],
+                [c.id for c in task.children])
+
+
+    @staticmethod
+    def from_record(record: TaskRecord) -> ParsedTask:
+        """Build a task from its fields, without adding it."""
+
+        (tid, title, status, added, modified, closed, due, start,
+         content, tag_ids, subtask_ids) = record
 
-            for sub in subtasks.findall('sub'):
-                self.parent(id_to_uuid(sub.text), parent_tid)
+        task = Task(id=tid, title=title)
+        task.date_modified = modified
+        task.date_added = added
+
+        # set_status() is avoided on purpose here, as it would
+        # overwrite date_closed with today and trigger the
+        # recurrence duplication logic.
+        if status is not Status.ACTIVE:
+            task.status = status
+            task.is_active = False
+
+        if closed is not None:
+            task.date_closed = closed
+
+        if due:
+            task.date_due = due
+
+        if start:
+            task.date_start = start
+
+        task.content = content
+
+        return task, tag_ids, subtask_ids
 
 
     def to_xml(self) -> _Element:
         """Serialize the taskstore into a lxml element."""
 
-        root = Element('tasklist')
+        # Callers get their own tree, parsed from the cached tasks
+        parser = XMLParser(remove_blank_text=True, strip_cdata=False)
+        return fromstring(self.serialize(), parser)
+
+
+    def serialize(self) -> bytes:
+        """Serialize the taskstore into the bytes of its lxml element.
+
+        The tasks are indented as in a data file, where the task list
+        sits right under the root (see Datastore.serialize). Only the
+        tasks which changed since the last call are serialized again,
+        the others are copied as they were.
+        """
+
+        if not self.lookup:
+            return b'<tasklist/>'
+
+        parts = [b'<tasklist>\n']
 
         for task in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
-            element.set('id', str(task.id))
-            element.set('status', task.status.value)
+            try:
+                data = self._xml_cache[task.id]
+            except KeyError:
+                element = self.item_to_xml(task)
+                indent(element, level=2)
+                data = self._xml_cache[task.id] = tostring(element)
+
+            parts.append(b'    ')
+            parts.append(data)
+            parts.append(b'\n')
+
+        parts.append(b'  </tasklist>')
+        return b''.join(parts)
+
 
-            title = SubElement(element, 'title')
-            title.text = task.title
+    def mark_dirty(self, task: Task) -> None:
+        """Have the next to_xml() serialize this task again.
 
-            tags = SubElement(element, 'tags')
+        Property notifications and tree changes do this on their own,
+        only call it after changing a task behind the store's back.
+        """
+
+        self._xml_cache.pop(task.id, None)
+
+
+    def is_dirty(self, task: Task) -> bool:
+        """Check whether a task changed since it was last serialized."""
+
+        return task.id not in self._xml_cache
+
+
+    def item_to_xml(self, item: Task) -> _Element:
+        """Serialize a single task into a lxml element."""
+
+        element = Element(self.XML_TAG)
+        element.set('id', str(item.id))
+        element.set('status', item.status.value)
+
+        title = SubElement(element, 'title')
+        title.text = item.title
 
-            for t in task.tags:
-                tag_tag = SubElement(tags, 'tag')
-                tag_tag.text = str(t.id)
+        tags = SubElement(element, 'tags')
 
-            dates = SubElement(element, 'dates')
+        for t in item.tags:
+            tag_tag = SubElement(tags, 'tag')
+            tag_tag.text = str(t.id)
 
-            added_date = SubElement(dates, 'added')
-            added_date.text = str(task.date_added)
+        dates = SubElement(element, 'dates')
 
-            modified_date = SubElement(dates, 'modified')
-            modified_date.text = str(task.date_modified)
+        added_date = SubElement(dates, 'added')
+        added_date.text = str(item.date_added)
 
-            if task.status is not Status.ACTIVE:
-                done_date = SubElement(dates, 'done')
-                done_date.text = str(task.date_closed)
+        modified_date = SubElement(dates, 'modified')
+        modified_date.text = str(item.date_modified)
 
-            if task.date_due:
-                due = SubElement(dates, 'due')
-                due.text = str(task.date_due)
+        if item.status is not Status.ACTIVE:
+            done_date = SubElement(dates, 'done')
+            done_date.text = str(item.date_closed)
 
-            if task.date_start:
-                start = SubElement(dates, 'start')
-                start.text = str(task.date_start)
+        if item.date_due:
+            due = SubElement(dates, 'due')
+            due.text = str(item.date_due)
 
-            subtasks = SubElement(element, 'subtasks')
+        if item.date_start:
+            start = SubElement(dates, 'start')
+            start.text = str(item.date_start)
 
-            for subtask in task.children:
-                sub = SubElement(subtasks, 'sub')
-                sub.text = str(subtask.id)
+        subtasks = SubElement(element, 'subtasks')
 
-            content = SubElement(element, 'content')
-            text = task.content
+        for subtask in item.children:
+            sub = SubElement(subtasks, 'sub')
+            sub.text = str(subtask.id)
 
-            # Poor man's encoding.
-            # CDATA's only poison is this combination of characters.
-            text = text.replace(']]>', ']]&gt;')
-            content.text = CDATA(text)
+        content = SubElement(element, 'content')
+        text = item.content
 
-        return root
+        # Poor man's encoding.
+        # CDATA's only poison is this combination of characters.
+        text = text.replace(']]>', ']]&gt;')
+        content.text = CDATA(text)
+
+        return element
 
 
     def add(self, item: Task, parent_id: Optional[UUID] = None) -> None:
@@ -1112,18 +1727,32 @@ class TaskStore(BaseStore[Task]):
 
         super().add(item, parent_id)
         item.duplicate_cb = self.duplicate_for_recurrent
+        self._index_tags(item)
+        self._index_text(item)
+
+        if item.parent is not None:
+            self.mark_dirty(item.parent)
         # notify::title matters as much as the others: the title is what
         # search filters on, and backends only learn a task changed
         # through this signal -- without it a rename never reaches them.
-        for event in ['notify::title', 'notify::is-actionable',
-                      'notify::is-active', 'tags-changed']:
-            item.connect(event,lambda *_: self.emit('task-filterably-changed',item))
+        for event in ['notify::title', 'notify::content',
+                      'notify::is-actionable', 'notify::is-active',
+                      'tags-changed']:
+            item.connect(event,lambda *_: self._emit('task-filterably-changed',item))
 
         # Date edits update the row labels through these notifies, but
         # nothing used to re-sort the lists (#1332): relay them so the
         # panes can ask their sort model to recompute.
         for event in ['notify::date-due-str', 'notify::date-start-str']:
-            item.connect(event, lambda *_: self.emit('task-sortably-changed', item))
+            item.connect(event, lambda *_: self._emit('task-sortably-changed', item))
+
+        item.connect('notify', self._relay_notify)
+        item.connect('tags-changed',
+                     lambda *_: self._emit('task-notify', item, 'tags'))
+
+
+    def _relay_notify(self, task: Task, pspec) -> None:
+        self._emit('task-notify', task, pspec.name)
 
 
     def unparent(self, item_id: UUID) -> None:
@@ -1138,21 +1767,96 @@ class TaskStore(BaseStore[Task]):
         # remove inline references to the former subtask
         old_parent.content = re.sub(r'\{\!\s*'+str(item_id)+r'\s*\!\}','',old_parent.content)
 
+        self.mark_dirty(item)
+        self.mark_dirty(old_parent)
+
+
+    def parent(self, item_id: UUID, parent_id: UUID) -> None:
+
+        super().parent(item_id, parent_id)
+
+        self.mark_dirty(self.lookup[item_id])
+        self.mark_dirty(self.lookup[parent_id])
+
+
+    def remove(self, item_id: UUID) -> None:
+
+        parent = self.lookup[item_id].parent
+
+        super().remove(item_id)
+
+        self._xml_cache.pop(item_id, None)
+        self._unindex_tags(item_id)
+        self.text_index.remove(item_id)
+
+        if parent is not None:
+            self.mark_dirty(parent)
+
+
+    def _index_tags(self, task: Task) -> None:
+        """Bring the tag index in line with the tags of a task."""
+
+        if self.lookup.get(task.id) is not task:
+            return
+
+        old = self._indexed_tags.get(task.id, set())
+        new = {tag.id for tag in task.tags}
+
+        if old == new:
+            return
+
+        for tag_id in old - new:
+            self.tag_index[tag_id].discard(task.id)
+
+        for tag_id in new - old:
+            self.tag_index.setdefault(tag_id, set()).add(task.id)
+
+        self._indexed_tags[task.id] = new
+
+
+    def _unindex_tags(self, task_id: UUID) -> None:
+        for tag_id in self._indexed_tags.pop(task_id, ()):
+            self.tag_index[tag_id].discard(task_id)
+
+
+    def _index_text(self, task: Task) -> None:
+        """Bring the text index in line with a task."""
+
+        if self.lookup.get(task.id) is not task:
+            return
+
+        # Subtask references are ids, not words
+        content = SUB_REGEX.sub('', task.content)
+        self.text_index.update(task.id, f'{task.title}\n{content}')
+
+
+    def with_tags(self, tags: Iterable[Tag]) -> Set[UUID]:
+        """Ids of the tasks carrying any of these tags themselves."""
+
+        ids: Set[UUID] = set()
+
+        for tag in tags:
+            ids |= self.tag_index.get(tag.id, set())
+
+        return ids
+
 
     def filter(self, filter_type: Filter, arg: Union[Tag,List[Tag],None] = None) -> List[Task]:
         """Filter tasks according to a filter type."""
 
         def filter_tag(tag: Tag) -> List[Task]:
-            """Filter tasks that only have a specific tag."""
+            """Filter tasks that have a tag or one of its ancestors.
+
+            A task matches when the tag is among the matching tags (see
+            Tag.get_matching_tags) of one of its own tags.
+            """
 
-            output = []
+            lineage = [tag]
 
-            for t in self.lookup.values():
-                tags = { matching_tag for own_tag in t.tags for matching_tag in own_tag.get_matching_tags() }
-                if tag in tags:
-                    output.append(t)
+            while lineage[-1].parent is not None:
+                lineage.append(lineage[-1].parent)
 
-            return output
+            return [self.lookup[tid] for tid in self.with_tags(lineage)]
 
 
         if filter_type == Filter.STATUS:
@@ -0,0 +1,120 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Full-text index for the search.
+
+Searching for a word used to scan the text of every task. The index maps
+every trigram (three consecutive characters) of the lowercased text of a
+task to the tasks containing it. A word can only appear in the tasks
+holding all of its trigrams, so only those few are scanned.
+"""
+
+from typing import Dict, Hashable, Set
+
+
+#: Length of the indexed substrings
+GRAM = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """All substrings of GRAM characters in a text."""
+
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TextIndex:
+    """Trigram index over lowercased texts, by key."""
+
+    def __init__(self) -> None:
+        #: Indexed text, by key
+        self.texts: Dict[Hashable, str] = {}
+
+        #: Keys whose text contains the trigram, by trigram
+        self.postings: Dict[str, Set[Hashable]] = {}
+
+        #: Bumped on every change, for callers caching search results
+        self.generation = 0
+
+
+    def update(self, key: Hashable, text: str) -> None:
+        """Index a text under a key, replacing what it had before."""
+
+        text = text.lower()
+        old = self.texts.get(key)
+
+        if old == text:
+            return
+
+        old_grams = trigrams(old) if old else set()
+        new_grams = trigrams(text)
+
+        for gram in old_grams - new_grams:
+            keys = self.postings[gram]
+            keys.discard(key)
+
+            if not keys:
+                del self.postings[gram]
+
+        for gram in new_grams - old_grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+        self.texts[key] = text
+        self.generation += 1
+
+
+    def remove(self, key: Hashable) -> None:
+        """Forget the text of a key."""
+
+        text = self.texts.pop(key, None)
+
+        if text is None:
+            return
+
+        for gram in trigrams(text):
+            keys = self.postings[gram]
+            keys.discard(key)
+
+            if not keys:
+                del self.postings[gram]
+
+        self.generation += 1
+
+
+    def search(self, word: str) -> Set[Hashable]:
+        """Keys whose text contains the word."""
+
+        word = word.lower()
+        grams = sorted(trigrams(word),
+                       key=lambda gram: len(self.postings.get(gram, ())))
+
+        if not grams:
+            # Too short to be indexed
+            candidates = self.texts.keys()
+        elif grams[0] not in self.postings:
+            return set()
+        else:
+            # Start from the rarest trigram
+            candidates = set(self.postings[grams[0]])
+
+            for gram in grams[1:]:
+                candidates &= self.postings[gram]
+
+                if not candidates:
+                    return set()
+
+        return {key for key in candidates if word in self.texts[key]}
@@ -132,6 +132,11 @@ class Application(Gtk.Application):
             self.timer = Timer(self.config)
             self.timer.connect('refresh', self.autoclean)
 
+            # Start dates make tasks actionable as days pass, which no
+            # task signal tells the cached actionable states nor the
+            # incrementally updated counts
+            self.timer.connect('refresh', lambda _: self.ds.new_day())
+
             self.preferences_dialog = Preferences(self)
             self.plugins_dialog = PluginsDialog(self.config_plugins)
 
@@ -675,7 +680,7 @@ class Application(Gtk.Application):
         """Callback when GTG is closed."""
 
         self.save_plugin_settings()
-        self.ds.save()
+        self.ds.flush()
 
         Gtk.Application.do_shutdown(self)
 
@@ -90,7 +90,7 @@ class BackendsDialog():
         @param data: same as widget, disregard the content
         """
         self.dialog.hide()
-        self.ds.save()
+        self.ds.schedule_save()
         return True
 
 ########################################
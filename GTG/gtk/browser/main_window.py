@@ -44,7 +44,7 @@ from GTG.gtk.browser.task_pane import TaskPane
 from GTG.gtk.editor.calendar import GTGCalendar
 from GTG.gtk.tag_completion import TagCompletion
 from GTG.core.dates import Date
-from GTG.core.tasks import Filter, Status, Task
+from GTG.core.tasks import Filter, PaneClassifier, Status, Task
 
 log = logging.getLogger(__name__)
 PANE_STACK_NAMES_MAP = {
@@ -120,6 +120,8 @@ class MainWindow(Gtk.ApplicationWindow):
         self.sidebar = Sidebar(app, app.ds, self)
         self.sidebar_vbox.append(self.sidebar)
 
+        self.pane_classifier = PaneClassifier(app.ds.tasks)
+
         self.panes: dict[str, TaskPane] = {
             'active': TaskPane(self, 'active'),
             'workview': TaskPane(self, 'workview'),
@@ -900,8 +902,8 @@ class MainWindow(Gtk.ApplicationWindow):
         pane = self.get_pane()
 
         for task in pane.get_selection():
+            # new() gives the subtask the tags of its parent
             new_task = self.app.ds.tasks.new(parent=task.id)
-            new_task.tags = task.tags
             self.app.open_task(new_task)
             pane.refresh()
 
@@ -110,7 +110,7 @@ class ModifyTagsDialog(Gtk.Dialog):
                 else:
                     task.remove_tag(_tag.name)
 
-        self.app.ds.save()
+        self.app.ds.schedule_save()
 
         # Rember the last actions
         self.last_tag_entry = self._tag_entry.get_text()
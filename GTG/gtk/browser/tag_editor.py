@@ -237,7 +237,10 @@ class TagEditor(Gtk.Dialog):
 
             self.tag.color = None
 
-        self.tag.actionable = self.tag_is_actionable
+        if self.tag.actionable != self.tag_is_actionable:
+            self.tag.actionable = self.tag_is_actionable
+            # Tasks with this tag may enter or leave the actionable pane
+            self.app.browser.refresh_all_views()
 
         if self.tag_name != self.tag.name:
             log.debug("Renaming %r → %r", self.tag.name, self.tag_name)
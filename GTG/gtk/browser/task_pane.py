@@ -18,6 +18,10 @@
 
 """Task pane and list."""
 
+from functools import lru_cache
+from typing import Any, Callable, Optional
+from uuid import UUID
+
 from gi.repository import Gtk, GObject, Gdk, Gio, GLib, Pango
 from GTG.core.tasks import Task, Status, FilteredTaskTreeManager
 from GTG.core.filters import TaskFilter
@@ -25,18 +29,81 @@ from GTG.core.sorters import (TaskAddedSorter, TaskClosedSorter, TaskDueSorter,
                               TaskModifiedSorter, TaskStartSorter,
                               TaskTagSorter, TaskTitleSorter)
 from GTG.gtk.browser.tag_pill import TagPill
+from GTG.gtk.browser.task_sort_model import TaskSortModel
 from gettext import gettext as _
 
 
-BIND_FLAGS = GObject.BindingFlags.DEFAULT | GObject.BindingFlags.SYNC_CREATE
+#: Changed tasks above which a pane sorts everything again rather than
+#: moving their rows one by one
+RESORT_ALL_THRESHOLD = 100
+
+#: Row values computed from a task, dropped when these properties change
+ROW_CACHE_KEYS = {
+    'content': 'excerpt',
+    'excerpt': 'excerpt',
+    'tags': 'tags',
+    'icons': 'tags',
+    'row-css': 'tags',
+    'tag-colors': 'tags',
+    'show-tag-colors': 'tags',
+}
+
+
+@lru_cache(maxsize=64)
+def row_css_provider(css: str) -> Gtk.CssProvider:
+    """CSS provider for row backgrounds, shared by rows with the same CSS.
+
+    Parsing CSS is costly, but only the colors in use recently are kept.
+    """
+
+    provider = Gtk.CssProvider()
+    provider.load_from_data(str.encode(css))
+    return provider
+
+
+def excerpt_labels(task: Task) -> tuple[str, str]:
+    """Tooltip and one line label of a task excerpt."""
+
+    excerpt = task.excerpt
+    return excerpt, ' '.join(excerpt.splitlines())
+
+
+def tag_looks(task: Task) -> tuple[str, Optional[str], str, bool]:
+    """Icons, row CSS and tag colors a task gets from its tags."""
+
+    return task.icons, task.row_css, task.tag_colors, task.show_tag_colors
+
 
 class TaskBox(Gtk.Box):
     """Box subclass to keep a pointer to the tag object"""
 
     task = GObject.Property(type=Task)
 
-    def __init__(self, config, is_actionable=False):
+    #: Methods refreshing the widgets that show a task property
+    UPDATES = {
+        'has-children': '_show_children',
+        'title': '_show_title',
+        'content': '_show_excerpt',
+        'excerpt': '_show_excerpt',
+        'is-recurring': '_show_recurring',
+        'has-date-due': '_show_due',
+        'date-due-str': '_show_due',
+        'has-date-start': '_show_start',
+        'date-start-str': '_show_start',
+        'is-active': '_show_active',
+        'icons': '_show_icons',
+        'row-css': '_show_row_css',
+        'tag-colors': '_show_tag_colors',
+        'show-tag-colors': '_show_tag_colors',
+    }
+
+    SHOW_ALL = tuple(dict.fromkeys(UPDATES.values()))
+
+    def __init__(self, config, is_actionable=False, show_start=False,
+                 cache: Optional[dict[UUID, dict[str, Any]]] = None):
         self.config = config
+        #: Row values by task id, shared by the rows of a pane
+        self.cache = {} if cache is None else cache
         super().__init__(valign=Gtk.Align.CENTER)
 
         self.add_css_class('task-box')
@@ -53,6 +120,19 @@ class TaskBox(Gtk.Box):
         self.append(self.check)
 
         self.is_actionable = is_actionable
+        self.show_start = show_start
+
+        # Widgets filled by the pane's setup callback
+        self.label = self.description = None
+        self.recurring_icon = self.due_icon = self.due = None
+        self.start_icon = self.start = None
+        self.color = self.icons = None
+
+        #: Tells whether a task has children left by the filter
+        self.has_matching_children = lambda task: True
+
+        self._provider = None
+        self._css = None
 
         self._apply_config()
 
@@ -63,6 +143,95 @@ class TaskBox(Gtk.Box):
         else:
             self.remove_css_class('compact-mode')
 
+        if self.description is not None:
+            preview = self.config.get('contents_preview_enable')
+            self.description.set_visible(preview)
+            self.description.set_hexpand(preview)
+            self.label.set_hexpand(not preview)
+
+
+    def bind_task(self, task: Task) -> None:
+        """Show a task.
+
+        Rows are recycled while scrolling, so this only retargets the
+        widgets built once in setup: no binding or closure per row. The
+        pane tells the row about changes of its task (see show_change).
+        """
+
+        self.props.task = task
+
+        for method in self.SHOW_ALL:
+            getattr(self, method)(task)
+
+
+    def show_change(self, task: Task, name: str) -> None:
+        """Update the widgets showing a task property that changed."""
+
+        method = self.UPDATES.get(name)
+
+        if method is not None:
+            getattr(self, method)(task)
+
+
+    def _cached(self, task: Task, key: str, compute: Callable[[Task], Any]):
+        values = self.cache.setdefault(task.id, {})
+
+        try:
+            return values[key]
+        except KeyError:
+            value = values[key] = compute(task)
+            return value
+
+
+    def _show_children(self, task: Task) -> None:
+        self.expander.set_hide_expander(not self.has_matching_children(task))
+
+
+    def _show_title(self, task: Task) -> None:
+        self.label.set_label(task.title)
+
+
+    def _show_excerpt(self, task: Task) -> None:
+        tooltip, label = self._cached(task, 'excerpt', excerpt_labels)
+        self.set_tooltip_text(tooltip)
+        self.description.set_label(label)
+
+
+    def _show_recurring(self, task: Task) -> None:
+        self.recurring_icon.set_visible(task.is_recurring)
+
+
+    def _show_due(self, task: Task) -> None:
+        self.due_icon.set_visible(task.has_date_due)
+        self.due.set_label(task.date_due_str)
+
+
+    def _show_start(self, task: Task) -> None:
+        start = task.date_start_str
+        self.start_icon.set_visible(self.show_start and task.has_date_start)
+        self.start.set_label(start)
+        self.start.set_visible(self.show_start and bool(start))
+
+
+    def _show_active(self, task: Task) -> None:
+        self.props.is_active = task.is_active
+
+
+    def _show_icons(self, task: Task) -> None:
+        icons = self._cached(task, 'tags', tag_looks)[0]
+        self.icons.set_label(icons)
+        self.icons.set_visible(bool(icons))
+
+
+    def _show_row_css(self, task: Task) -> None:
+        self.props.row_css = self._cached(task, 'tags', tag_looks)[1]
+
+
+    def _show_tag_colors(self, task: Task) -> None:
+        looks = self._cached(task, 'tags', tag_looks)
+        self.color.props.color_list = looks[2]
+        self.color.set_visible(looks[3])
+
 
     @GObject.Property(type=bool, default=True)
     def has_children(self) -> None:
@@ -96,21 +265,25 @@ class TaskBox(Gtk.Box):
 
     @row_css.setter
     def set_row_css(self, value) -> None:
-        show = self.config.get('bg_color_enable')
+        if not self.config.get('bg_color_enable'):
+            value = None
+
+        if value == self._css:
+            return
+
         context = self.get_style_context()
 
-        if not value or not show:
-            try:
-                context.remove_provider(self.provider)
-                return
-            except AttributeError:
-                return
+        if self._provider is not None:
+            context.remove_provider(self._provider)
+            self._provider = None
+
+        self._css = value
 
-        val = str.encode(value)
+        if not value:
+            return
 
-        self.provider = Gtk.CssProvider()
-        self.provider.load_from_data(val)
-        context.add_provider(self.provider, Gtk.STYLE_PROVIDER_PRIORITY_USER)
+        self._provider = row_css_provider(value)
+        context.add_provider(self._provider, Gtk.STYLE_PROVIDER_PRIORITY_USER)
 
 
 def unwrap(row, expected_type):
@@ -178,24 +351,39 @@ class TaskPane(Gtk.ScrolledWindow):
         # Task List
         # -------------------------------------------------------------------------------
 
-        self.task_filter = TaskFilter(self.app.ds, pane)
-        self.filter_manager = FilteredTaskTreeManager(self.app.ds.tasks,self.task_filter)
+        # The panes share one classifier, and only the pane on screen
+        # keeps its models up to date: the others catch up when shown.
+        classifier = browser.pane_classifier
+        self.task_filter = TaskFilter(self.app.ds, pane, classifier)
+        # A search sets both the pane and the query: refilter once for both
+        self.filter_manager = FilteredTaskTreeManager(self.app.ds.tasks,self.task_filter,
+                                                      defer_refilter=True,
+                                                      classifier=classifier)
+        self.filter_manager.suspend()
+        self.connect('map', self.on_map)
+        self.connect('unmap', lambda *_: self.filter_manager.suspend())
         self.filtered = self.filter_manager.get_tree_model()
 
-        self.sort_model = Gtk.TreeListRowSorter()
-        self.sort_model.set_sorter(TaskTitleSorter())
-
-        self.main_sorter = Gtk.SortListModel()
-        self.main_sorter.set_model(self.filtered)
-        self.main_sorter.set_sorter(self.sort_model)
+        self.main_sorter = TaskSortModel(self.filtered, TaskTitleSorter())
 
         # A task edit that changes a date or the title updates the row
         # in place but used to leave it at its old position (#1332):
-        # ask the sorter to recompute when the store reports a change.
+        # move the row when the store reports a change. The changes of
+        # one main loop iteration are handled at once, and hidden panes
+        # sort everything again when shown.
+        self._resort_tasks: set[Task] = set()
+        self._resort_all = False
+
         for signal in ('task-filterably-changed', 'task-sortably-changed'):
-            self.app.ds.tasks.connect(
-                signal,
-                lambda *_: self.sort_model.changed(Gtk.SorterChange.DIFFERENT))
+            self.app.ds.tasks.connect(signal, self._queue_resort)
+        self.app.ds.tasks.connect('removed', self._forget_removed)
+
+        # Rows shown by task id, told about the changes of their task by
+        # one handler, and values they computed for each task
+        self._rows: dict[UUID, TaskBox] = {}
+        self._row_cache: dict[UUID, dict[str, Any]] = {}
+        self.app.ds.tasks.connect('task-notify', self._on_task_notify)
+        self.app.ds.tasks.connect('batch-changed', self._queue_batch_resort)
 
         self.task_selection = Gtk.MultiSelection.new(self.main_sorter)
 
@@ -288,10 +476,92 @@ class TaskPane(Gtk.ScrolledWindow):
         self.set_title()
 
 
+    def on_map(self, widget) -> None:
+        """Catch up with the changes made while hidden."""
+
+        self.filter_manager.resume()
+
+        if self._resort_all:
+            self._resort_all = False
+            self._forget_sort_keys()
+            self.main_sorter.resort()
+
+
+    def _queue_resort(self, store, task: Task) -> None:
+        self._forget_sort_keys(task)
+
+        if not self.get_mapped():
+            self._resort_all = True
+            return
+
+        if not self._resort_tasks:
+            GLib.idle_add(self._resort)
+
+        self._resort_tasks.add(task)
+
+
+    def _queue_batch_resort(self, store, batch) -> None:
+        for task in batch.items.values():
+            if task.id in store.lookup:
+                self._queue_resort(store, task)
+            else:
+                self._forget_removed(store, task)
+
+
+    def _forget_removed(self, store, task: Task) -> None:
+        """Drop what is cached for a task deleted from the store."""
+
+        self._forget_sort_keys(task)
+        self._row_cache.pop(task.id, None)
+
+
+    def _on_task_notify(self, store, task: Task, name: str) -> None:
+        key = ROW_CACHE_KEYS.get(name)
+
+        if key is not None:
+            self._row_cache.get(task.id, {}).pop(key, None)
+
+        row = self._rows.get(task.id)
+
+        if row is not None:
+            row.show_change(task, name)
+
+
+    def _forget_sort_keys(self, task: Optional[Task] = None) -> None:
+        """Drop the cached sort keys of a task, or of all of them."""
+
+        sorter = self.main_sorter.get_sorter()
+
+        if task is None:
+            sorter.clear()
+        else:
+            sorter.forget(task)
+
+
+    def _resort(self) -> bool:
+        """Move the rows of the changed tasks shown in the pane."""
+
+        tasks, self._resort_tasks = self._resort_tasks, set()
+
+        if len(tasks) > RESORT_ALL_THRESHOLD:
+            self.main_sorter.resort()
+            return GLib.SOURCE_REMOVE
+
+        # Tasks this pane filters out or hides under a collapsed parent
+        # have no row, and cost nothing
+        rows = [self.filter_manager.row_of(task) for task in tasks]
+        self.main_sorter.reposition(row for row in rows if row is not None)
+        return GLib.SOURCE_REMOVE
+
+
     def refresh(self):
         """Refresh the task filter"""
 
+        self.browser.pane_classifier.clear()
         self.task_filter.changed(Gtk.FilterChange.DIFFERENT)
+        # Fuzzy dates are relative to today
+        self._forget_sort_keys()
+        self.main_sorter.resort()
         self.main_sorter.items_changed(0,0,0)
 
 
@@ -315,13 +585,14 @@ class TaskPane(Gtk.ScrolledWindow):
         elif method == 'Title':
             sorter = TaskTitleSorter()
 
-        self.sort_model.set_sorter(sorter)
+        if sorter is not None:
+            self.main_sorter.set_sorter(sorter)
 
 
     def set_sort_order(self, reverse: bool) -> None:
         """Set order for the sorter."""
 
-        self.sort_model.get_sorter().reverse = reverse
+        self.main_sorter.get_sorter().reverse = reverse
 
 
     def on_listview_activated(self, listview, position, user_data = None):
@@ -461,7 +732,8 @@ class TaskPane(Gtk.ScrolledWindow):
     def task_setup_cb(self, factory, listitem, user_data=None):
         """Setup widgets for rows"""
 
-        box = TaskBox(self.app.config, self.pane == 'workview')
+        box = TaskBox(self.app.config, self.pane == 'workview',
+                      self.pane == 'active', self._row_cache)
         label = Gtk.Label()
         description = Gtk.Label()
         separator = Gtk.Separator()
@@ -535,6 +807,20 @@ class TaskPane(Gtk.ScrolledWindow):
         self.connect('collapse-all',
                      lambda s: box.expander.activate_action('listitem.collapse'))
 
+        # Handlers for the task shown, whichever it is when they run
+        arrow_press = Gtk.GestureClick()
+        arrow_press.set_propagation_phase(Gtk.PropagationPhase.CAPTURE)
+        arrow_press.connect('pressed', lambda gesture, n, x, y:
+                            self._on_expander_pressed(gesture, n, x, y,
+                                                      box.props.task))
+        box.expander.add_controller(arrow_press)
+
+        box.check_handler = box.check.connect(
+            'toggled', lambda button:
+            self.on_checkbox_toggled(button, box.props.task))
+
+        box.has_matching_children = self.filter_manager.has_matching_children
+
         box.append(label)
         box.append(description)
         box.append(recurring_icon)
@@ -545,6 +831,18 @@ class TaskPane(Gtk.ScrolledWindow):
         box.append(separator)
         box.append(color)
         box.append(icons)
+
+        box.label = label
+        box.description = description
+        box.recurring_icon = recurring_icon
+        box.due_icon = due_icon
+        box.due = due
+        box.start_icon = start_icon
+        box.start = start
+        box.color = color
+        box.icons = icons
+        box._apply_config()
+
         listitem.set_child(box)
 
 
@@ -552,88 +850,28 @@ class TaskPane(Gtk.ScrolledWindow):
         """Bind values to the widgets in setup_cb"""
 
         box = listitem.get_child()
-        expander = box.get_first_child()
-        check = expander.get_next_sibling()
-        label = check.get_next_sibling()
-        description = label.get_next_sibling()
-        recurring_icon = description.get_next_sibling()
-        due_icon = recurring_icon.get_next_sibling()
-        due = due_icon.get_next_sibling()
-        start_icon = due.get_next_sibling()
-        start = start_icon.get_next_sibling()
-        separator = start.get_next_sibling()
-        color = separator.get_next_sibling()
-        icons = color.get_next_sibling()
-
         item = unwrap(listitem, Task)
-
-        box.props.task = item
         row = listitem.get_item()
+
         box.expander.set_list_row(row)
-        arrow_press = Gtk.GestureClick()
-        arrow_press.set_propagation_phase(Gtk.PropagationPhase.CAPTURE)
-        arrow_press.connect('pressed', self._on_expander_pressed, item)
-        box.expander.add_controller(arrow_press)
-        listitem.arrow_gesture = arrow_press
+        box.bind_task(item)
+        self._rows[item.id] = box
+
         listitem.expanded_handler = row.connect(
             'notify::expanded', self._on_row_expanded_changed, item)
 
-        config = self.app.config
-
-        def not_empty(binding, value, user_data=None):
-            return len(value) > 0
-
-        def show_start(binding, value, user_data=None):
-            return value and self.pane == 'active'
-
-
-        listitem.bindings = [
-            item.bind_property('has_children', box, 'has_children', BIND_FLAGS),
-            item.bind_property('has_children', expander, 'hide-expander', BIND_FLAGS
-                               ,lambda _,x: not self.filter_manager.has_matching_children(item)),
-
-            item.bind_property('title', label, 'label', BIND_FLAGS),
-            item.bind_property('excerpt', box, 'tooltip-text', BIND_FLAGS),
-            item.bind_property('excerpt', description, 'label', BIND_FLAGS
-                                          ,lambda _,x: " ".join(x.splitlines())),
-            config.bind_property('last_updated',description,'visible',BIND_FLAGS
-                                          ,lambda _,x: config.get('contents_preview_enable') ),
-            config.bind_property('last_updated',label,'hexpand',BIND_FLAGS
-                                          ,lambda _,x: not config.get('contents_preview_enable') ),
-            config.bind_property('last_updated',description,'hexpand',BIND_FLAGS
-                                          ,lambda _,x: config.get('contents_preview_enable') ),
-
-            item.bind_property('is_recurring', recurring_icon, 'visible', BIND_FLAGS),
-
-            item.bind_property('has_date_due', due_icon, 'visible', BIND_FLAGS),
-            item.bind_property('has_date_start', start_icon, 'visible', BIND_FLAGS, show_start),
-
-            item.bind_property('date_due_str', due, 'label', BIND_FLAGS),
-            item.bind_property('date_start_str', start, 'label', BIND_FLAGS),
-            item.bind_property('date_start_str', start, 'visible', BIND_FLAGS, show_start),
-
-            item.bind_property('is_active', box, 'is_active', BIND_FLAGS),
-            item.bind_property('icons', icons, 'label', BIND_FLAGS),
-            item.bind_property('icons', icons, 'visible', BIND_FLAGS, not_empty),
-            item.bind_property('row_css', box, 'row_css', BIND_FLAGS),
-
-            item.bind_property('tag_colors', color, 'color_list', BIND_FLAGS),
-            item.bind_property('show_tag_colors', color, 'visible', BIND_FLAGS),
-        ]
-
-        box.check.set_active(item.status == Status.DONE)
-        box.check.connect('toggled', self.on_checkbox_toggled, item)
+        with box.check.handler_block(box.check_handler):
+            box.check.set_active(item.status == Status.DONE)
 
 
     def task_unbind_cb(self, factory, listitem, user_data=None):
         """Clean up bindings made in task_bind_cb"""
-        for binding in listitem.bindings:
-            binding.unbind()
-        listitem.bindings.clear()
-        listitem.get_item().disconnect(listitem.expanded_handler)
+
         box = listitem.get_child()
-        box.expander.remove_controller(listitem.arrow_gesture)
-        box.check.disconnect_by_func(self.on_checkbox_toggled)
+        listitem.get_item().disconnect(listitem.expanded_handler)
+
+        if self._rows.get(box.props.task.id) is box:
+            del self._rows[box.props.task.id]
 
 
     def drag_prepare(self, source, x, y):
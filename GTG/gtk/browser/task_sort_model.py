@@ -0,0 +1,283 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) - The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Sorted list of the rows of a task tree."""
+
+from typing import Iterable, Optional
+
+from gi.repository import Gio, GObject, Gtk
+
+from GTG.core.sorters import ReversibleSorter, unwrap
+from GTG.core.tasks import Task
+
+
+class Descending:
+    """Sort key ordering the key it wraps backwards."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key) -> None:
+        self.key = key
+
+
+    def __eq__(self, other) -> bool:
+        return self.key == other.key
+
+
+    def __lt__(self, other) -> bool:
+        return other.key < self.key
+
+
+class TaskSortModel(GObject.Object, Gio.ListModel):
+    """Rows of a task tree model, sorted by a task sorter.
+
+    The rows come in the order a Gtk.SortListModel with a
+    Gtk.TreeListRowSorter gives them: subtasks right after their parent,
+    siblings in the order of the sorter. Each row is sorted by its path,
+    the keys of the tasks from its top level ancestor down to its own.
+
+    A task edit used to sort the whole list again. Given the row of the
+    changed task, reposition() only takes it out, with the rows of its
+    expanded subtasks, and puts them back where the task now belongs,
+    found by binary search on the keys the sorter caches. Views are told
+    about the two positions, not about the rows in between.
+    """
+
+    __gtype_name__ = 'TaskSortModel'
+
+
+    def __init__(self, model: Gio.ListModel,
+                 sorter: ReversibleSorter) -> None:
+        super().__init__()
+
+        self._model = model
+        self._sorter = sorter
+        self._sorter_handler = sorter.connect('changed', self._on_sorter_changed)
+
+        #: Rows of the model in its own order, to know which ones it drops
+        self._source = [model.get_item(i) for i in range(model.get_n_items())]
+        self._rows = sorted(self._source, key=self._path)
+
+        model.connect('items-changed', self._on_items_changed)
+
+
+    def do_get_item_type(self):
+        return Gtk.TreeListRow
+
+
+    def do_get_n_items(self) -> int:
+        return len(self._rows)
+
+
+    def do_get_item(self, position: int) -> Optional[Gtk.TreeListRow]:
+        if position < len(self._rows):
+            return self._rows[position]
+
+        return None
+
+
+    def get_sorter(self) -> ReversibleSorter:
+        return self._sorter
+
+
+    def set_sorter(self, sorter: ReversibleSorter) -> None:
+        """Sort the rows with another sorter."""
+
+        self._sorter.disconnect(self._sorter_handler)
+        self._sorter = sorter
+        self._sorter_handler = sorter.connect('changed', self._on_sorter_changed)
+        self.resort()
+
+
+    def resort(self) -> None:
+        """Sort all the rows again, e.g. once many tasks changed."""
+
+        self._rows.sort(key=self._path)
+        count = len(self._rows)
+
+        if count:
+            self.items_changed(0, count, count)
+
+
+    def reposition(self, rows: Iterable[Gtk.TreeListRow]) -> None:
+        """Move rows of changed tasks, with their subtasks, in place.
+
+        The sorter must have forgotten the keys of these tasks already.
+        Rows which aren't in the model are skipped.
+        """
+
+        rows = sorted(rows, key=lambda row: row.get_depth())
+
+        # The others are in order: a row can stay if its neighbors agree
+        if len(rows) == 1:
+            start, end = self._extent(rows[0])
+
+            if start is None or self._in_place(start, end):
+                return
+
+        blocks = []
+
+        # Parents first: a changed subtask of a changed task moves along
+        for row in rows:
+            start, end = self._extent(row)
+
+            if start is None:
+                continue
+
+            blocks.append(self._rows[start:end])
+            del self._rows[start:end]
+            self.items_changed(start, end - start, 0)
+
+        for block in blocks:
+            # Changed subtasks may go elsewhere among their siblings
+            block.sort(key=self._path)
+            position = self._bisect(self._path(block[0]))
+            self._rows[position:position] = block
+            self.items_changed(position, 0, len(block))
+
+
+    def _path(self, row: Gtk.TreeListRow) -> tuple:
+        """Sort key of a row, made of the keys of its task and ancestors."""
+
+        keys = []
+
+        while row is not None:
+            keys.append(self._sorter.key_of(unwrap(row, Task)))
+            row = row.get_parent()
+
+        keys.reverse()
+
+        # Siblings go backwards, subtasks still after their parent
+        if self._sorter.reverse:
+            return tuple(Descending(key) for key in keys)
+
+        return tuple(keys)
+
+
+    def _extent(self, row: Gtk.TreeListRow):
+        """Positions of a row and after its last shown subtask."""
+
+        try:
+            start = self._rows.index(row)
+        except ValueError:
+            return None, None
+
+        depth = row.get_depth()
+        end = start + 1
+
+        while end < len(self._rows) and self._rows[end].get_depth() > depth:
+            end += 1
+
+        return start, end
+
+
+    def _in_place(self, start: int, end: int) -> bool:
+        """Whether the rows around a block still come before and after it."""
+
+        path = self._path(self._rows[start])
+
+        if start > 0 and not self._path(self._rows[start - 1]) < path:
+            return False
+
+        return end == len(self._rows) or path < self._path(self._rows[end])
+
+
+    def _bisect(self, path: tuple, low: int = 0) -> int:
+        """Position of the first row sorting after a path."""
+
+        high = len(self._rows)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._path(self._rows[middle]) < path:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+    def _on_sorter_changed(self, sorter, change) -> None:
+        self.resort()
+
+
+    def _on_items_changed(self, model, position, removed, added) -> None:
+        gone = self._source[position:position + removed]
+        new = [model.get_item(i) for i in range(position, position + added)]
+        self._source[position:position + removed] = new
+
+        # Sorting everything is cheaper than inserting most of the rows
+        if added > len(self._source) // 2:
+            count = len(self._rows)
+            self._rows = sorted(self._source, key=self._path)
+            self.items_changed(0, count, len(self._rows))
+            return
+
+        self._remove(gone)
+        self._insert(new)
+
+
+    def _remove(self, rows: list) -> None:
+        """Drop rows, telling views about each run of them."""
+
+        if not rows:
+            return
+
+        gone = set(rows)
+        positions = [i for i, row in enumerate(self._rows) if row in gone]
+
+        # From the end, so the positions left stay right
+        end = len(positions)
+
+        while end > 0:
+            start = end - 1
+
+            while start > 0 and positions[start - 1] == positions[start] - 1:
+                start -= 1
+
+            first = positions[start]
+            del self._rows[first:first + end - start]
+            self.items_changed(first, end - start, 0)
+            end = start
+
+
+    def _insert(self, rows: list) -> None:
+        """Add rows where they belong, telling views about each run."""
+
+        rows = sorted(rows, key=self._path)
+        index = 0
+        position = 0
+
+        while index < len(rows):
+            position = self._bisect(self._path(rows[index]), position)
+            last = index + 1
+
+            # Rows sorting before the same one go in at once
+            if position < len(self._rows):
+                following = self._path(self._rows[position])
+
+                while last < len(rows) and self._path(rows[last]) < following:
+                    last += 1
+            else:
+                last = len(rows)
+
+            self._rows[position:position] = rows[index:last]
+            self.items_changed(position, 0, last - index)
+            position += last - index
+            index = last
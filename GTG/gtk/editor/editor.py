@@ -173,6 +173,9 @@ class TaskEditor(Gtk.Window):
         self._removed_handler = self.ds.tasks.connect(
             'removed', self._on_task_removed
         )
+        self._batch_handler = self.ds.tasks.connect(
+            'batch-changed', self._on_tasks_batch_changed
+        )
 
         # Connect search field to tags popup
         self.tags_tree.set_search_entry(self.tags_entry)
@@ -750,6 +753,12 @@ class TaskEditor(Gtk.Window):
         if removed_task.id in self.textview.subtasks['tags']:
             self.textview.process()
 
+    def _on_tasks_batch_changed(self, store, batch):
+        """Refresh textview if a batch removed subtasks of this task."""
+        if any(tid in self.textview.subtasks['tags']
+               for tid in batch.get('removed')):
+            self.textview.process()
+
     def rename_subtask(self, tid, new_title):
         """Rename a subtask of this task."""
 
@@ -782,7 +791,10 @@ class TaskEditor(Gtk.Window):
 
         if not parent:
             parent = self.ds.tasks.new()
-            parent.tags = self.task.tags
+
+            for tag in self.task.tags:
+                parent.add_tag(tag)
+
             self.app.ds.tasks.parent(self.task.id, parent.id)
 
             self.app.open_task(parent)
@@ -820,7 +832,7 @@ class TaskEditor(Gtk.Window):
         t = self.app.ds.tasks.get(self.task.id)
         t.title = self.textview.get_title()
         t.content = self.textview.get_text()
-        self.app.ds.save()
+        self.app.ds.schedule_save()
 
         if self.task_config is not None:
             self.task_config.save()
@@ -892,6 +904,7 @@ class TaskEditor(Gtk.Window):
 
         # Disconnect the task-removed signal handler
         self.ds.tasks.disconnect(self._removed_handler)
+        self.ds.tasks.disconnect(self._batch_handler)
 
         # self.pengine.onTaskClose(self.plugin_api)
         # self.pengine.remove_api(self.plugin_api)
@@ -144,6 +144,13 @@ class HamsterPlugin():
         """ Stop tracking a deleted task if it is being tracked """
         self.stop_task(task.id)
 
+    def on_tasks_batch_changed(self, store, batch):
+        """ Stop tracking a task deleted or closed in a batch """
+        for task in batch.get('removed').values():
+            self.on_task_deleted(store, task)
+        for task in batch.get('task-filterably-changed').values():
+            self.on_task_modified(store, task)
+
     def on_task_modified(self, store, task):
         """ Stop task if it is tracked and it is Done/Dismissed """
         if task.status in (Status.DISMISSED, Status.DONE):
@@ -175,6 +182,8 @@ class HamsterPlugin():
             plugin_api.ds.tasks.connect('task-filterably-changed',
                                         self.on_task_modified),
             plugin_api.ds.tasks.connect('removed', self.on_task_deleted),
+            plugin_api.ds.tasks.connect('batch-changed',
+                                        self.on_tasks_batch_changed),
         ]
 
         # set up preferences
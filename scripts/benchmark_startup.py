@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Measure how long loading the data file takes.
+
+For each task count given (1000, 10000 and 50000 by default), write a
+data file with that many tasks, then time loading it from the XML file
+and from its binary cache. Run it from the source tree:
+
+    ./scripts/benchmark_startup.py [COUNT ...]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import gi
+gi.require_version('Gdk', '4.0')
+gi.require_version('Gtk', '4.0')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GTG.core.datastore import Datastore  # noqa: E402
+from GTG.core.dates import Date  # noqa: E402
+
+
+ROUNDS = 3
+
+
+def generate(path: str, count: int) -> None:
+    """Write a data file holding count tasks."""
+
+    rand = random.Random(count)
+    ds = Datastore()
+    ds.data_path = path
+    tags = [ds.tags.new(f'tag{i}') for i in range(max(1, count // 50))]
+    now = datetime.now()
+
+    for i in range(count):
+        parents = ds.tasks.data
+        parent = None
+
+        # A quarter of the tasks are subtasks
+        if parents and rand.random() < 0.25:
+            parent = rand.choice(parents).id
+
+        task = ds.tasks.new(f'Task number {i}', parent)
+        task.content = f'Notes for task {i}\n' * rand.randint(0, 5)
+
+        for tag in rand.sample(tags, min(len(tags), rand.randint(0, 3))):
+            task.add_tag(tag)
+
+        if rand.random() < 0.5:
+            task.date_due = Date(now + timedelta(days=rand.randint(0, 90)))
+
+        if rand.random() < 0.3:
+            task.toggle_active()
+
+    ds.save(compact=True)
+
+
+def measure(load) -> float:
+    """Best time of a few rounds, in milliseconds."""
+
+    best = float('inf')
+
+    for _ in range(ROUNDS):
+        ds = Datastore()
+        start = perf_counter()
+        assert load(ds) is not False, 'Loading failed'
+        best = min(best, perf_counter() - start)
+
+    return best * 1000
+
+
+def main(counts) -> None:
+    print(f'{"tasks":>8} {"xml (ms)":>10} {"cache (ms)":>11} '
+          f'{"xml (KiB)":>10} {"cache (KiB)":>12}')
+
+    for count in counts:
+        root = tempfile.mkdtemp()
+        path = os.path.join(root, 'gtg_data.xml')
+
+        try:
+            generate(path, count)
+            xml_time = measure(lambda ds: ds.load_file(path))
+            cache_time = measure(lambda ds: ds.load_cache(path))
+            xml_size = os.path.getsize(path) // 1024
+            cache_size = os.path.getsize(path + '.cache') // 1024
+        finally:
+            shutil.rmtree(root)
+
+        print(f'{count:>8} {xml_time:>10.0f} {cache_time:>11.0f} '
+              f'{xml_size:>10} {cache_size:>12}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -1,5 +1,7 @@
 import re
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 from unittest import TestCase
 from uuid import uuid4
@@ -11,7 +13,9 @@ from GTG.backends.backend_caldav import (CATEGORIES, CHILDREN_FIELD,
                                          Recurrence,
                                          DAV_IGNORE, PARENT_FIELD, UID_FIELD,
                                          Backend, DueDateField, SORT_ORDER,
+                                         ThreadSessions,
                                          Translator, uid_to_task_id)
+from GTG.backends.caldav_sync import CollectionChanges
 from GTG.core.datastore import Datastore
 from GTG.core.dates import LOCAL_TIMEZONE, Date
 from GTG.core.tasks import Task, Status
@@ -906,3 +910,227 @@ class ServerSideSubtaskDeletionTest(TestCase):
         self.assertNotIn(child_id, backend.datastore.tasks.lookup,
                          'a subtask deleted on the server must not '
                          'survive the next import')
+
+
+class StoredTodosTest(TestCase):
+    """The todos stored by the last session are restored, not downloaded,
+    as long as their etag did not change."""
+
+    URL = 'https://dav.example.com/tasks/'
+    ROOT_KEY = '/tasks/root.ics'
+
+    def setUp(self):
+        parameters = {'pid': 'test', 'service-url': 'unittest',
+                      'username': 'u', 'password': 'p', 'period': 1,
+                      'is-first-run': False}
+        self.backend = Backend(parameters)
+        self.backend.datastore = Datastore()
+        self.backend._dav_client = Mock()
+        self.calendar = Mock()
+        self.calendar.name, self.calendar.url = 'My Calendar', self.URL
+        self.tid = str(uid_to_task_id('ROOT'))
+        self.backend._stored_todos = {self.URL: {self.ROOT_KEY: {
+            'tid': self.tid, 'etag': '"1"', 'fields': ('ROOT', None, 'None'),
+            'data': ('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:test\r\n'
+                     + VTODO_ROOT + 'END:VCALENDAR\r\n')}}}
+
+    def test_unchanged_todo_is_restored(self):
+        changes = CollectionChanges(set(), set(), {'etags': {
+            self.ROOT_KEY: '"1"', '/tasks/new.ics': '"5"'}})
+
+        orphans = self.backend._restore_todos(self.calendar, changes)
+
+        todo = self.backend._cache.get_todo(self.tid)
+        self.assertEqual([todo], orphans, 'no task yet: to be imported')
+        self.assertEqual({'/tasks/new.ics'}, changes.changed)
+        self.assertEqual(('ROOT', None, 'None'),
+                         self.backend._cache.get_fields(self.tid))
+
+    def test_changed_todo_is_fetched_again(self):
+        changes = CollectionChanges(set(), set(), {'etags': {
+            self.ROOT_KEY: '"2"'}})
+
+        self.assertEqual([], self.backend._restore_todos(self.calendar,
+                                                         changes))
+        self.assertEqual({self.ROOT_KEY}, changes.changed)
+
+    def test_nothing_stored_asks_for_a_full_import(self):
+        self.backend._stored_todos = {}
+        changes = CollectionChanges(set(), set(), {'etags': {}})
+
+        self.assertIsNone(self.backend._restore_todos(self.calendar,
+                                                      changes))
+
+    def test_stored_todos_round_trip(self):
+        changes = CollectionChanges(set(), set(), {'etags': {
+            self.ROOT_KEY: '"1"'}})
+        self.backend._restore_todos(self.calendar, changes)
+        self.backend._sync_states[self.URL] = changes.state
+
+        entry = self.backend._dump_todos()[self.URL][self.ROOT_KEY]
+
+        self.assertEqual((self.tid, '"1"'), (entry['tid'], entry['etag']))
+        self.assertIn('UID:ROOT', entry['data'])
+
+
+class FingerprintTest(TestCase):
+    """Fields are only compared one by one once the task changed since it
+    last matched its todo."""
+
+    def setUp(self):
+        self.task = Task(id=uuid4(), title='holy graal')
+        self.task.content = 'the knights who says ni'
+        self.vtodo = Translator.fill_vtodo(
+            self.task, 'My Calendar Name', NAMESPACE).vtodo
+        self.fingerprint = Translator.fingerprint(self.task, NAMESPACE)
+
+    def test_matching_fingerprint_skips_the_comparison(self):
+        self.vtodo.contents['summary'][0].value = 'changed remotely'
+
+        self.assertFalse(Translator.should_sync(
+            self.task, NAMESPACE, vtodo=self.vtodo,
+            fingerprint=self.fingerprint))
+        self.assertTrue(Translator.should_sync(
+            self.task, NAMESPACE, vtodo=self.vtodo))
+
+    def test_changed_task_is_compared(self):
+        self.task.content = 'ekke ekke ptang'
+
+        self.assertNotEqual(self.fingerprint,
+                            Translator.fingerprint(self.task, NAMESPACE))
+        self.assertEqual(['description'], [
+            field.dav_name for field in Translator.changed_attrs(
+                self.task, NAMESPACE, vtodo=self.vtodo,
+                fingerprint=self.fingerprint)])
+
+    def test_ignored_fields_keep_the_fingerprint(self):
+        self.task.date_modified = Date(datetime.now() + timedelta(days=1))
+
+        self.assertEqual(self.fingerprint,
+                         Translator.fingerprint(self.task, NAMESPACE))
+
+    def test_fetched_todo_drops_the_fingerprint(self):
+        backend = Backend({'pid': 'test', 'service-url': 'unittest',
+                           'username': 'u', 'password': 'p', 'period': 1})
+        uid = str(self.task.id)
+        backend._cache.set_todo(Mock(), uid)
+        backend._cache.set_fingerprint(uid, self.fingerprint)
+
+        backend._cache.set_todo(Mock(), uid)
+
+        self.assertIsNone(backend._cache.get_fingerprint(uid))
+
+
+class UnappliedImportTest(TestCase):
+    """The state of a calendar is only recorded once its todos were
+    applied to the store."""
+
+    URL = 'https://dav.example.com/tasks/'
+
+    def setUp(self):
+        self.backend = Backend({'pid': 'test', 'service-url': 'unittest',
+                                'username': 'u', 'password': 'p',
+                                'period': 1, 'is-first-run': False})
+        self.backend.datastore = Datastore()
+        self.backend._cache.initialized = True
+        self.backend._sync_states = {}
+        self.calendar = Mock()
+        self.calendar.url = self.URL
+        self.changes = CollectionChanges({'/tasks/new.ics'}, set(),
+                                         {'etags': {'/tasks/new.ics': '"1"'}})
+        self.backend._watcher = Mock()
+        self.backend._watcher.changes.return_value = self.changes
+
+    def _import(self, applied):
+        with patch.object(self.backend, '_import_changed_todos',
+                          return_value=applied):
+            self.backend._import_calendar_todos(self.calendar,
+                                                datetime.now(), {})
+
+    def test_applied_import_records_the_state(self):
+        self._import(True)
+        self.assertIs(self.changes.state,
+                      self.backend._sync_states[self.URL])
+
+    def test_unapplied_import_keeps_the_old_state(self):
+        self._import(False)
+        self.assertNotIn(self.URL, self.backend._sync_states)
+
+
+class ParallelPushCacheTest(TestCase):
+    """Push workers share the todo cache and the DAV client."""
+
+    def setUp(self):
+        self.backend = Backend({'pid': 'test', 'service-url': 'unittest',
+                                'username': 'u', 'password': 'p',
+                                'period': 1, 'is-first-run': False})
+        self.backend.datastore = Datastore()
+        self.backend._cache.initialized = True
+        self.calendar = Mock()
+        self.calendar.name = 'My Calendar'
+        self.calendar.url = 'https://dav.example.com/tasks/'
+        self.calendar.add_todo.side_effect = self._add_todo
+        self.backend._cache.set_calendar(self.calendar)
+
+    def _add_todo(self, ical):
+        todo = Mock()
+        todo.instance = vobject.readOne(ical)
+        todo.parent = self.calendar
+        return todo
+
+    def test_parallel_pushes_fill_the_cache(self):
+        tasks = [self.backend.datastore.tasks.new(f'task {number}')
+                 for number in range(40)]
+
+        with ThreadPoolExecutor(Backend.PUSH_WORKERS) as executor:
+            list(executor.map(self.backend.set_task, tasks))
+
+        cache = self.backend._cache
+        self.assertEqual({str(task.id) for task in tasks},
+                         set(cache.todos_by_uid))
+        for task in tasks:
+            todo = cache.get_todo(str(task.id))
+            self.assertEqual(task.title, todo.instance.vtodo.summary.value)
+            self.assertEqual(Translator.fingerprint(
+                task, self.backend.namespace),
+                             cache.get_fingerprint(str(task.id)))
+
+    def test_each_thread_gets_its_own_session(self):
+        sessions = ThreadSessions()
+        barrier = threading.Barrier(4)
+
+        def session_of_thread(_):
+            barrier.wait()  # all four threads are alive at once
+            session = sessions.session
+            self.assertIs(session, sessions.session)
+            return session
+
+        with ThreadPoolExecutor(4) as executor:
+            seen = list(executor.map(session_of_thread, range(4)))
+
+        self.assertEqual(4, len(set(map(id, seen))))
+
+
+class ImportLockingTest(TestCase):
+    """The import locks the tasks it changes from its own thread, the
+    main loop applying the changes takes no lock."""
+
+    def test_tasks_are_locked_while_applied(self):
+        backend = Backend({'pid': 'test', 'service-url': 'unittest',
+                           'username': 'u', 'password': 'p', 'period': 1,
+                           'is-first-run': False})
+        backend.datastore = Datastore()
+        task = backend.datastore.tasks.new('locked')
+        free = []
+
+        def apply(todos, missing, counts):
+            lock = backend.datastore.task_lock(task.id)
+            free.append(lock.acquire(False))
+
+        with patch.object(backend, '_apply_calendar_todos',
+                          side_effect=apply):
+            backend._apply_from_thread(
+                [], {str(task.id): (task, ('delete', None))}, {})
+
+        self.assertEqual([False], free)
+        self.assertTrue(backend.datastore.task_lock(task.id).acquire(False))
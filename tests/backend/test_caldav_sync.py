@@ -0,0 +1,201 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) - The Getting Things GNOME Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Change detection of CalDAV collections, against an in-memory server
+answering sync-collection REPORTs and PROPFINDs the way Radicale does."""
+
+from unittest import TestCase
+
+from lxml import etree
+
+from GTG.backends.caldav_sync import CollectionWatcher
+
+URL = 'https://dav.example.com/user/tasks/'
+TOKEN_PREFIX = 'http://radicale.org/ns/sync/'
+
+
+class Refused(Exception):
+    """What the client raises when the server refuses a request."""
+
+
+class Response:
+
+    def __init__(self, status, body=''):
+        self.status = status
+        self.raw = body
+        self.tree = None
+
+
+class StandInServer:
+    """One collection of objects, each with an etag bumped on change.
+
+    Every change makes a new revision, and the sync token of a revision
+    lists what changed after it.
+    """
+
+    def __init__(self, sync=True, ctag=True):
+        self.sync = sync
+        self.ctag = ctag
+        self.etags = {}
+        self.changes = []
+        self.requests = []
+
+    def put(self, name):
+        self.etags[name] = f'"{len(self.changes)}-{name}"'
+        self.changes.append(name)
+
+    def delete(self, name):
+        del self.etags[name]
+        self.changes.append(name)
+
+    def forget_history(self):
+        self.changes = [None] * len(self.changes)
+
+    @staticmethod
+    def _response(name, etag=None, status=None):
+        if status:
+            return (f'<d:response><d:href>{URL}{name}</d:href>'
+                    f'<d:status>HTTP/1.1 {status}</d:status></d:response>')
+        return (f'<d:response><d:href>{URL}{name}</d:href><d:propstat>'
+                f'<d:prop><d:getetag>{etag}</d:getetag></d:prop>'
+                f'<d:status>HTTP/1.1 200 OK</d:status>'
+                f'</d:propstat></d:response>')
+
+    @staticmethod
+    def _multistatus(*parts):
+        return Response(207, '<d:multistatus xmlns:d="DAV:" '
+                        'xmlns:cs="http://calendarserver.org/ns/">'
+                        + ''.join(parts) + '</d:multistatus>')
+
+    def report(self, url, body, depth):
+        self.requests.append('report')
+        if not self.sync:
+            return Response(501)
+
+        token = etree.fromstring(body.encode()).findtext('{DAV:}sync-token')
+        if not token:
+            names = set(self.etags)
+        else:
+            revision = int(token[len(TOKEN_PREFIX):])
+            since = self.changes[revision:]
+            if None in since:
+                raise Refused('valid-sync-token')
+            names = set(since)
+
+        return self._multistatus(
+            *(self._response(name, self.etags[name]) if name in self.etags
+              else self._response(name, status='404 Not Found')
+              for name in sorted(names)),
+            f'<d:sync-token>{TOKEN_PREFIX}{len(self.changes)}</d:sync-token>')
+
+    def propfind(self, url, body, depth):
+        self.requests.append(f'propfind-{depth}')
+        if depth == 0:
+            ctag = (f'<cs:getctag>{len(self.changes)}</cs:getctag>'
+                    if self.ctag else '')
+            return self._multistatus(
+                f'<d:response><d:href>{URL}</d:href><d:propstat><d:prop>'
+                f'{ctag}</d:prop><d:status>HTTP/1.1 200 OK</d:status>'
+                f'</d:propstat></d:response>')
+
+        return self._multistatus(
+            f'<d:response><d:href>{URL}</d:href><d:propstat><d:prop>'
+            f'<d:resourcetype><d:collection/></d:resourcetype></d:prop>'
+            f'<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>',
+            *(self._response(name, etag)
+              for name, etag in sorted(self.etags.items())))
+
+
+class CollectionWatcherTest(TestCase):
+
+    PATH = '/user/tasks/'
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.put('a.ics')
+        self.server.put('b.ics')
+        self.watcher = CollectionWatcher(self.server, (Refused,))
+
+    def changes(self, state):
+        changes = self.watcher.changes(URL, state)
+        return ({key[len(self.PATH):] for key in changes.changed},
+                {key[len(self.PATH):] for key in changes.removed},
+                changes.state)
+
+    def edit(self):
+        self.server.put('a.ics')
+        self.server.delete('b.ics')
+        self.server.put('c.ics')
+
+    def test_first_listing_reports_every_object(self):
+        changed, removed, _ = self.changes(None)
+
+        self.assertEqual({'a.ics', 'b.ics'}, changed)
+        self.assertEqual(set(), removed)
+
+    def test_sync_token_only_brings_the_difference(self):
+        *_, state = self.changes(None)
+        self.assertEqual((set(), set()), self.changes(state)[:2])
+
+        self.edit()
+        self.server.requests.clear()
+        changed, removed, state = self.changes(state)
+
+        self.assertEqual({'a.ics', 'c.ics'}, changed)
+        self.assertEqual({'b.ics'}, removed)
+        self.assertEqual(['report'], self.server.requests)
+        self.assertEqual((set(), set()), self.changes(state)[:2])
+
+    def test_forgotten_sync_token_compares_etags(self):
+        *_, state = self.changes(None)
+        self.edit()
+        self.server.forget_history()
+
+        changed, removed, _ = self.changes(state)
+
+        self.assertEqual({'a.ics', 'c.ics'}, changed)
+        self.assertEqual({'b.ics'}, removed)
+
+    def test_unchanged_ctag_skips_the_listing(self):
+        self.server.sync = False
+        *_, state = self.changes(None)
+        self.server.requests.clear()
+
+        self.assertEqual((set(), set()), self.changes(state)[:2])
+        self.assertEqual(['propfind-0'], self.server.requests)
+
+        self.edit()
+        changed, removed, _ = self.changes(state)
+        self.assertEqual({'a.ics', 'c.ics'}, changed)
+        self.assertEqual({'b.ics'}, removed)
+
+    def test_etags_alone_are_enough(self):
+        self.server.sync = self.server.ctag = False
+        *_, state = self.changes(None)
+        self.edit()
+
+        changed, removed, _ = self.changes(state)
+
+        self.assertEqual({'a.ics', 'c.ics'}, changed)
+        self.assertEqual({'b.ics'}, removed)
+
+    def test_no_usable_answer_asks_for_a_full_fetch(self):
+        self.server.sync = False
+        self.server.propfind = lambda url, body, depth: Response(500)
+
+        self.assertIsNone(self.watcher.changes(URL, None))
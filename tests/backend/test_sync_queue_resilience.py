@@ -139,6 +139,106 @@ class LaunchSettingThreadResilienceTest(TestCase):
         self.assertIn(backend.datastore.tasks.lookup[good], pushed)
 
 
+class ParallelPushTest(TestCase):
+    """Pushes run in parallel, in an order the server can follow."""
+
+    def test_parents_are_pushed_before_their_children(self):
+        backend = _make_backend()
+        tasks = backend.datastore.tasks
+        parent = tasks.new('parent')
+        child = tasks.new('child', parent.id)
+        grandchild = tasks.new('grandchild', child.id)
+        other = tasks.new('other')
+        pushed = []
+        backend.set_task = Mock(side_effect=pushed.append)
+        for task in (grandchild, other, child, parent):
+            backend.to_set.appendleft(task.id)
+
+        backend.launch_setting_thread()
+
+        self.assertEqual(4, len(pushed))
+        self.assertLess(pushed.index(parent), pushed.index(child))
+        self.assertLess(pushed.index(child), pushed.index(grandchild))
+        self.assertFalse(backend.to_set)
+
+    @patch('GTG.backends.generic_backend.is_connection_up', new=lambda: True)
+    def test_failed_parent_holds_back_its_children(self):
+        backend = _make_backend()
+        tasks = backend.datastore.tasks
+        parent = tasks.new('parent')
+        child = tasks.new('child', parent.id)
+        backend.set_task = Mock(
+            side_effect=requests.exceptions.ConnectionError('down'))
+        backend.to_set.appendleft(child.id)
+        backend.to_set.appendleft(parent.id)
+
+        backend.launch_setting_thread()
+
+        backend.set_task.assert_called_once_with(parent)
+        self.assertEqual([parent.id, child.id], list(backend.to_set))
+
+    def test_removal_wins_over_a_pending_save(self):
+        backend = _make_backend()
+        task = backend.datastore.tasks.new('task')
+        backend.set_task = Mock()
+        backend.remove_task = Mock()
+        backend.to_set.appendleft(task.id)
+        backend.to_remove.appendleft(task.id)
+
+        backend.launch_setting_thread()
+
+        backend.set_task.assert_not_called()
+        backend.remove_task.assert_called_once_with(task.id)
+
+    def test_edit_before_its_push_is_not_pushed_twice(self):
+        backend = _make_backend()
+        tasks = backend.datastore.tasks
+        parent = tasks.new('parent')
+        child = tasks.new('child', parent.id)
+        pushed = []
+
+        def push(task):
+            if task is parent:
+                # The child waits in the next wave, so the edit goes with it
+                backend.queue_set_task(child.id)
+            pushed.append(task)
+
+        backend.set_task = Mock(side_effect=push)
+        backend.to_set.appendleft(child.id)
+        backend.to_set.appendleft(parent.id)
+
+        with patch.object(backend, _MANGLED_LAUNCH):
+            backend.launch_setting_thread()
+
+        self.assertEqual([parent, child], pushed)
+        self.assertFalse(backend.to_set)
+
+    def test_edit_during_its_push_is_queued_again(self):
+        backend = _make_backend()
+        task = backend.datastore.tasks.new('task')
+        backend.set_task = Mock(
+            side_effect=lambda task: backend.queue_set_task(task.id))
+        backend.to_set.appendleft(task.id)
+
+        with patch.object(backend, _MANGLED_LAUNCH):
+            backend.launch_setting_thread()
+
+        self.assertEqual([task.id], list(backend.to_set))
+
+    def test_pushes_are_reported(self):
+        backend = _make_backend()
+        for title in ('first', 'second'):
+            backend.to_set.appendleft(backend.datastore.tasks.new(title).id)
+        backend.set_task = Mock()
+
+        signals = BackendSignals()
+        with patch.object(signals, 'backend_pushed') as pushed:
+            backend.launch_setting_thread()
+
+        pushed.assert_called_once()
+        self.assertEqual((backend.get_id(), 2, 0), pushed.call_args[0][:3])
+
+
 class NetworkReturnTriggerTest(TestCase):
 
     def test_network_changed_retries_registered_backends(self):
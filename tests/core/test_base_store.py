@@ -16,9 +16,12 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+import threading
 from unittest import TestCase
+from unittest.mock import patch
 from uuid import uuid4
 
+from GTG.core import base_store
 from GTG.core.base_store import StoreItem, BaseStore
 
 
@@ -69,6 +72,55 @@ class TestBaseStoreRemove(TestCase):
         self.assertEqual(removed,set(self.tree_items))
 
 
+    def test_batch_remove_emits_one_signal(self):
+        removed = []
+        batches = []
+        self.store.connect('removed',lambda s, item: removed.append(item))
+        self.store.connect('batch-changed',lambda s, batch: batches.append(batch))
+        self.store.batch_remove([self.tree_items[3].id,self.tree_items[5].id,
+                                 self.simple_item.id])
+        self.assertEqual(removed,[])
+        self.assertEqual(len(batches),1)
+        gone = set(self.tree_items[3:]) | {self.simple_item}
+        self.assertEqual(set(batches[0].get('removed').values()),gone)
+        # the parent of a removed item is affected as well
+        self.assertIn(self.tree_items[0].id,batches[0].items)
+
+
+    def test_nested_batches_emit_once(self):
+        batches = []
+        self.store.connect('batch-changed',lambda s, batch: batches.append(batch))
+        with self.store.batch():
+            with self.store.batch():
+                self.store.remove(self.simple_item.id)
+            self.assertEqual(batches,[])
+        self.assertEqual(len(batches),1)
+        with self.store.batch():
+            pass
+        self.assertEqual(len(batches),1)
+
+
+
+    def test_batch_leaves_other_threads_out(self):
+        removed = []
+        batches = []
+        self.store.connect('removed',lambda s, item: removed.append(item))
+        self.store.connect('batch-changed',lambda s, batch: batches.append(batch))
+        worker = threading.Thread(target=self.store.remove,
+                                  args=(self.simple_item.id,))
+
+        with patch.object(base_store.GLib,'idle_add',
+                          side_effect=lambda emit, *args: emit(*args)):
+            with self.store.batch():
+                self.store.remove(self.tree_items[1].id)
+                worker.start()
+                worker.join()
+
+        self.assertEqual(removed,[self.simple_item])
+        self.assertEqual(len(batches),1)
+        self.assertEqual(list(batches[0].get('removed').values()),
+                         [self.tree_items[1]])
+
 
 class TestBaseStoreParent(TestCase):
 
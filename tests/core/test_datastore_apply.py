@@ -0,0 +1,117 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from GTG.core.datastore import Datastore
+
+
+class DatastoreApplyTest(TestCase):
+    """Backend changes are applied on the main loop, in one batch."""
+
+
+    def setUp(self):
+        self.ds = Datastore()
+        self.batches = []
+        self.ds.tasks.connect('batch-changed',
+                              lambda s, batch: self.batches.append(batch))
+
+
+    def add_tasks(self):
+        for title in ('one', 'two', 'three'):
+            self.ds.tasks.new(title)
+
+
+    def test_changes_are_applied_in_one_batch(self):
+        self.ds.apply_from_thread(self.add_tasks)
+
+        self.assertEqual(3, self.ds.tasks.count())
+        self.assertEqual(1, len(self.batches))
+        self.assertEqual(3, len(self.batches[0].get('added')))
+        self.assertEqual(1, self.ds.apply_metrics['applied'])
+        self.assertGreaterEqual(self.ds.apply_metrics['max_ms'],
+                                self.ds.apply_metrics['last_ms'])
+
+
+    def test_thread_waits_for_the_main_loop(self):
+        callbacks = []
+        queued = threading.Event()
+
+        def idle_add(func):
+            callbacks.append(func)
+            queued.set()
+
+        with patch('GTG.core.datastore.GLib.idle_add', side_effect=idle_add):
+            worker = threading.Thread(
+                target=self.ds.apply_from_thread, args=(self.add_tasks,))
+            worker.start()
+            queued.wait()
+
+            # nothing changes until the main loop runs the callback
+            self.assertTrue(worker.is_alive())
+            self.assertEqual(0, self.ds.tasks.count())
+
+            callbacks[0]()
+            worker.join()
+
+        self.assertEqual(3, self.ds.tasks.count())
+        self.assertEqual(1, len(self.batches))
+
+
+    def test_quitting_drops_the_changes(self):
+        callbacks = []
+        results = []
+        self.ds.APPLY_POLL = 0.01
+
+        def apply():
+            results.append(self.ds.apply_from_thread(self.add_tasks))
+
+        with patch('GTG.core.datastore.GLib.idle_add',
+                   side_effect=callbacks.append):
+            worker = threading.Thread(target=apply)
+            worker.start()
+            self.ds.please_quit = True
+            worker.join()
+
+            # too late: the main loop must not apply them anymore
+            callbacks[0]()
+
+        self.assertEqual([False], results)
+        self.assertEqual(0, self.ds.tasks.count())
+
+
+    def test_a_task_always_gets_the_same_lock(self):
+        task = self.ds.tasks.new('one')
+        lock = self.ds.task_lock(task.id)
+
+        self.assertIs(lock, self.ds.task_lock(task.id))
+        with lock:
+            self.assertFalse(self.ds.task_lock(task.id).acquire(False))
+
+
+    def test_several_tasks_are_locked_at_once(self):
+        tasks = [self.ds.tasks.new(title) for title in ('one', 'two')]
+
+        with self.ds.task_locks(task.id for task in tasks):
+            for task in tasks:
+                self.assertFalse(self.ds.task_lock(task.id).acquire(False))
+
+        for task in tasks:
+            self.assertTrue(self.ds.task_lock(task.id).acquire(False))
@@ -21,6 +21,7 @@ import time
 import shutil
 import tempfile
 from unittest import TestCase
+from unittest.mock import patch
 
 from GTG.core.datastore import Datastore
 
@@ -120,3 +121,66 @@ class TestPurgeBackups(BackupDirTestCase):
         shutil.rmtree(self.backup_dir)
 
         Datastore.purge_backups(self.main)  # must not raise
+
+
+class TestWriteBackups(BackupDirTestCase):
+    """Backups share the data of the saved file and the numbered ones
+    only rotate once per BACKUPS_ROTATION_INTERVAL."""
+
+
+    def setUp(self):
+        super().setUp()
+        self.ds = Datastore()
+        self.bak = os.path.join(self.backup_dir, 'gtg_data.xml.bak.{}')
+
+
+    def _save(self, content):
+        # Saving never writes the data file in place
+        temp = self._write(self.main + '__', content=content)
+        os.replace(temp, self.main)
+        self.ds.write_backups(self.main)
+
+
+    def _read(self, filepath):
+        with open(filepath) as filedesc:
+            return filedesc.read()
+
+
+    def test_backups_follow_the_saved_file(self):
+        self._save('<first/>')
+
+        self.assertEqual('<first/>', self._read(self.bak.format(0)))
+        self.assertTrue(any(name.endswith('.bak')
+                            for name in os.listdir(self.backup_dir)))
+
+
+    def test_backups_survive_the_next_save(self):
+        self._save('<first/>')
+        self.ds._backups_rotated_at = None
+        self._save('<second/>')
+
+        self.assertEqual('<second/>', self._read(self.bak.format(0)))
+        self.assertEqual('<first/>', self._read(self.bak.format(1)))
+
+
+    def test_rotation_happens_once_per_interval(self):
+        self._save('<first/>')
+        self._save('<second/>')
+
+        self.assertEqual('<second/>', self._read(self.bak.format(0)))
+        self.assertFalse(os.path.exists(self.bak.format(1)))
+
+
+    def test_backup_is_a_hard_link_when_possible(self):
+        self._save('<first/>')
+
+        self.assertTrue(os.path.samefile(self.main, self.bak.format(0)))
+
+
+    def test_falls_back_on_a_copy(self):
+        with patch('os.link', side_effect=OSError), \
+             patch('fcntl.ioctl', side_effect=OSError):
+            self._save('<first/>')
+
+        self.assertFalse(os.path.samefile(self.main, self.bak.format(0)))
+        self.assertEqual('<first/>', self._read(self.bak.format(0)))
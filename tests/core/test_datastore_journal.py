@@ -0,0 +1,163 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from GTG.core.datastore import Datastore
+from GTG.core.journal import Journal
+
+
+class DatastoreJournalTest(TestCase):
+    """Saving appends changes to a journal instead of rewriting the
+    data file, and loading replays the journal onto the data file."""
+
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'gtg_data.xml')
+        self.ds = Datastore()
+        self.ds.data_path = self.path
+        self.task = self.ds.tasks.new('first')
+        self.ds.save()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+
+    def _read(self, path):
+        with open(path, 'rb') as stream:
+            return stream.read()
+
+
+    def _reload(self):
+        ds = Datastore()
+        ds.find_and_load_file(self.path)
+        return ds
+
+
+    def test_first_save_writes_the_data_file(self):
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + Journal.SUFFIX))
+
+
+    def test_later_saves_only_append_to_the_journal(self):
+        snapshot = self._read(self.path)
+
+        self.task.title = 'renamed'
+        self.ds.save()
+
+        self.assertEqual(snapshot, self._read(self.path))
+        self.assertEqual(1, self.ds.journal.records)
+
+
+    def test_save_without_changes_appends_nothing(self):
+        self.ds.save()
+
+        self.assertEqual(0, self.ds.journal.records)
+
+
+    def test_journal_is_replayed_on_load(self):
+        self.task.title = 'renamed'
+        added = self.ds.tasks.new('second')
+        tag = self.ds.tags.new('errands')
+        self.ds.save()
+
+        reloaded = self._reload()
+
+        self.assertEqual('renamed', reloaded.tasks.get(self.task.id).title)
+        self.assertIn(added.id, reloaded.tasks.lookup)
+        self.assertIn(tag.id, reloaded.tags.lookup)
+
+
+    def test_content_edits_are_journaled(self):
+        self.task.content = 'Some notes'
+        self.ds.save()
+
+        self.assertEqual(1, self.ds.journal.records)
+        self.assertEqual('Some notes',
+                         self._reload().tasks.get(self.task.id).content)
+
+
+    def test_removals_are_replayed(self):
+        self.ds.tasks.remove(self.task.id)
+        self.ds.save()
+
+        self.assertNotIn(self.task.id, self._reload().tasks.lookup)
+
+
+    def test_parenting_is_replayed(self):
+        child = self.ds.tasks.new('child')
+        self.ds.save()
+        self.ds.tasks.parent(child.id, self.task.id)
+        self.ds.save()
+
+        reloaded = self._reload()
+
+        self.assertEqual(self.task.id, reloaded.tasks.get(child.id).parent.id)
+
+
+    def test_compaction_clears_the_journal(self):
+        self.task.title = 'renamed'
+        self.ds.save()
+        self.ds.save(compact=True)
+
+        self.assertFalse(os.path.exists(self.path + Journal.SUFFIX))
+        self.assertIn(b'renamed', self._read(self.path))
+
+
+    def test_full_journal_triggers_compaction(self):
+        self.ds.journal.records = Datastore.JOURNAL_MAX_RECORDS
+        self.task.title = 'renamed'
+        self.ds.save()
+
+        self.assertEqual(0, self.ds.journal.records)
+        self.assertIn(b'renamed', self._read(self.path))
+
+
+    def test_damaged_last_record_is_skipped(self):
+        self.task.title = 'renamed'
+        self.ds.save()
+
+        with open(self.path + Journal.SUFFIX, 'a') as stream:
+            stream.write('{"op": "set", "list": "tasklist", "id"')
+
+        reloaded = self._reload()
+
+        self.assertEqual('renamed', reloaded.tasks.get(self.task.id).title)
+
+
+    def test_journal_is_replayed_onto_a_backup(self):
+        backup = Datastore.get_backup_path(self.path, 1)
+        shutil.copy(self.path, backup)
+        os.utime(backup, (0, 0))
+        self.task.title = 'renamed'
+        self.ds.save()
+
+        with open(self.path, 'w') as stream:
+            stream.write('<gtgData')
+
+        reloaded = self._reload()
+
+        self.assertIsNotNone(reloaded.backup_info)
+        self.assertEqual('renamed', reloaded.tasks.get(self.task.id).title)
+        self.assertFalse(os.path.exists(self.path + Journal.SUFFIX))
+        self.assertTrue(os.path.exists(self.path + Journal.SUFFIX + '.broken'))
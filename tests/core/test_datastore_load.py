@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from lxml import etree
+
+from GTG.core.datastore import Datastore
+
+
+class DatastoreLoadTest(TestCase):
+    """The data file is streamed into the stores."""
+
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'gtg_data.xml')
+
+        self.ds = Datastore()
+        self.ds.data_path = self.path
+        self.tag = self.ds.tags.new('errands')
+        self.search = self.ds.saved_searches.new('Errands', '@errands')
+        self.parent = self.ds.tasks.new('parent')
+        self.child = self.ds.tasks.new('child', self.parent.id)
+        self.child.add_tag(self.tag)
+        self.ds.save(compact=True)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+
+    def test_streamed_file_fills_the_stores(self):
+        ds = Datastore()
+        ds.load_file(self.path)
+
+        child = ds.tasks.get(self.child.id)
+
+        self.assertTrue(ds.loaded)
+        self.assertEqual(2, ds.tasks.count())
+        self.assertEqual(self.parent.id, child.parent.id)
+        self.assertEqual([self.tag.id], [tag.id for tag in child.tags])
+        self.assertIn(self.search.id, ds.saved_searches.lookup)
+
+
+    def test_tree_is_not_kept(self):
+        ds = Datastore()
+        ds.load_file(self.path)
+
+        self.assertFalse(hasattr(ds, 'xml_tree'))
+
+
+    def test_damaged_file_leaves_the_stores_empty(self):
+        with open(self.path, 'rb') as stream:
+            data = stream.read()
+
+        with open(self.path, 'wb') as stream:
+            stream.write(data[:-40])
+
+        ds = Datastore()
+
+        with self.assertRaises(etree.XMLSyntaxError):
+            ds.load_file(self.path)
+
+        self.assertFalse(ds.loaded)
+        self.assertEqual(0, ds.tasks.count())
+        self.assertEqual(0, ds.tags.count())
@@ -37,6 +37,18 @@ class DatastoreRemovalSyncTest(TestCase):
         # children are cascaded before their parent
         self.assertEqual(parent.id, removed[-1])
 
+    def test_batch_removal_queues_every_descendant(self):
+        parent = self.ds.tasks.new('parent')
+        child = self.ds.tasks.new('child', parent=parent.id)
+        other = self.ds.tasks.new('other')
+        self.backend.queue_remove_task.reset_mock()
+
+        self.ds.tasks.batch_remove([parent.id, other.id])
+
+        removed = [c.args[0]
+                   for c in self.backend.queue_remove_task.call_args_list]
+        self.assertEqual([child.id, parent.id, other.id], removed)
+
     def test_disabled_backend_is_not_notified(self):
         self.backend.is_enabled.return_value = False
         task = self.ds.tasks.new('a task')
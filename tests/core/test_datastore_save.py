@@ -0,0 +1,130 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from gi.repository import GLib
+
+from GTG.core.datastore import Datastore
+
+
+class DatastoreSaveTest(TestCase):
+    """Saves are debounced and written by a worker thread."""
+
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'gtg_data.xml')
+        self.ds = Datastore()
+        self.ds.data_path = self.path
+        self.ds.save_delay = 1
+
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+
+    def _run_pending_save(self):
+        context = GLib.MainContext.default()
+        while self.ds._save_timeout is not None:
+            context.iteration(True)
+
+
+    def test_requests_are_coalesced(self):
+        with patch.object(self.ds, 'save') as save:
+            for _ in range(3):
+                self.ds.schedule_save()
+
+            self._run_pending_save()
+
+        save.assert_called_once_with(compact=False, wait=False)
+
+
+    def test_compaction_request_is_kept(self):
+        with patch.object(self.ds, 'save') as save:
+            self.ds.schedule_save(compact=True)
+            self.ds.schedule_save()
+
+            self._run_pending_save()
+
+        save.assert_called_once_with(compact=True, wait=False)
+
+
+    def test_scheduled_save_reaches_the_disk(self):
+        self.ds.tasks.new('scheduled')
+        self.ds.schedule_save()
+
+        self._run_pending_save()
+        self.ds._save_queue.join()
+
+        self.assertTrue(os.path.exists(self.path))
+
+
+    def test_flush_cancels_the_pending_save(self):
+        self.ds.schedule_save()
+        self.ds.flush()
+
+        self.assertIsNone(self.ds._save_timeout)
+        self.assertTrue(os.path.exists(self.path))
+
+
+    def test_no_temp_file_is_left_behind(self):
+        self.ds.save()
+
+        self.assertFalse(os.path.exists(self.path + '__'))
+
+
+    def test_failed_write_forces_a_full_save(self):
+        self.ds.save()
+
+        with patch.object(self.ds, 'write_file', side_effect=OSError):
+            self.ds.save(compact=True)
+
+        self.assertTrue(self.ds._save_failed)
+
+        with patch.object(self.ds, '_snapshot_job',
+                          wraps=self.ds._snapshot_job) as snapshot:
+            self.ds.save()
+
+        snapshot.assert_called_once_with(self.path)
+
+
+    def test_failed_write_is_logged_with_its_cause(self):
+        self.ds.save()
+
+        with patch.object(self.ds, 'write_file',
+                          side_effect=OSError('disk full')):
+            with self.assertLogs('GTG.core.datastore', 'ERROR') as logs:
+                self.ds.save(compact=True)
+
+        self.assertIn('disk full', logs.output[0])
+
+
+    def test_saving_a_copy_keeps_the_store_dirty(self):
+        self.ds.save()
+
+        with patch.object(self.ds, 'write_file', side_effect=OSError):
+            self.ds.save(compact=True)
+
+        self.ds.save(os.path.join(self.root, 'copy.xml'))
+
+        self.assertTrue(self.ds._save_failed)
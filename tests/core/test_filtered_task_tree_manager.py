@@ -21,7 +21,7 @@ from uuid import uuid4
 
 from gi.repository import GObject, Gtk
 
-from GTG.core.tasks import FilteredTaskTreeManager, TaskStore, Task
+from GTG.core.tasks import FilteredTaskTreeManager, PaneClassifier, TaskStore, Task
 from GTG.core.filters import unwrap
 
 
@@ -340,3 +340,110 @@ class TestFilteredTaskTreeManagerWithFilterChange(TestCase):
             "[.B] this will appear": { "[.B] 1": dict(),"[.B] 2": dict() },
         }
         self.assertEqual(get_titles_as_tree(tree_model),want)
+
+
+
+class TestFilteredTaskTreeManagerRefilter(TestCase):
+
+
+    def setUp(self):
+        self.store = create_task_store({
+            "[AB] parent": { "[AB] 1": dict(),"[A.] 2": dict() },
+            "[A.] other": dict(),
+            "[.B] hidden": dict(),
+        })
+        self.matched = []
+        self.task_filter = LambdaFilter(lambda t: "A" in t.title)
+
+
+    def counting(self,func):
+        def match(t):
+            self.matched.append(t.title)
+            return func(t)
+        return match
+
+
+    def test_expanded_rows_follow_the_filter(self):
+        fttm = FilteredTaskTreeManager(self.store,self.task_filter)
+        tree_model = fttm.get_tree_model()
+        get_titles_as_tree(tree_model)
+        self.task_filter.set_filter_function(lambda t: "B" in t.title)
+        want = {
+            "[AB] parent": { "[AB] 1": dict() },
+            "[.B] hidden": dict(),
+        }
+        self.assertEqual(get_titles_as_tree(tree_model),want)
+
+
+    def test_more_strict_only_matches_visible_tasks(self):
+        fttm = FilteredTaskTreeManager(self.store,self.task_filter)
+        self.task_filter.filter_func = self.counting(lambda t: "AB" in t.title)
+        self.task_filter.changed(Gtk.FilterChange.MORE_STRICT)
+        self.assertNotIn("[.B] hidden",self.matched)
+        want = { "[AB] parent": { "[AB] 1": dict() } }
+        self.assertEqual(get_titles_as_tree(fttm.get_tree_model()),want)
+
+
+    def test_deferred_refilters_are_merged(self):
+        fttm = FilteredTaskTreeManager(self.store,self.task_filter,defer_refilter=True)
+        self.task_filter.set_filter_function(self.counting(lambda t: "B" in t.title))
+        self.task_filter.set_filter_function(self.counting(lambda t: "B" in t.title))
+        self.assertEqual(self.matched,[])
+        fttm.flush()
+        self.assertEqual(len(self.matched),len(self.store.lookup))
+        want = {
+            "[AB] parent": { "[AB] 1": dict() },
+            "[.B] hidden": dict(),
+        }
+        self.assertEqual(get_titles_as_tree(fttm.get_tree_model()),want)
+
+
+
+class TestFilteredTaskTreeManagerWithClassifier(TestCase):
+
+
+    def setUp(self):
+        self.store = create_task_store({ "a": dict(), "b": dict() })
+        self.classifier = PaneClassifier(self.store)
+
+
+    def test_suspended_manager_catches_up(self):
+        fttm = FilteredTaskTreeManager(self.store,LambdaFilter(lambda t: "a" in t.title),
+                                       classifier=self.classifier)
+        fttm.suspend()
+        self.store.add(Task(uuid4(),"aa"))
+        self.assertEqual(get_titles_as_tree(fttm.get_tree_model()),{ "a": dict() })
+        fttm.resume()
+        self.assertEqual(get_titles_as_tree(fttm.get_tree_model()),{ "a": dict(), "aa": dict() })
+
+
+    def test_tasks_are_classified_once(self):
+        task = self.store.new("c")
+        self.assertEqual(self.classifier.panes_of(task),{"active","workview"})
+        task.toggle_active()
+        self.assertEqual(self.classifier.panes_of(task),{"closed"})
+
+
+    def test_rows_of_tasks(self):
+        parent = self.store.new("p")
+        child = self.store.new("c",parent.id)
+        fttm = FilteredTaskTreeManager(self.store,LambdaFilter(lambda _: True),
+                                       classifier=self.classifier)
+        parent_row = fttm.row_of(parent)
+        self.assertIs(unwrap(parent_row,Task),parent)
+        self.assertIsNone(fttm.row_of(child))
+        parent_row.set_expanded(True)
+        self.assertIs(unwrap(fttm.row_of(child),Task),child)
+
+
+    def test_collapsed_rows_release_their_models(self):
+        parent = self.store.new("p")
+        self.store.new("c",parent.id)
+        fttm = FilteredTaskTreeManager(self.store,LambdaFilter(lambda _: True),
+                                       classifier=self.classifier)
+        parent_row = fttm.row_of(parent)
+        parent_row.set_expanded(True)
+        self.assertEqual(fttm.stats()['child_models'],1)
+        parent_row.set_expanded(False)
+        self.assertEqual(fttm.stats()['child_models'],0)
+        self.assertEqual(fttm.stats()['placed'],len(fttm.visible) - 1)
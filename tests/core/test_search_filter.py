@@ -16,9 +16,10 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+from datetime import date
 from unittest import TestCase
 
-from GTG.core.search import search_filter
+from GTG.core.search import parse_search_query, search_filter
 from GTG.core.dates import Date
 
 d = Date.parse
@@ -210,3 +211,58 @@ class TestSearchFilter(TestCase):
                                       {'q': [("soon", True)]}))
         self.assertTrue(search_filter(FakeTask(date_due="someday"),
                                       {'q': [("someday", True)]}))
+
+    def test_notag(self):
+        self.assertTrue(search_filter(FakeTask(), {'q': [("notag", True)]}))
+        self.assertFalse(search_filter(FakeTask(tags=['a']),
+                                       {'q': [("notag", True)]}))
+
+
+class TestSearchQuery(TestCase):
+
+    def test_parsed_query_matches_tasks(self):
+        query = parse_search_query('@a GTG !or !today')
+        task = FakeTask(title='GTG', tags=['a'])
+
+        self.assertTrue(query.matches(task))
+        self.assertFalse(query.matches(FakeTask(title='GTG', tags=['b'])))
+
+    def test_cheap_checks_come_first(self):
+        query = parse_search_query('word !not @a')
+
+        self.assertEqual(['tag', 'word'],
+                         [check[1] for check in query.checks])
+
+    def test_relative_dates_follow_the_pass(self):
+        query = parse_search_query('!today')
+        query.dates['today'] = d('2000-01-01')
+
+        self.assertFalse(query.matches(FakeTask(date_due='today')))
+
+        query.start_pass()
+
+        self.assertTrue(query.matches(FakeTask(date_due='today')))
+
+    def test_relative_dates_follow_the_day(self):
+        query = parse_search_query('!today')
+        query.dates['today'] = d('2000-01-01')
+        query.day = date(2000, 1, 1)
+
+        self.assertTrue(query.matches(FakeTask(date_due='today')))
+
+    def test_fixed_queries_ignore_the_day(self):
+        query = parse_search_query('@a !or word')
+
+        self.assertFalse(query.relative)
+        self.assertTrue(parse_search_query('@a !or !tomorrow').relative)
+
+    def test_typing_narrows_the_query(self):
+        self.assertTrue(parse_search_query('buy').narrows(None))
+        self.assertTrue(parse_search_query('buy m').narrows(
+            parse_search_query('buy')))
+        self.assertTrue(parse_search_query('buy mi').narrows(
+            parse_search_query('buy m')))
+        self.assertFalse(parse_search_query('buy').narrows(
+            parse_search_query('buy m')))
+        self.assertFalse(parse_search_query('@ab').narrows(
+            parse_search_query('@a')))
@@ -0,0 +1,113 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from GTG.core.datastore import Datastore
+from GTG.core.dates import Date
+from GTG.core.snapshot_cache import SnapshotCache, decode_record, encode_record
+from GTG.core.tasks import Status, TaskStore
+
+
+class SnapshotCacheTest(TestCase):
+    """Snapshots are cached in a binary file loaded at startup."""
+
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'gtg_data.xml')
+
+        self.ds = Datastore()
+        self.ds.data_path = self.path
+        self.tag = self.ds.tags.new('errands')
+        self.parent = self.ds.tasks.new('parent')
+        self.child = self.ds.tasks.new('child', self.parent.id)
+        self.child.add_tag(self.tag)
+        self.child.date_due = Date('2026-05-04')
+        self.child.date_start = Date('soon')
+        self.parent.toggle_active()
+        self.ds.save(compact=True)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+
+    def test_records_survive_encoding(self):
+        record = TaskStore.record_from_task(self.child)
+
+        self.assertEqual(record, decode_record(encode_record(record)))
+
+
+    def test_cache_fills_the_stores(self):
+        ds = Datastore()
+
+        self.assertTrue(ds.load_cache(self.path))
+
+        child = ds.tasks.get(self.child.id)
+
+        self.assertEqual(self.parent.id, child.parent.id)
+        self.assertEqual([self.tag.id], [tag.id for tag in child.tags])
+        self.assertEqual(Date('2026-05-04'), child.date_due)
+        self.assertEqual(Date('soon'), child.date_start)
+        self.assertEqual(Status.DONE, ds.tasks.get(self.parent.id).status)
+
+
+    def test_journal_applies_on_top_of_the_cache(self):
+        self.child.title = 'renamed'
+        self.ds.save()
+
+        ds = Datastore()
+        ds.find_and_load_file(self.path)
+
+        self.assertEqual('renamed', ds.tasks.get(self.child.id).title)
+
+
+    def test_changed_data_file_is_loaded_instead(self):
+        with open(self.path, 'a') as stream:
+            stream.write('\n')
+
+        self.assertFalse(Datastore().load_cache(self.path))
+
+
+    def test_damaged_cache_is_ignored(self):
+        with open(self.path + SnapshotCache.SUFFIX, 'r+b') as stream:
+            stream.truncate(os.path.getsize(stream.name) // 2)
+
+        self.assertIsNone(SnapshotCache(self.path).read())
+
+
+    def test_startup_uses_the_cache(self):
+        ds = Datastore()
+
+        with patch.object(ds, 'load_file') as load_file:
+            ds.find_and_load_file(self.path)
+
+        load_file.assert_not_called()
+        self.assertIn(self.child.id, ds.tasks.lookup)
+
+
+    def test_cache_can_be_disabled(self):
+        ds = Datastore()
+        ds.use_cache = False
+
+        self.assertFalse(ds.load_cache(self.path))
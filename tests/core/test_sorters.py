@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, datetime, timedelta
+from unittest import TestCase
+from uuid import uuid4
+
+from gi.repository import Gtk
+
+from GTG.core.dates import Date
+from GTG.core.sorters import TaskDueSorter, TaskTagSorter, date_key
+from GTG.core.tags import Tag
+from GTG.core.tasks import Task
+
+
+class DateKeyTest(TestCase):
+    """Date keys sort like the dates they come from."""
+
+
+    def test_keys_follow_date_order(self):
+        today = date.today()
+        dates = [Date(today - timedelta(days=1)),
+                 Date(today),
+                 Date(datetime.combine(today, datetime.min.time()).replace(hour=9)),
+                 Date.soon(),
+                 Date(today + timedelta(days=20)),
+                 Date.someday(),
+                 Date.no_date()]
+
+        keys = [date_key(d, today.toordinal()) for d in dates]
+
+        self.assertEqual(sorted(keys), keys)
+
+
+class SorterTest(TestCase):
+    """Sorters compare cached keys."""
+
+
+    def test_keys_are_cached_until_forgotten(self):
+        sorter = TaskDueSorter()
+        first, second = Task(uuid4(), 'first'), Task(uuid4(), 'second')
+        first.date_due = Date('2026-01-01')
+        second.date_due = Date('2026-02-01')
+
+        self.assertEqual(Gtk.Ordering.SMALLER, sorter.do_compare(first, second))
+
+        first.date_due = Date('2026-03-01')
+        self.assertEqual(Gtk.Ordering.SMALLER, sorter.do_compare(first, second))
+
+        sorter.forget(first)
+        self.assertEqual(Gtk.Ordering.LARGER, sorter.do_compare(first, second))
+
+
+    def test_tasks_sort_by_their_first_tag_alphabetically(self):
+        sorter = TaskTagSorter()
+        first, second = Task(uuid4(), 'first'), Task(uuid4(), 'second')
+        first.tags = {Tag(uuid4(), 'zoo'), Tag(uuid4(), 'bar')}
+        second.tags = {Tag(uuid4(), 'foo')}
+
+        self.assertEqual(Gtk.Ordering.SMALLER, sorter.do_compare(first, second))
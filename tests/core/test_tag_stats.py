@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.datastore import Datastore
+
+
+class TagStatsTest(TestCase):
+    """Tag counts follow task changes without a full recount."""
+
+
+    def setUp(self):
+        self.ds = Datastore()
+        self.stats = self.ds.tag_stats
+        self.home = self.ds.tags.new('home')
+        self.garden = self.ds.tags.new('garden')
+        self.ds.tags.parent(self.garden.id, self.home.id)
+        self.stats.recalculate_all()
+
+
+    def counts(self, handle):
+        counts = self.stats.get_by_handle(handle)
+        return (counts.task_count_open, counts.task_count_actionable,
+                counts.task_count_closed)
+
+
+    def test_new_tagged_task_counts_for_the_tag_and_its_parent(self):
+        task = self.ds.tasks.new('mow')
+        task.add_tag(self.garden)
+        self.stats.update_pending()
+
+        self.assertEqual((1, 1, 0), self.counts(str(self.garden.id)))
+        self.assertEqual((1, 1, 0), self.counts(str(self.home.id)))
+        self.assertEqual((1, 1, 0), self.counts('all'))
+        self.assertEqual((0, 0, 0), self.counts('untagged'))
+
+
+    def test_closing_a_task_moves_it_to_closed(self):
+        task = self.ds.tasks.new('mow')
+        task.add_tag(self.garden)
+        self.stats.update_pending()
+
+        task.toggle_active()
+        self.stats.update_pending()
+
+        self.assertEqual((0, 0, 1), self.counts(str(self.garden.id)))
+
+
+    def test_open_subtask_makes_its_parent_not_actionable(self):
+        parent = self.ds.tasks.new('parent')
+        self.ds.tasks.new('child', parent.id)
+        self.stats.update_pending()
+
+        self.assertEqual((2, 1, 0), self.counts('all'))
+
+
+    def test_removed_task_is_no_longer_counted(self):
+        task = self.ds.tasks.new('mow')
+        self.stats.update_pending()
+        self.ds.tasks.remove(task.id)
+        self.stats.update_pending()
+
+        self.assertEqual((0, 0, 0), self.counts('all'))
+
+
+    def test_updates_match_a_recount(self):
+        first = self.ds.tasks.new('first')
+        first.add_tag(self.home)
+        second = self.ds.tasks.new('second', first.id)
+        second.add_tag(self.garden)
+        second.toggle_dismiss()
+        self.ds.tasks.new('third')
+        self.stats.update_pending()
+
+        self.assertTrue(self.stats.verify())
@@ -152,3 +152,53 @@ class TestTagStore(TestCase):
         self.assertNotEqual(color1, color2)
         self.assertNotEqual(color2, color3)
         self.assertNotEqual(color3, color1)
+
+
+    def test_descendants_follow_the_tree(self):
+        store = TagStore()
+        home = store.new('home')
+        garden = store.new('garden')
+
+        self.assertEqual({home}, store.descendants(home))
+
+        store.parent(garden.id, home.id)
+        self.assertEqual({home, garden}, store.descendants(home))
+
+        store.unparent(garden.id)
+        self.assertEqual({home}, store.descendants(home))
+
+
+    def test_ancestors_and_carries_follow_the_tree(self):
+        store = TagStore()
+        home = store.new('home')
+        garden = store.new('garden')
+        roses = store.new('roses')
+        store.parent(roses.id, garden.id)
+
+        self.assertEqual({garden, roses}, store.ancestors(roses))
+        self.assertTrue(store.carries({roses}, garden))
+        self.assertFalse(store.carries({roses}, home))
+
+        store.parent(garden.id, home.id)
+        self.assertEqual({home, garden, roses}, store.ancestors(roses))
+        self.assertEqual({home, garden, roses}, store.descendants(home))
+        self.assertTrue(store.carries({roses}, home))
+
+        store.remove(roses.id)
+        self.assertEqual({home, garden}, store.descendants(home))
+        self.assertFalse(store.carries(set(), home))
+
+
+    def test_row_css_follows_the_color(self):
+        store = TagStore()
+        tag = store.new('home')
+
+        self.assertIsNone(tag.row_css)
+
+        tag.color = '#ff0000'
+        css = tag.row_css
+        self.assertIn('rgba(255,0,0,0.1)', css)
+        self.assertIs(css, tag.row_css)
+
+        tag.color = '#00ff00'
+        self.assertIn('rgba(0,255,0,0.1)', tag.row_css)
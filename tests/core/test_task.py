@@ -17,13 +17,14 @@
 # -----------------------------------------------------------------------------
 
 from unittest import TestCase
+from unittest.mock import patch
 from uuid import uuid4
 
 from GTG.core.tasks import Task, Status, TaskStore, Filter
 from GTG.core.tags import Tag, TagStore
 from GTG.core.dates import Date
 
-from lxml.etree import XML
+from lxml.etree import XML, indent, tostring
 
 
 class TestTask(TestCase):
@@ -308,6 +309,39 @@ class TestTask(TestCase):
         self.assertEqual(task2.date_due, random_date)
 
 
+    def test_actionable_follows_its_inputs(self):
+        store = TaskStore()
+        task = store.new('parent')
+        child = store.new('child', task.id)
+        self.assertFalse(task.is_actionable)
+
+        child.toggle_active()
+        self.assertTrue(task.is_actionable)
+
+        tag = Tag(id=uuid4(), name='home')
+        task.add_tag(tag)
+        self.assertTrue(task.is_actionable)
+
+        tag.actionable = False
+        self.assertFalse(task.is_actionable)
+
+        tag.actionable = True
+        task.date_due = Date.someday()
+        self.assertFalse(task.is_actionable)
+
+
+    def test_actionable_start_date_waits_for_a_new_day(self):
+        task = Task(id=uuid4(), title='later')
+        task.date_start = Date.tomorrow()
+        self.assertFalse(task.is_actionable)
+
+        # the next day, it starts today
+        with patch.object(Date, 'days_left', return_value=0):
+            self.assertFalse(task.is_actionable)
+            Task.new_day()
+            self.assertTrue(task.is_actionable)
+
+
     def test_new_simple(self):
         store = TaskStore()
         task = store.new('My Task')
@@ -942,3 +976,158 @@ class TestDismissStatusMigration(TestCase):
         task = list(store.lookup.values())[0]
         self.assertEqual(task.status, Status.DISMISSED)
         self.assertFalse(task.is_active)
+
+
+class TestXmlCache(TestCase):
+    """to_xml() only serializes again the tasks that changed."""
+
+
+    def setUp(self):
+        self.store = TaskStore()
+        self.task = self.store.new('My Task')
+        self.other = self.store.new('My Other Task')
+        self.store.to_xml()
+
+
+    def test_serialized_tasks_are_clean(self):
+        self.assertFalse(self.store.is_dirty(self.task))
+        self.assertFalse(self.store.is_dirty(self.other))
+
+
+    def test_title_change_marks_task_dirty(self):
+        self.task.title = 'Renamed'
+
+        self.assertTrue(self.store.is_dirty(self.task))
+        self.assertFalse(self.store.is_dirty(self.other))
+        self.assertEqual(['Renamed', 'My Other Task'],
+                         [e.findtext('title') for e in self.store.to_xml()])
+
+
+    def test_date_change_marks_task_dirty(self):
+        self.task.date_due = Date('2030-01-01')
+
+        self.assertTrue(self.store.is_dirty(self.task))
+
+
+    def test_tag_change_marks_task_dirty(self):
+        self.task.add_tag(Tag(uuid4(), 'errands'))
+
+        self.assertTrue(self.store.is_dirty(self.task))
+
+
+    def test_parenting_marks_both_tasks_dirty(self):
+        self.store.parent(self.other.id, self.task.id)
+
+        self.assertTrue(self.store.is_dirty(self.task))
+        self.assertTrue(self.store.is_dirty(self.other))
+
+        element = next(e for e in self.store.to_xml()
+                       if e.get('id') == str(self.task.id))
+        self.assertEqual([str(self.other.id)],
+                         [s.text for s in element.iter('sub')])
+
+
+    def test_removing_a_child_marks_parent_dirty(self):
+        self.store.parent(self.other.id, self.task.id)
+        self.store.to_xml()
+
+        self.store.remove(self.other.id)
+
+        self.assertTrue(self.store.is_dirty(self.task))
+        self.assertEqual(1, len(self.store.to_xml()))
+
+
+    def test_returned_trees_are_independent(self):
+        first = self.store.to_xml()
+        first[0].find('title').text = 'Tampered'
+
+        second = self.store.to_xml()
+
+        self.assertEqual('My Task', second[0].findtext('title'))
+        self.assertEqual(2, len(first))
+
+
+    def test_serialized_bytes_match_the_tree(self):
+        self.task.title = 'Renamed'
+        root = self.store.to_xml()
+        indent(root, level=1)
+
+        self.assertEqual(tostring(root), self.store.serialize())
+
+
+class TestTagIndex(TestCase):
+    """The store keeps the tasks of each tag at hand."""
+
+
+    def setUp(self):
+        self.store = TaskStore()
+        self.tags = TagStore()
+        self.home = self.tags.new('home')
+        self.garden = self.tags.new('garden')
+        self.tags.parent(self.garden.id, self.home.id)
+        self.task = self.store.new('Mow the lawn')
+
+
+    def test_added_tag_is_indexed(self):
+        self.task.add_tag(self.garden)
+
+        self.assertEqual({self.task.id}, self.store.with_tags([self.garden]))
+
+
+    def test_removed_tag_is_unindexed(self):
+        self.task.add_tag(self.garden)
+        self.task.remove_tag('garden')
+
+        self.assertEqual(set(), self.store.with_tags([self.garden]))
+
+
+    def test_removed_task_is_unindexed(self):
+        self.task.add_tag(self.garden)
+        self.store.remove(self.task.id)
+
+        self.assertEqual(set(), self.store.with_tags([self.garden]))
+
+
+    def test_loaded_tags_are_indexed(self):
+        self.task.add_tag(self.garden)
+        loaded = TaskStore()
+        loaded.from_xml(self.store.to_xml(), self.tags)
+
+        self.assertEqual({self.task.id}, loaded.with_tags([self.garden]))
+
+
+    def test_filter_matches_through_ancestor_tags(self):
+        self.task.add_tag(self.home)
+
+        self.assertEqual([self.task],
+                         self.store.filter(Filter.TAG, self.garden))
+
+
+    def test_filter_skips_descendant_tags(self):
+        self.task.add_tag(self.garden)
+
+        self.assertEqual([], self.store.filter(Filter.TAG, self.home))
+
+
+class TestTaskNotifyRelay(TestCase):
+    """The store relays the changes of all its tasks through one signal."""
+
+
+    def setUp(self):
+        self.store = TaskStore()
+        self.task = self.store.new('My Task')
+        self.seen = []
+        self.store.connect('task-notify',
+                           lambda _, task, name: self.seen.append((task, name)))
+
+
+    def test_property_changes_are_relayed(self):
+        self.task.content = 'Some text'
+
+        self.assertIn((self.task, 'content'), self.seen)
+
+
+    def test_tag_changes_are_relayed(self):
+        self.task.add_tag(Tag(uuid4(), 'errands'))
+
+        self.assertIn((self.task, 'tags'), self.seen)
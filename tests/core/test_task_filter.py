@@ -0,0 +1,48 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.datastore import Datastore
+from GTG.core.filters import TaskFilter
+
+
+class TaskFilterQueryTest(TestCase):
+    """Search queries look words up in the whole text of the tasks."""
+
+
+    def setUp(self):
+        self.ds = Datastore()
+        self.task = self.ds.tasks.new('Groceries')
+        self.task.content = 'A long list.\n' * 50 + 'Do not forget the milk'
+        self.filter = TaskFilter(self.ds, 'active')
+
+
+    def test_word_deep_in_the_content_matches(self):
+        self.filter.set_query('milk')
+
+        self.assertTrue(self.filter.do_match(self.task))
+
+
+    def test_same_query_with_whitespace_keeps_matching(self):
+        self.filter.set_query('milk')
+        checks = self.filter.checks
+        self.filter.set_query('milk ')
+
+        self.assertIs(checks, self.filter.checks)
+        self.assertTrue(self.filter.do_match(self.task))
@@ -0,0 +1,88 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2026 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.search import parse_search_query
+from GTG.core.tasks import TaskStore
+from GTG.core.text_index import TextIndex
+
+
+class TextIndexTest(TestCase):
+    """Words are found through their trigrams."""
+
+
+    def setUp(self):
+        self.index = TextIndex()
+        self.index.update(1, 'Buy Milk\nat the corner shop')
+        self.index.update(2, 'Write the report')
+
+
+    def test_substrings_are_found(self):
+        self.assertEqual({1}, self.index.search('milk'))
+        self.assertEqual({1}, self.index.search('ORNER SH'))
+        self.assertEqual(set(), self.index.search('bread'))
+
+
+    def test_short_words_scan_every_text(self):
+        self.assertEqual({1, 2}, self.index.search('th'))
+
+
+    def test_updates_replace_the_text(self):
+        self.index.update(1, 'Buy bread')
+
+        self.assertEqual(set(), self.index.search('milk'))
+        self.assertEqual({1}, self.index.search('bread'))
+
+
+    def test_removed_keys_are_forgotten(self):
+        self.index.remove(1)
+
+        self.assertEqual(set(), self.index.search('milk'))
+        self.assertNotIn('mil', self.index.postings)
+
+
+class TaskStoreTextIndexTest(TestCase):
+    """The task store keeps the index of its tasks."""
+
+
+    def setUp(self):
+        self.store = TaskStore()
+        self.task = self.store.new('Groceries')
+        self.task.content = 'milk, eggs and a very long list ' * 10 + 'flour'
+
+
+    def test_content_is_searched_past_the_excerpt(self):
+        query = parse_search_query('flour')
+        query.start_pass(self.store.text_index)
+
+        self.assertTrue(query.matches(self.task))
+
+
+    def test_edits_are_followed(self):
+        query = parse_search_query('flour')
+        query.start_pass(self.store.text_index)
+        self.task.content = 'milk'
+
+        self.assertFalse(query.matches(self.task))
+
+
+    def test_removed_tasks_leave_the_index(self):
+        self.store.remove(self.task.id)
+
+        self.assertEqual(set(), self.store.text_index.search('groceries'))
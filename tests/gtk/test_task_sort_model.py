@@ -0,0 +1,127 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from gi.repository import Gio, Gtk
+
+from GTG.core.sorters import TaskTitleSorter, unwrap
+from GTG.core.tasks import Task, TaskStore
+from GTG.gtk.browser.task_sort_model import TaskSortModel
+
+
+def _children_model(task):
+    if not task.children:
+        return None
+
+    model = Gio.ListStore.new(Task)
+
+    for child in task.children:
+        model.append(child)
+
+    return model
+
+
+class TaskSortModelTest(TestCase):
+    """Rows are sorted like a tree, and changed rows move on their own."""
+
+
+    def setUp(self):
+        self.store = TaskStore()
+        self.b = self.store.new('b')
+        self.d = self.store.new('d')
+        self.b2 = self.store.new('b2', self.b.id)
+        self.b1 = self.store.new('b1', self.b.id)
+        self.f = self.store.new('f')
+
+        roots = Gio.ListStore.new(Task)
+
+        for task in (self.f, self.b, self.d):
+            roots.append(task)
+
+        # Autoexpanded, so every row is shown
+        self.tree = Gtk.TreeListModel.new(roots, False, True, _children_model)
+        self.sorter = TaskTitleSorter()
+        self.model = TaskSortModel(self.tree, self.sorter)
+
+        self.changes = []
+        self.model.connect('items-changed',
+                           lambda model, *change: self.changes.append(change))
+
+
+    def titles(self):
+        return [unwrap(self.model.get_item(i), Task).title
+                for i in range(self.model.get_n_items())]
+
+
+    def row_of(self, task):
+        for i in range(self.model.get_n_items()):
+            row = self.model.get_item(i)
+
+            if unwrap(row, Task) is task:
+                return row
+
+
+    def rename(self, task, title):
+        task.title = title
+        self.sorter.forget(task)
+        self.model.reposition([self.row_of(task)])
+
+
+    def test_subtasks_follow_their_parent(self):
+        self.assertEqual(['b', 'b1', 'b2', 'd', 'f'], self.titles())
+
+
+    def test_changed_row_moves_alone(self):
+        self.rename(self.f, 'a')
+
+        self.assertEqual(['a', 'b', 'b1', 'b2', 'd'], self.titles())
+        self.assertEqual([(4, 1, 0), (0, 0, 1)], self.changes)
+
+
+    def test_subtasks_move_with_their_parent(self):
+        self.rename(self.b, 'e')
+
+        self.assertEqual(['d', 'e', 'b1', 'b2', 'f'], self.titles())
+        self.assertEqual([(0, 3, 0), (1, 0, 3)], self.changes)
+
+
+    def test_subtask_moves_among_its_siblings(self):
+        self.rename(self.b1, 'b3')
+
+        self.assertEqual(['b', 'b2', 'b3', 'd', 'f'], self.titles())
+
+
+    def test_row_still_in_order_does_not_move(self):
+        self.rename(self.d, 'c')
+
+        self.assertEqual(['b', 'b1', 'b2', 'c', 'f'], self.titles())
+        self.assertEqual([], self.changes)
+
+
+    def test_reversed_order_keeps_subtasks_after_their_parent(self):
+        self.sorter.reverse = True
+
+        self.assertEqual(['f', 'd', 'b', 'b2', 'b1'], self.titles())
+
+
+    def test_new_rows_go_in_place(self):
+        self.tree.get_model().append(self.store.new('c'))
+
+        self.assertEqual(['b', 'b1', 'b2', 'c', 'd', 'f'], self.titles())
+        self.assertEqual([(3, 0, 1)], self.changes)